@@ -0,0 +1,257 @@
+"""
+Headless HTTP inference servisi (ASGI / FastAPI)
+Modeller her worker process'te bir kez yüklenir ve registry üzerinden paylaşılır.
+
+Çalıştırma:
+    CHATBOT_BACKENDS="Traditional ML,Hugging Face" uvicorn app.inference_server:app --workers 4 --port 8000
+    CHATBOT_METRICS=1 ile /metrics endpoint'i Prometheus formatında aşama sürelerini döndürür.
+    POST /chat/stream cevabı NDJSON olarak akıtır (Gemini'de intent ilk parçalarda, cevap kelime kelime).
+"""
+
+import json
+import os
+import sys
+from typing import Annotated, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import metrics, registry
+from models.conversation_store import ConversationStore, RedisConversationBackend, SQLiteConversationBackend
+
+DEFAULT_MODEL = os.getenv('CHATBOT_DEFAULT_MODEL', 'Traditional ML')
+PRELOAD_BACKENDS = [
+    name.strip() for name in os.getenv('CHATBOT_BACKENDS', DEFAULT_MODEL).split(',') if name.strip()
+]
+MAX_BATCH_SIZE = int(os.getenv('CHATBOT_MAX_BATCH_SIZE', '256'))
+MICRO_BATCH_SIZE = int(os.getenv('CHATBOT_MICRO_BATCH_SIZE', '32'))
+MICRO_BATCH_WAIT_MS = float(os.getenv('CHATBOT_MICRO_BATCH_WAIT_MS', '5'))
+CONTEXT_TURNS = int(os.getenv('CHATBOT_CONTEXT_TURNS', '4'))
+
+
+def _build_conversation_store():
+    """Birden fazla worker aynı oturumu görsün diye Redis ya da SQLite katmanı kullanılabilir"""
+    if os.getenv('CHATBOT_REDIS_URL'):
+        backend = RedisConversationBackend(url=os.environ['CHATBOT_REDIS_URL'])
+    elif os.getenv('CHATBOT_CONVERSATION_DB'):
+        backend = SQLiteConversationBackend(os.environ['CHATBOT_CONVERSATION_DB'])
+    else:
+        backend = None
+    return ConversationStore(context_turns=CONTEXT_TURNS, backend=backend)
+
+
+conversation_store = _build_conversation_store()
+
+app = FastAPI(title="E-Ticaret Chatbot Inference API")
+
+
+class ClassifyRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+    model: str = DEFAULT_MODEL
+
+
+class BatchClassifyRequest(BaseModel):
+    texts: List[Annotated[str, Field(min_length=1)]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    model: str = DEFAULT_MODEL
+
+
+class Turn(BaseModel):
+    role: str
+    content: str
+    intent: Optional[str] = None
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1)
+    model: str = DEFAULT_MODEL
+    # Bağlam ya istemciden gelir ya da session_id ile sunucudaki konuşma deposundan okunur
+    session_id: Optional[str] = None
+    context: List[Turn] = []
+
+
+def _get_chatbot(model_name):
+    if model_name not in registry.BACKENDS:
+        raise HTTPException(status_code=404, detail=f"Bilinmeyen model: {model_name}")
+    try:
+        return registry.get_chatbot(model_name)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"{model_name} modeli yüklenemedi: {e}")
+
+
+@app.on_event("startup")
+def preload_models():
+    """Worker başlarken modelleri yükle - ilk istek yükleme maliyeti ödemesin"""
+    for model_name in PRELOAD_BACKENDS:
+        try:
+            registry.warmup(registry.get_chatbot(model_name))
+            print(f"✅ {model_name} modeli hazır (pid={os.getpid()})")
+        except Exception as e:
+            print(f"❌ {model_name} modeli yüklenemedi: {e}")
+
+
+@app.get("/health")
+def health():
+    return {
+        'status': 'ok',
+        'pid': os.getpid(),
+        'models': sorted(registry.loaded_chatbots().keys()),
+        'model_versions': registry.model_versions(),
+        'default_model': DEFAULT_MODEL
+    }
+
+
+@app.get("/models/{model_name}")
+def model_info(model_name: str):
+    """Modelin sürümü (gerekirse yüklenir) - istemciler kayıtlı sonuçları buna göre geçersizleştirir"""
+    chatbot = _get_chatbot(model_name)
+    return {'model': model_name, 'model_version': getattr(chatbot, 'model_version', None)}
+
+
+async def _classify_one(model_name, text):
+    """Tek mesajı micro-batcher üzerinden (varsa) sınıflandır"""
+    chatbot = await run_in_threadpool(_get_chatbot, model_name)
+    batcher = registry.get_batcher(model_name, max_batch_size=MICRO_BATCH_SIZE, max_wait_ms=MICRO_BATCH_WAIT_MS)
+    if batcher is not None:
+        intent, confidence = await batcher.submit_async(text)
+    else:
+        intent, confidence = (await run_in_threadpool(registry.classify_texts, chatbot, [text]))[0]
+    return chatbot, intent, confidence
+
+
+@app.get("/stats")
+def stats():
+    return {'pid': os.getpid(), 'batchers': registry.batcher_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Aşama süreleri ve olay sayaçları (CHATBOT_METRICS=1 ile toplanır)"""
+    return PlainTextResponse(metrics.export_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/classify")
+async def classify(request: ClassifyRequest):
+    _, intent, confidence = await _classify_one(request.model, request.text)
+    return {'model': request.model, 'intent': intent, 'confidence': confidence}
+
+
+@app.post("/classify/batch")
+def classify_batch(request: BatchClassifyRequest):
+    chatbot = _get_chatbot(request.model)
+    results = registry.classify_texts(chatbot, request.texts)
+    return {
+        'model': request.model,
+        'results': [{'intent': intent, 'confidence': confidence} for intent, confidence in results]
+    }
+
+
+def _request_context(request):
+    """İstemcinin verdiği bağlam ya da konuşma deposundaki son turlar (depo I/O yapabilir, thread'de çağrılır)"""
+    context = [turn.model_dump(exclude_none=True) for turn in request.context]
+    if request.session_id and not context:
+        context = conversation_store.context(request.session_id)
+    return context
+
+
+def _remember_turn(request, result):
+    """Turu konuşma deposuna yaz (SQLite/Redis I/O'su event loop'u bloklamasın diye thread'de çağrılır)"""
+    if request.session_id:
+        conversation_store.append(request.session_id, 'user', request.message)
+        conversation_store.append(
+            request.session_id, 'assistant', result['response'],
+            model=request.model, intent=str(result['intent']), confidence=float(result['confidence'])
+        )
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    chatbot = await run_in_threadpool(_get_chatbot, request.model)
+    context = await run_in_threadpool(_request_context, request)
+    
+    if request.model in registry.BATCHED_BACKENDS and not context:
+        _, intent, confidence = await _classify_one(request.model, request.message)
+        result = chatbot.build_chat_response(request.message, intent, confidence)
+    else:
+        result = await run_in_threadpool(chatbot.chat, request.message, context or None)
+    
+    await run_in_threadpool(_remember_turn, request, result)
+
+    response = {
+        'model': request.model,
+        'intent': str(result['intent']),
+        'confidence': float(result['confidence']),
+        'response': result['response']
+    }
+    if 'tier' in result:
+        response['tier'] = result['tier']
+    return response
+
+
+async def _chat_events(chatbot, message, context):
+    """astream_chat destekleyen backend'lerde gerçek akış; diğerlerinde tek seferlik chat sonucu"""
+    astream_chat = getattr(chatbot, 'astream_chat', None)
+    if astream_chat is not None:
+        async for event in astream_chat(message, context=context or None):
+            yield event
+        return
+    result = await run_in_threadpool(chatbot.chat, message, context or None)
+    yield {'intent': result['intent'], 'confidence': result['confidence']}
+    yield result['response']
+    yield result
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """NDJSON akışı: {"type": "intent"} -> {"type": "token"}... -> {"type": "done"}"""
+    chatbot = await run_in_threadpool(_get_chatbot, request.model)
+    context = await run_in_threadpool(_request_context, request)
+    
+    async def events():
+        result = None
+        async for event in _chat_events(chatbot, request.message, context):
+            if isinstance(event, dict) and 'response' in event:
+                result = event
+                continue
+            if isinstance(event, dict):
+                line = {'type': 'intent', 'intent': str(event['intent']), 'confidence': float(event['confidence'])}
+            else:
+                line = {'type': 'token', 'text': event}
+            yield json.dumps(line, ensure_ascii=False) + '\n'
+        
+        await run_in_threadpool(_remember_turn, request, result)
+        done = {
+            'type': 'done',
+            'model': request.model,
+            'intent': str(result['intent']),
+            'confidence': float(result['confidence']),
+            'response': result['response']
+        }
+        # Akış yarıda kesildiyse istemci kısalmış cevabı hatadan ayırt edebilsin
+        if result.get('error'):
+            done['error'] = result['error']
+        yield json.dumps(done, ensure_ascii=False) + '\n'
+    
+    return StreamingResponse(events(), media_type='application/x-ndjson')
+
+
+@app.get("/conversations/{session_id}")
+def conversation_history(session_id: str, limit: Optional[int] = None):
+    return {'session_id': session_id, 'messages': conversation_store.history(session_id, limit=limit)}
+
+
+@app.delete("/conversations/{session_id}")
+def clear_conversation(session_id: str):
+    conversation_store.clear(session_id)
+    return {'session_id': session_id, 'cleared': True}
+
+
+@app.get("/cascade/stats")
+def cascade_stats():
+    cascade = registry.loaded_chatbots().get('Cascade')
+    if not cascade:
+        raise HTTPException(status_code=404, detail="Cascade modeli yüklü değil")
+    return cascade[0].tier_stats()
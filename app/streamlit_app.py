@@ -2,17 +2,23 @@ import streamlit as st
 import pandas as pd
 import sys
 import os
-import plotly.express as px
-import plotly.graph_objects as go
+import uuid
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import confusion_matrix
-import seaborn as sns
-import matplotlib.pyplot as plt
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.gemini_model import GeminiChatbot
-from models.huggingface_model import HuggingFaceChatbot
+from models import metrics, registry
+from models.conversation_store import ConversationStore, SQLiteConversationBackend
+from models.evaluation_engine import EvaluationEngine, dataset_hash
+from models.remote_chatbot import RemoteChatbot
+from models.results_store import ResultsStore
+
+INFERENCE_SERVER_URL = os.getenv('INFERENCE_SERVER_URL')
+RESULTS_DB_PATH = os.getenv('EVALUATION_RESULTS_DB', 'evaluation_results.db')
+CONVERSATION_DB_PATH = os.getenv('CHATBOT_CONVERSATION_DB')
+CHAT_PAGE_SIZE = 20
+# Uzak modelin sürümü bu süre boyunca yeniden sorulmaz (sn)
+MODEL_VERSION_TTL = int(os.getenv('CHATBOT_MODEL_VERSION_TTL', '60'))
 
 st.set_page_config(
     page_title="🛍️ E-Ticaret Chatbot",
@@ -29,28 +35,6 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .chat-message {
-        padding: 1rem;
-        border-radius: 10px;
-        margin-bottom: 1rem;
-        color: #000000;
-    }
-    .user-message {
-        background-color: #DCF8C6;
-        margin-left: 20%;
-        color: #000000;
-    }
-    .bot-message {
-        background-color: #F1F1F1;
-        margin-right: 20%;
-        color: #000000;
-    }
-    .chat-message strong {
-        color: #000000;
-    }
-    .chat-message small {
-        color: #555555;
-    }
     .metric-card {
         background-color: #F8F9FA;
         padding: 1rem;
@@ -78,32 +62,170 @@ def load_dataset():
         st.error("Veri seti bulunamadı! data/ecommerce_dataset.csv dosyasını kontrol edin.")
         return None
 
+@st.cache_resource
+def get_conversation_store():
+    """Tüm oturumların paylaştığı, oturum başına bellek sınırlı konuşma deposu"""
+    backend = SQLiteConversationBackend(CONVERSATION_DB_PATH) if CONVERSATION_DB_PATH else None
+    return ConversationStore(max_turns=200, context_turns=4, backend=backend)
+
+@st.cache_resource
+def get_results_store():
+    """Değerlendirme sonuçları deposu - tüm oturumlar paylaşır"""
+    return ResultsStore(RESULTS_DB_PATH)
+
+def get_test_split(data):
+    """Karşılaştırmada kullanılan sabit test bölmesi"""
+    _, test_data = train_test_split(data, test_size=0.2, random_state=42, stratify=data['intent'])
+    return test_data
+
+@st.cache_data(ttl=MODEL_VERSION_TTL, show_spinner=False)
+def get_model_version(model_name, _chatbot):
+    """Modelin sürümü - RemoteChatbot'ta her erişim HTTP isteği olduğu için rerun'lar arasında cache'lenir"""
+    return str(getattr(_chatbot, 'model_version', None) or model_name)
+
+def _evaluate(chatbots, test_data, predict_missing):
+    engine = EvaluationEngine(
+        chatbots,
+        store=get_results_store(),
+        predict_missing=predict_missing,
+        progress=lambda name, completed, total: None
+    )
+    return engine.evaluate(test_data)
+
+@st.cache_data(show_spinner=False)
+def _stored_evaluation(data_hash, model_versions, _chatbots, _test_data):
+    """Veri seti ve model sürümleri değişmedikçe kayıtlı sonuçlar her rerun'da yeniden hesaplanmaz"""
+    return _evaluate(_chatbots, _test_data, predict_missing=False)
+
+def load_evaluation_results(chatbots, test_data, predict_missing=False):
+    """Kayıtlı tahminlerden sonuçları üret; predict_missing=True ise eksik satırlar için çıkarım yap"""
+    if predict_missing:
+        results = _evaluate(chatbots, test_data, predict_missing=True)
+        # Yeni tahminler kaydedildi, cache'teki eksik sonuçlar artık geçersiz
+        _stored_evaluation.clear()
+        return results
+    
+    model_versions = tuple(
+        (name, get_model_version(name, chatbot)) for name, chatbot in sorted(chatbots.items())
+    )
+    data_hash = dataset_hash(test_data['text'].astype(str), test_data['intent'].astype(str))
+    return _stored_evaluation(data_hash, model_versions, chatbots, test_data)
+
 def initialize_chatbots():
     """Chatbot'ları başlat"""
     chatbots = {}
     
+    # Inference servisi tanımlıysa arayüz sadece ince bir istemcidir
+    if INFERENCE_SERVER_URL:
+        try:
+            for model_name in RemoteChatbot.available_models(INFERENCE_SERVER_URL):
+                chatbots[model_name] = RemoteChatbot(INFERENCE_SERVER_URL, model_name)
+            st.sidebar.success(f"✅ Inference servisi: {INFERENCE_SERVER_URL}")
+        except Exception as e:
+            st.sidebar.error(f"❌ Inference servisine bağlanılamadı: {e}")
+        return chatbots
+    
     # API Key kontrolü burada yapılıyor.
     gemini_key = st.sidebar.text_input("Gemini API Key:", type="password")
     use_huggingface = st.sidebar.checkbox("🤗 Hugging Face Kullan", value=True)
     
+    # Modeller process genelindeki registry'de tutulur; rerun'lar ve oturumlar aynı nesneleri kullanır
     if gemini_key:
         try:
-            chatbots['Gemini'] = GeminiChatbot(api_key=gemini_key)
+            chatbots['Gemini'] = registry.get_chatbot('Gemini', api_key=gemini_key)
             st.sidebar.success("✅ Gemini modeli hazır!")
         except Exception as e:
             st.sidebar.error(f"❌ Gemini modeli hatası: {e}")
     
     if use_huggingface:
-        try:
-            with st.spinner("🤗 Hugging Face modeli yükleniyor..."):
-                chatbots['Hugging Face'] = HuggingFaceChatbot()
-            st.sidebar.success("✅ Hugging Face modeli hazır!")
-        except Exception as e:
-            st.sidebar.error(f"❌ Hugging Face modeli hatası: {e}")
+        future = registry.load_in_background('Hugging Face')
+        if not future.done():
+            st.sidebar.info("⏳ Hugging Face modeli arka planda yükleniyor...")
+            st.sidebar.button("🔄 Durumu Yenile")
+        elif future.exception() is not None:
+            st.sidebar.error(f"❌ Hugging Face modeli hatası: {future.exception()}")
             st.sidebar.info("Çözüm: pip install transformers torch")
+        else:
+            chatbots['Hugging Face'] = future.result()
+            st.sidebar.success("✅ Hugging Face modeli hazır!")
     
     return chatbots
 
+def _stream_text(stream, result):
+    """chat_stream() parçalarını st.write_stream'e aktar; en sondaki sonuç sözlüğü result'a yazılır"""
+    for chunk in stream:
+        if isinstance(chunk, dict):
+            result.update(chunk)
+        else:
+            yield chunk
+
+def render_message(message):
+    """Tek bir mesajı chat balonu olarak çiz"""
+    with st.chat_message(message['role']):
+        st.markdown(message['content'])
+        if message['role'] == 'assistant':
+            st.caption(f"🤖 {message['model']} | Intent: {message['intent']} | Güven: {message['confidence']:.2f}")
+
+@st.fragment
+def chat_view(chatbot, model_name, conversation_store, session_id):
+    """Sohbet alanı - her mesajda sadece bu fragment yeniden çalışır, sayfanın geri kalanı değil"""
+    if 'history_pages' not in st.session_state:
+        st.session_state.history_pages = 1
+    
+    if st.button("🗑️ Konuşmayı Temizle"):
+        conversation_store.clear(session_id)
+        st.session_state.history_pages = 1
+    
+    user_input = st.chat_input("Merhaba, size nasıl yardımcı olabilirim?")
+    
+    history = conversation_store.history(session_id)
+    # Uzun oturumlarda sadece son sayfalar çizilir; eskiler istenirse açılır
+    visible = CHAT_PAGE_SIZE * st.session_state.history_pages
+    hidden = len(history) - visible
+    if hidden > 0:
+        # Etiket sabit kalmalı: değişirse widget kimliği değişir ve tıklama kaybolur
+        st.caption(f"{hidden} eski mesaj gizlendi")
+        if st.button("⬆️ Daha eski mesajlar", key="older_messages"):
+            st.session_state.history_pages += 1
+            visible += CHAT_PAGE_SIZE
+    
+    for message in history[-visible:]:
+        render_message(message)
+    
+    if not user_input:
+        return
+    
+    # Takip mesajları ("ne zaman gelecek") son turlarla birlikte yorumlanır
+    context = conversation_store.context(session_id)
+    # Kullanıcı mesajı cevap gelene kadar sadece çizilir; hata olursa geçmişte cevapsız mesaj kalmaz
+    render_message({'role': 'user', 'content': user_input})
+    
+    with st.chat_message('assistant'):
+        try:
+            chat_stream = getattr(chatbot, 'chat_stream', None)
+            if chat_stream is not None:
+                # Yanıt parça parça gelir; intent/güven akışın sonunda bilinir
+                result = {}
+                st.write_stream(_stream_text(chat_stream(user_input, context=context), result))
+            else:
+                with st.spinner(f"{model_name} düşünüyor..."):
+                    result = chatbot.chat(user_input, context=context)
+                st.markdown(result['response'])
+        except Exception as e:
+            st.error(f"❌ {model_name} yanıt veremedi: {e}")
+            return
+        st.caption(f"🤖 {model_name} | Intent: {result['intent']} | Güven: {result['confidence']:.2f}")
+        if result.get('error'):
+            st.warning(f"⚠️ Yanıt akışı yarıda kesildi: {result['error']}")
+    
+    conversation_store.append(session_id, 'user', user_input)
+    conversation_store.append(
+        session_id, 'assistant', result['response'],
+        model=model_name,
+        intent=result['intent'],
+        confidence=result['confidence']
+    )
+
 def main():
     # Ana başlık
     st.markdown('<h1 class="main-header">🛍️ E-Ticaret Chatbot</h1>', unsafe_allow_html=True)
@@ -133,64 +255,19 @@ def main():
                 help="Konuşmak istediğiniz AI modelini seçin"
             )
             
-            if 'chat_history' not in st.session_state:
-                st.session_state.chat_history = []
-            
-            chat_container = st.container()
-            
-            with chat_container:
-                for message in st.session_state.chat_history:
-                    if message['role'] == 'user':
-                        st.markdown(f"""
-                        <div class="chat-message user-message">
-                            <strong>👤 Sen:</strong> {message['content']}
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"""
-                        <div class="chat-message bot-message">
-                            <strong>🤖 {message['model']}:</strong> {message['content']}<br>
-                            <small>Intent: {message['intent']} | Güven: {message['confidence']:.2f}</small>
-                        </div>
-                        """, unsafe_allow_html=True)
-            
-            
-            if 'input_counter' not in st.session_state:
-                st.session_state.input_counter = 0
-                
-            user_input = st.text_input("💬 Mesajınızı yazın:", key=f"chat_input_{st.session_state.input_counter}", placeholder="Merhaba, size nasıl yardımcı olabilirim?")
-            send_button = st.button("📤 Gönder", type="primary")
-            
-            if (user_input and send_button) and selected_model in chatbots:
-                # Kullanıcının gireceği mesaj 
-                st.session_state.chat_history.append({
-                    'role': 'user',
-                    'content': user_input
-                })
-                
-                with st.spinner(f"{selected_model} düşünüyor..."):
-                    result = chatbots[selected_model].chat(user_input)
-                    
-                    st.session_state.chat_history.append({
-                        'role': 'assistant',
-                        'content': result['response'],
-                        'model': selected_model,
-                        'intent': result['intent'],
-                        'confidence': result['confidence']
-                    })
-                
-                st.session_state.input_counter += 1
-                st.rerun()
+            if 'session_id' not in st.session_state:
+                st.session_state.session_id = uuid.uuid4().hex
             
-            if st.button("🗑️ Konuşmayı Temizle"):
-                st.session_state.chat_history = []
-                st.rerun()
+            chat_view(chatbots[selected_model], selected_model, get_conversation_store(), st.session_state.session_id)
     
     with tab2:
         st.header("📊 Veri Seti Analizi")
         
         data = load_dataset()
         if data is not None:
+            # Plotly sadece grafik çizilecekse import edilir
+            import plotly.express as px
+            
             col1, col2 = st.columns(2)
             
             with col1:
@@ -264,21 +341,34 @@ def main():
         else:
             data = load_dataset()
             if data is not None:
-                st.info("⏳ Model karşılaştırması uzun sürebilir. Lütfen bekleyiniz...")
+                test_data = get_test_split(data)
+                # Kayıtlı tahminler anında yüklenir; sadece yeni model sürümleri / veri için çıkarım gerekir
+                results = load_evaluation_results(chatbots, test_data)
+                missing = {
+                    name: result['total'] - result['completed']
+                    for name, result in results.items() if result['completed'] < result['total']
+                }
                 
-                if st.button("🚀 Modelleri Karşılaştır"):
-                    train_data, test_data = train_test_split(
-                        data, test_size=0.2, random_state=42, stratify=data['intent']
-                    )
-                    
-                    results = {}
-                    
-                    for model_name, chatbot in chatbots.items():
-                        with st.spinner(f"{model_name} modeli değerlendiriliyor..."):
-                            result = chatbot.evaluate_model(test_data.head(20))  # Hız için ilk 20 örnek 
-                            results[model_name] = result
-                    
-                    st.success("✅ Değerlendirme tamamlandı!")
+                if missing:
+                    st.info("⏳ Kayıtlı sonucu eksik modeller: " + ', '.join(
+                        f"{name} ({count} satır)" for name, count in missing.items()
+                    ))
+                    if st.button("🚀 Modelleri Karşılaştır"):
+                        with st.spinner("Sadece eksik satırlar değerlendiriliyor..."):
+                            results.update(load_evaluation_results(
+                                {name: chatbots[name] for name in missing}, test_data, predict_missing=True
+                            ))
+                        st.success("✅ Değerlendirme tamamlandı!")
+                else:
+                    st.success(f"✅ Sonuçlar kayıttan yüklendi ({len(test_data)} test örneği)")
+                
+                for model_name, result in results.items():
+                    if result['error']:
+                        st.warning(f"⚠️ {model_name} değerlendirmesi yarıda kaldı: {result['error']}")
+                
+                results = {name: result for name, result in results.items() if result['completed']}
+                if results:
+                    import plotly.express as px
                     
                     metrics_df = pd.DataFrame({
                         'Model': list(results.keys()),
@@ -289,7 +379,12 @@ def main():
                     })
                     
                     st.subheader("📊 Model Performansları")
-                    st.dataframe(metrics_df, use_container_width=True)
+                    st.dataframe(
+                        metrics_df.assign(**{'Örnek': [
+                            f"{results[model]['completed']}/{results[model]['total']}" for model in results.keys()
+                        ]}),
+                        use_container_width=True
+                    )
                     
                     fig = px.bar(
                         metrics_df.melt(id_vars=['Model'], var_name='Metric', value_name='Score'),
@@ -303,14 +398,97 @@ def main():
     
     with tab4:
         st.header("📈 Performans Detayları")
-        st.info("Bu bölüm model değerlendirme sonrası görüntülenecektir.")
         
-        # grafikler
+        if not metrics.is_enabled():
+            st.info("Aşama bazlı ölçüm kapalı. CHATBOT_METRICS=1 ile başlatabilir ya da buradan açabilirsiniz.")
+            if st.button("⏱️ Ölçümü Aç"):
+                metrics.enable()
+                st.rerun()
+        else:
+            snapshot = metrics.snapshot()
+            col_refresh, col_reset = st.columns(2)
+            with col_refresh:
+                st.button("🔄 Yenile")
+            with col_reset:
+                if st.button("🧹 Sıfırla"):
+                    metrics.reset()
+                    st.rerun()
+            
+            if not snapshot['stages']:
+                st.info("Henüz ölçüm yok. Chat sekmesinden birkaç mesaj gönderin.")
+            else:
+                import plotly.express as px
+                
+                stages_df = pd.DataFrame(snapshot['stages'])
+                
+                st.subheader("⏱️ Aşama Bazlı Gecikme")
+                fig = px.bar(
+                    stages_df[stages_df['stage'] != 'chat'],
+                    x='backend',
+                    y='total_s',
+                    color='stage',
+                    title="Toplam süre dağılımı (sn)"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(
+                    stages_df[['backend', 'stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms']],
+                    use_container_width=True
+                )
+            
+            if snapshot['events']:
+                st.subheader("🏷️ Olaylar")
+                st.dataframe(pd.DataFrame(snapshot['events']), use_container_width=True)
+            
+            with st.expander("Prometheus çıktısı"):
+                st.code(metrics.export_prometheus(), language="text")
+        
+        data = load_dataset()
+        stored_results = {}
+        if data is not None and chatbots:
+            stored_results = {
+                name: result for name, result in load_evaluation_results(chatbots, get_test_split(data)).items()
+                if result['completed']
+            }
+        
         st.subheader("🎯 Intent Accuracy Breakdown")
-        st.info("Model karşılaştırması yapıldıktan sonra intent bazında accuracy gösterilecek.")
+        if not stored_results:
+            st.info("Model karşılaştırması yapıldıktan sonra intent bazında accuracy gösterilecek.")
+        else:
+            import plotly.express as px
+            
+            per_intent_df = pd.DataFrame([
+                {'Model': model_name, 'Intent': intent, **values}
+                for model_name, result in stored_results.items()
+                for intent, values in result['per_intent'].items()
+                if values['support']
+            ])
+            fig = px.bar(
+                per_intent_df,
+                x='Intent',
+                y='recall',
+                color='Model',
+                barmode='group',
+                title="Intent bazında accuracy (recall)"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(per_intent_df, use_container_width=True)
         
         st.subheader("🔄 Confusion Matrix")
-        st.info("Modellerin confusion matrix'leri burada görüntülenecek.")
+        if not stored_results:
+            st.info("Modellerin confusion matrix'leri burada görüntülenecek.")
+        else:
+            selected_model = st.selectbox("Model", list(stored_results.keys()), key="confusion_model")
+            result = stored_results[selected_model]
+            fig = px.imshow(
+                result['confusion_matrix'],
+                x=result['labels'],
+                y=result['labels'],
+                text_auto=True,
+                color_continuous_scale='Blues',
+                labels={'x': 'Tahmin', 'y': 'Gerçek', 'color': 'Adet'},
+                title=f"{selected_model} Confusion Matrix"
+            )
+            st.plotly_chart(fig, use_container_width=True)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
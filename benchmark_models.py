@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+E-Ticaret Chatbot Performans Benchmark'ı
+Her backend için soğuk başlatma süresi, tek mesaj gecikmesi (p50/p95/p99), farklı batch
+boyutlarında throughput ve tepe bellek (RSS) ölçülür. Sonuçlar CI'ın regresyon kontrolü için
+JSON olarak yazılır. Gemini, API kotası harcanmadan yerel sahte sunucuya yönlendirilir.
+
+Kullanım:
+    python benchmark_models.py --backends "Traditional ML,Gemini" --output benchmark_results.json
+    python benchmark_models.py --baseline benchmark_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKENDS = ('Traditional ML', 'Hugging Face', 'Gemini')
+DEFAULT_BATCH_SIZES = (1, 8, 32, 128)
+
+# Regresyon kontrolü: metrik -> büyümesi mi (True) küçülmesi mi (False) kötü
+REGRESSION_METRICS = {
+    'cold_start_s': True,
+    'latency_ms.p50': True,
+    'latency_ms.p95': True,
+    'latency_ms.p99': True,
+    'peak_rss_mb': True,
+}
+
+
+def peak_rss_mb():
+    """Bu process'in tepe RSS değeri (Linux'ta KB, macOS'ta byte döner)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def load_texts(data_path):
+    import pandas as pd
+    return pd.read_csv(data_path)['text'].tolist()
+
+
+def _create_chatbot(name, gemini_latency):
+    from models import registry
+
+    if name == 'Gemini':
+        from tools.fake_gemini_server import start_fake_server
+        _, url = start_fake_server(latency=gemini_latency)
+        return registry.get_chatbot(
+            'Gemini', api_key='benchmark', api_endpoint=url,
+            requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000
+        )
+    return registry.get_chatbot(name)
+
+
+def prepare_traditional_model(data_path, model_path="trained_chatbot_model.pkl",
+                              compact_path="trained_chatbot_model.cmpt"):
+    """Kayıtlı model yoksa bir kez eğitip kaydet -> eğitim süresi (sn); cold start eğitimi ölçmesin"""
+    if os.path.exists(compact_path) or os.path.exists(model_path):
+        return None
+
+    from models.traditional_ml_model import TraditionalMLChatbot
+
+    start = time.perf_counter()
+    chatbot = TraditionalMLChatbot()
+    X, y = chatbot.prepare_data(data_path)
+    chatbot.select_best_model(X, y)
+    chatbot.save_model(model_path)
+    return time.perf_counter() - start
+
+
+def _single_message_fn(name, chatbot):
+    """chat()'in tek mesaj için kullandığı yol (Gemini'de toplu prompt değil classify_intent)"""
+    if name == 'Gemini':
+        return chatbot.classify_intent
+
+    from models.registry import classify_texts
+    return lambda text: classify_texts(chatbot, [text])
+
+
+def _measure_latency(classify_one, texts, iterations):
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        classify_one(texts[i % len(texts)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies = np.array(latencies)
+    return {
+        'p50': float(np.percentile(latencies, 50)),
+        'p95': float(np.percentile(latencies, 95)),
+        'p99': float(np.percentile(latencies, 99)),
+        'mean': float(latencies.mean())
+    }
+
+
+def _measure_throughput(chatbot, texts, batch_size, min_seconds):
+    from models.registry import classify_texts
+
+    batch = [texts[i % len(texts)] for i in range(batch_size)]
+    messages = 0
+    start = time.perf_counter()
+    while True:
+        classify_texts(chatbot, batch)
+        messages += batch_size
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return messages / elapsed
+
+
+def run_backend(name, data_path, iterations, batch_sizes, min_seconds, gemini_latency):
+    """Tek backend'i bu process'te ölç (cold start import'ları da kapsar)"""
+    start = time.perf_counter()
+    chatbot = _create_chatbot(name, gemini_latency)
+    classify_one = _single_message_fn(name, chatbot)
+    texts = load_texts(data_path)
+    classify_one(texts[0])
+    cold_start = time.perf_counter() - start
+
+    return {
+        'backend': name,
+        'model_version': getattr(chatbot, 'model_version', None),
+        'cold_start_s': cold_start,
+        'latency_ms': _measure_latency(classify_one, texts, iterations),
+        'throughput_msgs_per_s': {
+            str(batch_size): _measure_throughput(chatbot, texts, batch_size, min_seconds)
+            for batch_size in batch_sizes
+        },
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_isolated(name, args):
+    """Backend'i ayrı process'te ölç - cold start ve tepe RSS diğer backend'lerden etkilenmesin"""
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker', name,
+        '--data', args.data,
+        '--iterations', str(args.iterations),
+        '--batch-sizes', ','.join(str(size) for size in args.batch_sizes),
+        '--min-seconds', str(args.min_seconds),
+        '--gemini-latency', str(args.gemini_latency)
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'backend': name, 'error': completed.stderr.strip().splitlines()[-1:] or ['bilinmeyen hata']}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _get_metric(result, path):
+    value = result
+    for part in path.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def find_regressions(results, baseline, tolerance):
+    """Baseline'a göre tolerance oranından fazla kötüleşen metrikler"""
+    baseline_by_backend = {entry['backend']: entry for entry in baseline.get('results', [])}
+    regressions = []
+
+    for result in results:
+        previous = baseline_by_backend.get(result['backend'])
+        if not previous or 'error' in result or 'error' in previous:
+            continue
+
+        metrics = dict(REGRESSION_METRICS)
+        metrics.update({f"throughput_msgs_per_s.{size}": False for size in result['throughput_msgs_per_s']})
+
+        for path, higher_is_worse in metrics.items():
+            current, old = _get_metric(result, path), _get_metric(previous, path)
+            if current is None or not old:
+                continue
+            change = (current - old) / old
+            if (change if higher_is_worse else -change) > tolerance:
+                regressions.append({
+                    'backend': result['backend'], 'metric': path,
+                    'baseline': old, 'current': current, 'change': change
+                })
+
+    return regressions
+
+
+def print_summary(results):
+    print("\n" + "=" * 60)
+    print("⏱️ BENCHMARK SONUÇLARI")
+    print("=" * 60)
+    for result in results:
+        if 'error' in result:
+            print(f"❌ {result['backend']}: {result['error']}")
+            continue
+        latency = result['latency_ms']
+        throughput = ', '.join(
+            f"b={size}: {value:.0f}/s" for size, value in result['throughput_msgs_per_s'].items()
+        )
+        print(f"🔬 {result['backend']}")
+        print(f"   Cold start: {result['cold_start_s']:.2f} s | Tepe RSS: {result['peak_rss_mb']:.0f} MB")
+        if 'training_s' in result:
+            print(f"   Eğitim (cold start'a dahil değil): {result['training_s']:.2f} s")
+        print(f"   Gecikme: p50={latency['p50']:.2f} ms, p95={latency['p95']:.2f} ms, p99={latency['p99']:.2f} ms")
+        print(f"   Throughput: {throughput}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Chatbot backend'leri için performans benchmark'ı")
+    parser.add_argument('--backends', default=','.join(BACKENDS), help="Virgülle ayrılmış backend listesi")
+    parser.add_argument('--data', default='data/ecommerce_dataset.csv')
+    parser.add_argument('--iterations', type=int, default=200, help="Gecikme ölçümü için mesaj sayısı")
+    parser.add_argument('--batch-sizes', default=','.join(str(size) for size in DEFAULT_BATCH_SIZES))
+    parser.add_argument('--min-seconds', type=float, default=1.0, help="Her batch boyutu için en az ölçüm süresi")
+    parser.add_argument('--gemini-latency', type=float, default=0.0, help="Sahte Gemini sunucusunun yapay gecikmesi (sn)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Karşılaştırılacak önceki JSON sonucu")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="İzin verilen kötüleşme oranı")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.batch_sizes = [int(size) for size in args.batch_sizes.split(',') if size.strip()]
+    return args
+
+
+def main():
+    args = parse_args()
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.worker:
+        result = run_backend(
+            args.worker, args.data, args.iterations, args.batch_sizes, args.min_seconds, args.gemini_latency
+        )
+        print(json.dumps(result))
+        return 0
+
+    print("🚀 Performans benchmark'ı başlıyor...")
+    names = [name.strip() for name in args.backends.split(',') if name.strip()]
+    # Eğitim worker'dan önce yapılır: cold start kayıtlı modelin yüklenmesini ölçer, eğitim ayrı raporlanır
+    training_s = prepare_traditional_model(args.data) if 'Traditional ML' in names else None
+
+    results = []
+    for name in names:
+        print(f"🔬 {name} ölçülüyor...")
+        result = run_isolated(name, args)
+        if name == 'Traditional ML' and training_s is not None:
+            result['training_s'] = training_s
+        results.append(result)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'iterations': args.iterations,
+            'batch_sizes': args.batch_sizes,
+            'gemini_latency': args.gemini_latency
+        },
+        'results': results
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['regressions'] = find_regressions(results, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"⚠️ Regresyon: {regression['backend']} {regression['metric']} "
+                  f"{regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['change']:+.0%})")
+        exit_code = 1 if report['regressions'] else 0
+
+    print_summary(results)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Sonuçlar kaydedildi: {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 E-Ticaret Chatbot Model Değerlendirme Scripti
-Bu script Gemini ve Hugging Face modellerini karşılaştırır.
+Bu script Gemini, Hugging Face ve Traditional ML modellerini tam test seti üzerinde karşılaştırır.
 """
 
 import pandas as pd
@@ -9,12 +9,12 @@ import numpy as np
 import sys
 import os
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-from models.gemini_model import GeminiChatbot
-from models.huggingface_model import HuggingFaceChatbot
+from models import registry
+from models.evaluation_engine import EvaluationEngine
+from models.results_store import ResultsStore
+from models.text_normalization import normalize_series
+from models.traditional_ml_model import TraditionalMLChatbot
 
 def load_data(file_path="data/ecommerce_dataset.csv"):
     """Veri setini yükle"""
@@ -26,8 +26,8 @@ def load_data(file_path="data/ecommerce_dataset.csv"):
         print(f"❌ Veri seti bulunamadı: {file_path}")
         return None
 
-def evaluate_models(data, test_size=0.2, sample_size=50):
-    """Modelleri değerlendir"""
+def evaluate_models(data, test_size=0.2, sample_size=None, results_db="evaluation_results.db"):
+    """Modelleri eşzamanlı değerlendir (tahminler sonuç deposuna yazılır, yarıda kalırsa kaldığı yerden devam eder)"""
     print("🔄 Veri seti train/test olarak bölünüyor...")
     
     train_data, test_data = train_test_split(
@@ -37,41 +37,51 @@ def evaluate_models(data, test_size=0.2, sample_size=50):
         stratify=data['intent']
     )
     
-    
-    test_sample = test_data.head(sample_size) if len(test_data) > sample_size else test_data
+    test_sample = test_data.head(sample_size) if sample_size and len(test_data) > sample_size else test_data
     print(f"📊 Test seti: {len(test_sample)} örnek")
     
-    results = {}
     models = {}
     
     try:
         print("🤖 Gemini modeli başlatılıyor...")
-        models['Gemini'] = GeminiChatbot()
+        models['Gemini'] = registry.get_chatbot('Gemini')
         print("✅ Gemini modeli hazır")
     except Exception as e:
         print(f"❌ Gemini model hatası: {e}")
     
     try:
         print("🤗 Hugging Face modeli başlatılıyor...")
-        models['Hugging Face'] = HuggingFaceChatbot()
+        models['Hugging Face'] = registry.get_chatbot('Hugging Face')
         print("✅ Hugging Face modeli hazır")
     except Exception as e:
         print(f"❌ Hugging Face model hatası: {e}")
     
+    try:
+        print("📚 Traditional ML modeli eğitim setiyle eğitiliyor...")
+        traditional = TraditionalMLChatbot()
+        traditional.select_best_model(normalize_series(train_data['text']), train_data['intent'])
+        models['Traditional ML'] = traditional
+    except Exception as e:
+        print(f"❌ Traditional ML model hatası: {e}")
+    
     if not models:
         print("❌ Hiçbir model başlatılamadı. API anahtarlarını kontrol edin.")
         return None
     
-    for model_name, model in models.items():
-        print(f"\n🔬 {model_name} modeli değerlendiriliyor...")
-        result = model.evaluate_model(test_sample)
-        results[model_name] = result
-        
-        print(f"📈 {model_name} Sonuçları:")
+    # Streamlit karşılaştırma sekmesi aynı depoyu okur
+    engine = EvaluationEngine(models, store=ResultsStore(results_db))
+    results = engine.evaluate(test_sample)
+    
+    for model_name, result in results.items():
+        print(f"\n📈 {model_name} Sonuçları ({result['completed']}/{result['total']} satır):")
         print(f"   Accuracy: {result['accuracy']:.3f}")
         print(f"   Precision: {result['precision']:.3f}")
         print(f"   Recall: {result['recall']:.3f}")
         print(f"   F1 Score: {result['f1_score']:.3f}")
+        if result['parse_failures']:
+            print(f"   ⚠️ Okunamayan cevap: {result['parse_failures']} satır ('unknown' olarak sayıldı)")
+        if result['error']:
+            print(f"   ⚠️ Yarıda kaldı: {result['error']} - tekrar çalıştırınca kalan satırlar işlenir")
     
     return results, test_sample
 
@@ -152,7 +162,7 @@ def main():
     for intent, count in data['intent'].value_counts().items():
         print(f"      {intent}: {count}")
     
-    results = evaluate_models(data, sample_size=30) 
+    results = evaluate_models(data)
     
     if results:
         results_dict, test_sample = results
@@ -0,0 +1,198 @@
+"""
+Kademeli (cascade) yönlendirici
+Önce ucuz TF-IDF modeli çalışır; güven intent bazlı eşiğin altındaysa Hugging Face'e,
+o da emin değilse Gemini'ye çıkılır. Eşikler veri setinden öğrenilir.
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.conversation_store import classify_with_context
+from models.registry import classify_texts
+from models.traditional_ml_model import TraditionalMLChatbot
+
+
+def learn_intent_thresholds(true_intents, predicted_intents, confidences, target_precision=0.9,
+                            min_support=3, default_threshold=0.6):
+    """Her tahmin edilen intent için, üstündeki tahminlerin precision'ı hedefi tutan en düşük güven eşiği"""
+    true_intents = np.asarray(true_intents)
+    predicted_intents = np.asarray(predicted_intents)
+    confidences = np.asarray(confidences, dtype=float)
+
+    thresholds = {}
+    for intent in np.unique(predicted_intents):
+        mask = predicted_intents == intent
+        if mask.sum() < min_support:
+            thresholds[str(intent)] = default_threshold
+            continue
+
+        order = np.argsort(-confidences[mask])
+        sorted_confidences = confidences[mask][order]
+        correct = (true_intents[mask][order] == intent).astype(float)
+        precision_at_k = np.cumsum(correct) / np.arange(1, len(correct) + 1)
+
+        # Aynı güven değerine sahip tahminler birlikte kabul/ret edilir: her grubun son elemanı
+        group_ends = np.append(sorted_confidences[1:] != sorted_confidences[:-1], True)
+        valid = np.where(group_ends & (precision_at_k >= target_precision))[0]
+
+        # Hiçbir eşik hedefi tutmuyorsa bu intent her zaman bir üst kademeye gider
+        thresholds[str(intent)] = float(sorted_confidences[valid[-1]]) if len(valid) else 1.01
+
+    return thresholds
+
+
+class CascadeChatbot:
+    def __init__(self, traditional, huggingface=None, gemini=None, thresholds=None, default_threshold=0.6):
+        """Tier sırası: Traditional ML -> Hugging Face -> Gemini (verilmeyen tier'lar atlanır)"""
+        self.tiers = [
+            (name, chatbot)
+            for name, chatbot in (('Traditional ML', traditional), ('Hugging Face', huggingface), ('Gemini', gemini))
+            if chatbot is not None
+        ]
+        self.thresholds = thresholds or {}
+        self.default_threshold = default_threshold
+        self.target_precision = None
+        self.tier_counts = Counter()
+        self.model_version = 'cascade:' + '+'.join(
+            f"{name}={getattr(chatbot, 'model_version', '')}" for name, chatbot in self.tiers
+        )
+
+    def fit_thresholds(self, data_path="data/ecommerce_dataset.csv", target_precision=0.9, n_splits=5):
+        """Tier eşiklerini veri setinden öğren (son tier her zaman kabul eder, eşiği yoktur)"""
+        data = pd.read_csv(data_path)
+        texts = data['text'].tolist()
+        true_intents = data['intent'].to_numpy()
+        self.target_precision = target_precision
+
+        for name, chatbot in self.tiers[:-1]:
+            print(f"🎚️ {name} eşikleri öğreniliyor...")
+            if name == 'Traditional ML' and chatbot.pipeline is not None:
+                predictions = self._out_of_fold_predictions(chatbot, texts, true_intents, n_splits)
+            else:
+                predictions = classify_texts(chatbot, texts)
+
+            predicted_intents = [intent for intent, _ in predictions]
+            confidences = [confidence for _, confidence in predictions]
+            self.thresholds[name] = learn_intent_thresholds(
+                true_intents, predicted_intents, confidences,
+                target_precision=target_precision, default_threshold=self.default_threshold
+            )
+
+        return self.thresholds
+
+    @staticmethod
+    def _out_of_fold_predictions(chatbot, texts, true_intents, n_splits):
+        """Eğitim verisindeki aşırı güveni önlemek için k-fold dışı tahminler"""
+        predictions = [None] * len(texts)
+        texts = np.asarray(texts, dtype=object)
+        fold_model = TraditionalMLChatbot()
+
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+        for train_idx, test_idx in skf.split(texts, true_intents):
+            processed = [TraditionalMLChatbot.preprocess_text(text) for text in texts[train_idx]]
+            fold_model.pipeline = clone(chatbot.pipeline).fit(processed, true_intents[train_idx])
+            fold_predictions = fold_model.predict_intents(texts[test_idx].tolist())
+            for i, intent, confidence in zip(test_idx, fold_predictions['intents'], fold_predictions['confidences']):
+                predictions[i] = (str(intent), float(confidence))
+
+        return predictions
+
+    def save_thresholds(self, filepath="cascade_thresholds.json"):
+        """Eşikleri tier model sürümleriyle birlikte kaydet (aynı anda yazan worker'lar yarım dosya bırakmaz)"""
+        payload = {
+            'model_version': self.model_version,
+            'target_precision': self.target_precision,
+            'thresholds': self.thresholds
+        }
+        with open(filepath + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        os.replace(filepath + '.tmp', filepath)
+
+    def load_thresholds(self, filepath="cascade_thresholds.json", target_precision=None):
+        """Kayıtlı eşikleri yükle; tier modelleri ya da hedef precision değiştiyse yüklemez ve False döner"""
+        with open(filepath, encoding='utf-8') as f:
+            payload = json.load(f)
+        if 'thresholds' not in payload:
+            # Sürüm bilgisi olmayan eski format: sadece eşikler
+            self.thresholds = payload
+            return True
+        if payload.get('model_version') != self.model_version:
+            return False
+        if target_precision is not None and payload.get('target_precision') != target_precision:
+            return False
+        self.thresholds = payload['thresholds']
+        self.target_precision = payload.get('target_precision')
+        return True
+
+    def _accepts(self, tier_name, intent, confidence):
+        threshold = self.thresholds.get(tier_name, {}).get(intent, self.default_threshold)
+        return confidence >= threshold
+
+    def classify_intents_with_tier(self, texts):
+        """Toplu cascade -> [(intent, confidence, tier), ...]; her tier sadece kalan metinleri görür"""
+        texts = list(texts)
+        results = [None] * len(texts)
+        pending = list(range(len(texts)))
+
+        for position, (name, chatbot) in enumerate(self.tiers):
+            if not pending:
+                break
+            is_last = position == len(self.tiers) - 1
+            predictions = classify_texts(chatbot, [texts[i] for i in pending])
+
+            escalated = []
+            for i, (intent, confidence) in zip(pending, predictions):
+                if is_last or self._accepts(name, intent, confidence):
+                    results[i] = (intent, confidence, name)
+                    self.tier_counts[name] += 1
+                else:
+                    escalated.append(i)
+            pending = escalated
+
+        return results
+
+    def classify_intents(self, texts):
+        return [(intent, confidence) for intent, confidence, _ in self.classify_intents_with_tier(texts)]
+
+    def classify_intent(self, text):
+        return self.classify_intents([text])[0]
+
+    def chat(self, user_message, context=None):
+        """Ana chat fonksiyonu - cevabı isteği karşılayan tier üretir"""
+        results = {}
+        
+        def classify(text):
+            results[text] = self.classify_intents_with_tier([text])[0]
+            return results[text][:2]
+        
+        intent, confidence = classify_with_context(classify, user_message, context, threshold=self.default_threshold)
+        # Bağlamlı tahmin seçildiyse cevabı onu üreten tier verir
+        tier = next(tier for i, c, tier in results.values() if (i, c) == (intent, confidence))
+        return self.build_chat_response(user_message, intent, confidence, tier)
+    
+    def build_chat_response(self, user_message, intent, confidence, tier=None):
+        tier = tier or self.tiers[0][0]
+        chatbot = dict(self.tiers)[tier]
+        result = chatbot.build_chat_response(user_message, intent, confidence)
+        result['tier'] = tier
+        return result
+
+    def tier_stats(self):
+        """Her tier'ın karşıladığı trafik oranı"""
+        total = sum(self.tier_counts.values())
+        return {
+            name: {
+                'count': self.tier_counts[name],
+                'fraction': self.tier_counts[name] / total if total else 0.0
+            }
+            for name, _ in self.tiers
+        }
@@ -0,0 +1,270 @@
+"""
+Hızlı yüklenen kompakt model formatı
+TF-IDF vocabulary/IDF ve sınıflandırıcı parametreleri tek bir dosyada ham NumPy dizileri olarak saklanır.
+Dosya memory-map ile açılır; çıkarım sklearn nesnelerini unpickle etmeden yapılır ve
+aynı dosyayı açan worker process'ler sayfaları işletim sistemi üzerinden paylaşır.
+
+Dosya düzeni:
+    MAGIC (8 byte) | header uzunluğu (uint64 LE) | header JSON | hizalanmış diziler
+"""
+
+import json
+import re
+import struct
+
+import numpy as np
+
+MAGIC = b'CMPTMDL1'
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _export_vectorizer(vectorizer, arrays):
+    """TfidfVectorizer -> header config + diziler"""
+    if type(vectorizer).__name__ != 'TfidfVectorizer' or vectorizer.analyzer != 'word':
+        raise ValueError("Kompakt format sadece kelime tabanlı TfidfVectorizer destekler!")
+    if vectorizer.strip_accents is not None or vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+        raise ValueError("Özel preprocessor/tokenizer/strip_accents kompakt formatta desteklenmiyor!")
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, index in vectorizer.vocabulary_.items():
+        terms[index] = term
+    encoded = [term.encode('utf-8') for term in terms]
+
+    arrays['vocab_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    arrays['vocab_offsets'] = np.concatenate([[0], np.cumsum([len(term) for term in encoded])]).astype(np.int64)
+    if vectorizer.use_idf:
+        arrays['idf'] = vectorizer.idf_.astype(np.float64)
+
+    stop_words = vectorizer.get_stop_words()
+    return {
+        'lowercase': vectorizer.lowercase,
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'stop_words': sorted(stop_words) if stop_words else None,
+        'binary': vectorizer.binary,
+        'use_idf': vectorizer.use_idf,
+        'sublinear_tf': vectorizer.sublinear_tf,
+        'norm': vectorizer.norm
+    }
+
+
+def _export_classifier(classifier, arrays):
+    """Lineer modeller, MultinomialNB ve RandomForest -> header config + diziler"""
+    name = type(classifier).__name__
+    config = {'classes': [str(label) for label in classifier.classes_]}
+
+    if name == 'LogisticRegression':
+        is_ovr = getattr(classifier, 'multi_class', 'auto') == 'ovr' or classifier.solver == 'liblinear'
+        config.update(kind='linear', proba='ovr' if is_ovr else 'softmax')
+        arrays['coef'] = classifier.coef_.astype(np.float64)
+        arrays['intercept'] = np.atleast_1d(classifier.intercept_).astype(np.float64)
+    elif name in ('SGDClassifier', 'LinearSVC', 'RidgeClassifier'):
+        is_log_loss = getattr(classifier, 'loss', None) in ('log_loss', 'log')
+        config.update(kind='linear', proba='ovr' if is_log_loss else 'decision')
+        arrays['coef'] = classifier.coef_.astype(np.float64)
+        arrays['intercept'] = np.atleast_1d(classifier.intercept_).astype(np.float64)
+    elif name == 'MultinomialNB':
+        config.update(kind='linear', proba='softmax')
+        arrays['coef'] = classifier.feature_log_prob_.astype(np.float64)
+        arrays['intercept'] = classifier.class_log_prior_.astype(np.float64)
+    elif name == 'RandomForestClassifier':
+        config.update(kind='forest')
+        left, right, feature, threshold, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in classifier.estimators_:
+            tree = estimator.tree_
+            tree_left = tree.children_left.astype(np.int64)
+            tree_right = tree.children_right.astype(np.int64)
+            left.append(np.where(tree_left == -1, -1, tree_left + offset))
+            right.append(np.where(tree_right == -1, -1, tree_right + offset))
+            feature.append(tree.feature.astype(np.int64))
+            threshold.append(tree.threshold.astype(np.float64))
+            node_values = tree.value[:, 0, :].astype(np.float64)
+            totals = node_values.sum(axis=1, keepdims=True)
+            values.append(np.divide(node_values, totals, out=np.zeros_like(node_values), where=totals > 0))
+            roots.append(offset)
+            offset += tree.node_count
+        arrays['tree_left'] = np.concatenate(left)
+        arrays['tree_right'] = np.concatenate(right)
+        arrays['tree_feature'] = np.concatenate(feature)
+        arrays['tree_threshold'] = np.concatenate(threshold)
+        arrays['tree_value'] = np.concatenate(values)
+        arrays['tree_roots'] = np.array(roots, dtype=np.int64)
+    else:
+        raise ValueError(f"Kompakt format bu sınıflandırıcıyı desteklemiyor: {name}")
+
+    return config
+
+
+def export_compact(pipeline, filepath):
+    """Eğitilmiş (TF-IDF + sınıflandırıcı) Pipeline'ı kompakt dosyaya yaz"""
+    arrays = {}
+    header = {
+        'format_version': FORMAT_VERSION,
+        'vectorizer': _export_vectorizer(pipeline[0], arrays),
+        'classifier': _export_classifier(pipeline[-1], arrays)
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header['arrays'] = layout
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    with open(filepath, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+
+class CompactIntentModel:
+    def __init__(self, header, arrays):
+        """Kompakt dosyadan yüklenen, sklearn'süz çıkarım modeli"""
+        self.vectorizer_config = header['vectorizer']
+        self.classifier_config = header['classifier']
+        self.arrays = arrays
+        self.classes_ = np.array(self.classifier_config['classes'])
+
+        self._token_pattern = re.compile(self.vectorizer_config['token_pattern'])
+        self._stop_words = set(self.vectorizer_config['stop_words'] or [])
+        self._vocabulary = None
+
+    @classmethod
+    def load(cls, filepath):
+        """Dosyayı memory-map ile aç (read-only, process'ler arası paylaşılabilir)"""
+        with open(filepath, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Geçersiz kompakt model dosyası: {filepath}")
+            header_length = struct.unpack('<Q', f.read(8))[0]
+            header = json.loads(f.read(header_length).decode('utf-8'))
+
+        if header['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen format versiyonu: {header['format_version']}")
+
+        data_start = _align(len(MAGIC) + 8 + header_length)
+        mapped = np.memmap(filepath, dtype=np.uint8, mode='r')
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            start = data_start + spec['offset']
+            arrays[name] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+        return cls(header, arrays)
+
+    @property
+    def vocabulary(self):
+        """term -> feature index sözlüğü (ilk kullanımda bir kez kurulur)"""
+        if self._vocabulary is None:
+            blob = self.arrays['vocab_blob'].tobytes()
+            offsets = self.arrays['vocab_offsets']
+            self._vocabulary = {
+                blob[offsets[i]:offsets[i + 1]].decode('utf-8'): i
+                for i in range(len(offsets) - 1)
+            }
+        return self._vocabulary
+
+    def _analyze(self, text):
+        """sklearn'ün word analyzer'ı ile aynı n-gram üretimi"""
+        if self.vectorizer_config['lowercase']:
+            text = text.lower()
+        tokens = [token for token in self._token_pattern.findall(text) if token not in self._stop_words]
+
+        min_n, max_n = self.vectorizer_config['ngram_range']
+        ngrams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            ngrams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return ngrams
+
+    def transform(self, texts):
+        """Metinleri yoğun TF-IDF matrisine çevir"""
+        vocabulary = self.vocabulary
+        features = np.zeros((len(texts), len(vocabulary)), dtype=np.float64)
+
+        for row, text in enumerate(texts):
+            for term in self._analyze(text):
+                index = vocabulary.get(term)
+                if index is not None:
+                    features[row, index] += 1.0
+
+        if self.vectorizer_config['binary']:
+            features = (features > 0).astype(np.float64)
+        if self.vectorizer_config['sublinear_tf']:
+            nonzero = features > 0
+            features[nonzero] = np.log(features[nonzero]) + 1.0
+        if self.vectorizer_config['use_idf']:
+            features *= self.arrays['idf']
+
+        norm = self.vectorizer_config['norm']
+        if norm:
+            lengths = np.abs(features).sum(axis=1) if norm == 'l1' else np.sqrt((features ** 2).sum(axis=1))
+            lengths[lengths == 0] = 1.0
+            features /= lengths[:, None]
+
+        return features
+
+    def _forest_proba(self, features):
+        features = features.astype(np.float32)
+        left = self.arrays['tree_left']
+        right = self.arrays['tree_right']
+        feature = self.arrays['tree_feature']
+        threshold = self.arrays['tree_threshold']
+
+        nodes = np.broadcast_to(self.arrays['tree_roots'], (len(features), len(self.arrays['tree_roots']))).copy()
+        rows = np.arange(len(features))[:, None]
+        while True:
+            children = left[nodes]
+            active = children != -1
+            if not active.any():
+                break
+            go_left = features[rows, feature[nodes]] <= threshold[nodes]
+            nodes = np.where(active, np.where(go_left, children, right[nodes]), nodes)
+
+        return self.arrays['tree_value'][nodes].mean(axis=1)
+
+    def _linear_proba(self, features):
+        scores = features @ self.arrays['coef'].T + self.arrays['intercept']
+        mode = self.classifier_config['proba']
+
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+
+        if mode == 'ovr':
+            proba = 1.0 / (1.0 + np.exp(-scores))
+            return proba / proba.sum(axis=1, keepdims=True)
+
+        scores = scores - scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts):
+        """Önişlenmiş metinler için sınıf olasılıkları"""
+        features = self.transform(texts)
+        if self.classifier_config['kind'] == 'forest':
+            return self._forest_proba(features)
+        return self._linear_proba(features)
+
+    def predict_intents(self, processed_texts):
+        """TraditionalMLChatbot.predict_intents ile aynı formatta sonuç"""
+        proba = self.predict_proba(processed_texts)
+        best = proba.argmax(axis=1)
+        return {
+            'intents': self.classes_[best],
+            'confidences': proba[np.arange(len(best)), best],
+            'processed_texts': list(processed_texts)
+        }
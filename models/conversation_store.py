@@ -0,0 +1,184 @@
+"""
+Çok turlu konuşma durumu deposu
+Her oturum için sabit uzunlukta bir halka tampon (deque) bellekte tutulur. Boşta kalan oturumlar
+ve max_sessions'ı aşan en eski oturumlar (LRU) atılır. Opsiyonel SQLite ya da Redis uyumlu kalıcı
+katman varsa doğruluk kaynağı odur: okumalar kalıcı katmana gider, bellekteki tampon yalnızca
+cache_ttl saniye geçerli bir write-through önbellektir. Böylece birden fazla worker aynı geçmişi görür.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+def contextual_text(user_message, context, k=1):
+    """Takip mesajını son k kullanıcı mesajıyla birleştir ("ne zaman gelecek" -> "siparişim nerede ne zaman gelecek")"""
+    previous = [turn['content'] for turn in context or [] if turn.get('role') == 'user'][-k:]
+    return ' '.join(previous + [user_message])
+
+
+def classify_with_context(classify_fn, user_message, context=None, threshold=0.6, k=1):
+    """Önce mesajın kendisi sınıflandırılır; güven eşiğin altındaysa önceki turlarla birlikte yeniden denenir"""
+    intent, confidence = classify_fn(user_message)
+    if not context or confidence >= threshold:
+        return intent, confidence
+
+    text = contextual_text(user_message, context, k)
+    if text == user_message:
+        return intent, confidence
+    context_intent, context_confidence = classify_fn(text)
+    if context_confidence > confidence:
+        return context_intent, context_confidence
+    return intent, confidence
+
+
+class SQLiteConversationBackend:
+    def __init__(self, sqlite_path="conversations.db", max_turns=50):
+        """Oturum başına son max_turns mesajı saklayan SQLite katmanı"""
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, message TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)")
+        self._db.commit()
+
+    def append(self, session_id, message):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)",
+                (session_id, json.dumps(message, ensure_ascii=False))
+            )
+            # Kalıcı katmanda da oturum başına bellek sınırlı kalır
+            self._db.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id NOT IN ("
+                "SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.max_turns)
+            )
+            self._db.commit()
+
+    def load(self, session_id):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT message FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, self.max_turns)
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def clear(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+
+class RedisConversationBackend:
+    def __init__(self, client=None, url="redis://localhost:6379/0", max_turns=50, ttl=86400, prefix="chatbot:conversation:"):
+        """Redis uyumlu herhangi bir istemci (rpush/ltrim/lrange/expire/delete) ile çalışır"""
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, session_id):
+        return f"{self.prefix}{session_id}"
+
+    def append(self, session_id, message):
+        key = self._key(session_id)
+        self.client.rpush(key, json.dumps(message, ensure_ascii=False))
+        self.client.ltrim(key, -self.max_turns, -1)
+        if self.ttl:
+            self.client.expire(key, self.ttl)
+
+    def load(self, session_id):
+        return [json.loads(raw) for raw in self.client.lrange(self._key(session_id), -self.max_turns, -1)]
+
+    def clear(self, session_id):
+        self.client.delete(self._key(session_id))
+
+
+class ConversationStore:
+    def __init__(self, max_turns=50, context_turns=4, max_sessions=1000, idle_ttl=1800, backend=None, cache_ttl=0.0):
+        """max_turns: oturum başına tutulan mesaj, context_turns: modele verilen son mesaj sayısı,
+        cache_ttl: kalıcı katman varken bellekteki tamponun yeniden okunmadan kullanılabileceği süre (0: her okumada)"""
+        self.max_turns = max_turns
+        self.context_turns = context_turns
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self.evictions = 0
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id, now, refresh=False):
+        """Oturumun tamponu; bellekte yoksa ya da önbellek süresi dolduysa kalıcı katmandan yüklenir (kilit altında çağrılır)"""
+        entry = self._sessions.get(session_id)
+        if entry is None or (refresh and self.backend and now - entry[2] > self.cache_ttl):
+            history = self.backend.load(session_id) if self.backend else []
+            entry = [now, deque(history, maxlen=self.max_turns), now]
+            self._sessions[session_id] = entry
+        entry[0] = now
+        self._sessions.move_to_end(session_id)
+        self._evict(now)
+        return entry[1]
+
+    def _evict(self, now):
+        # OrderedDict erişim sırasını tutar: en eski oturumdan başlayıp ilk aktif oturumda durulur
+        while self._sessions:
+            session_id, (last_seen, _, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and (not self.idle_ttl or now - last_seen <= self.idle_ttl):
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def append(self, session_id, role, content, **metadata):
+        """Oturuma mesaj ekle (metadata: model, intent, confidence, ...)"""
+        message = {'role': role, 'content': content, 'timestamp': time.time(), **metadata}
+        # Önce kalıcı katmana yazılır; başarısız olursa önbellek de değişmez
+        if self.backend:
+            self.backend.append(session_id, message)
+        with self._lock:
+            cached = session_id in self._sessions
+            history = self._session(session_id, time.time())
+            # Bellekte yoksa kalıcı katmandan yeni yüklenen geçmiş mesajı zaten içerir
+            if cached or not self.backend:
+                history.append(message)
+        return message
+
+    def history(self, session_id, limit=None):
+        """Oturumun mesajları (eskiden yeniye); limit verilirse son limit mesaj"""
+        with self._lock:
+            messages = list(self._session(session_id, time.time(), refresh=True))
+        return messages[-limit:] if limit else messages
+
+    def context(self, session_id):
+        """Modele bağlam olarak verilecek son context_turns mesaj"""
+        return self.history(session_id, limit=self.context_turns) if self.context_turns else []
+
+    def clear(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.backend:
+            self.backend.clear(session_id)
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict(time.time())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'messages': sum(len(history) for _, history, _ in self._sessions.values()),
+                'evictions': self.evictions,
+                'max_turns': self.max_turns,
+                'max_sessions': self.max_sessions
+            }
@@ -0,0 +1,197 @@
+"""
+Paralel ve kaldığı yerden devam edebilen değerlendirme motoru
+Tüm backend'ler aynı anda (thread başına bir backend) ve kendi toplu tahmin yollarıyla çalışır.
+Satır bazlı tahminler parça parça checkpoint'e yazılır; yeniden çalıştırmada biten satırlar atlanır.
+Metrikler confusion sayıları üzerinden artımlı hesaplanır.
+"""
+
+import hashlib
+import inspect
+import os
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.registry import classify_texts
+
+# Backend cevabı okunamadığında döndürülen intent; değerlendirmede yanlış tahmin olarak sayılır
+UNKNOWN_INTENT = 'unknown'
+
+
+def dataset_hash(texts, intents):
+    """Değerlendirme verisinin içerik özeti - veri değişirse checkpoint'ler yeniden kullanılmaz"""
+    digest = hashlib.sha256()
+    for text, intent in zip(texts, intents):
+        digest.update(f"{text}\x1f{intent}\x1e".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def row_ids(texts, intents):
+    """İçerikten türetilen kararlı satır kimlikleri (tekrarlanan satırlar sıra numarası alır)"""
+    seen = Counter()
+    ids = []
+    for text, intent in zip(texts, intents):
+        base = hashlib.sha1(f"{text}\x1f{intent}".encode('utf-8')).hexdigest()[:16]
+        ids.append(f"{base}-{seen[base]}")
+        seen[base] += 1
+    return ids
+
+
+class IncrementalMetrics:
+    def __init__(self):
+        """Confusion sayıları tutulur; accuracy ve weighted P/R/F1 her an hesaplanabilir"""
+        self.confusion = defaultdict(Counter)
+        self.total = 0
+        self.correct = 0
+
+    def update(self, true_intent, predicted_intent):
+        self.confusion[true_intent][predicted_intent] += 1
+        self.total += 1
+        self.correct += int(true_intent == predicted_intent)
+
+    def labels(self):
+        labels = set(self.confusion)
+        for predictions in self.confusion.values():
+            labels.update(predictions)
+        return sorted(labels)
+
+    def per_intent(self):
+        """Intent bazında precision / recall / f1 / support"""
+        predicted_totals = Counter()
+        for predictions in self.confusion.values():
+            predicted_totals.update(predictions)
+
+        report = {}
+        for label in self.labels():
+            true_positive = self.confusion[label][label] if label in self.confusion else 0
+            support = sum(self.confusion[label].values()) if label in self.confusion else 0
+            precision = true_positive / predicted_totals[label] if predicted_totals[label] else 0.0
+            recall = true_positive / support if support else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            report[label] = {'precision': precision, 'recall': recall, 'f1_score': f1, 'support': support}
+        return report
+
+    def confusion_matrix(self, labels=None):
+        labels = labels or self.labels()
+        return [[self.confusion[true][predicted] if true in self.confusion else 0 for predicted in labels]
+                for true in labels]
+
+    def compute(self):
+        """sklearn'deki average='weighted', zero_division=0 ile aynı sonuçlar"""
+        per_intent = self.per_intent()
+        total_support = sum(values['support'] for values in per_intent.values())
+
+        def weighted(metric):
+            if not total_support:
+                return 0.0
+            return sum(values[metric] * values['support'] for values in per_intent.values()) / total_support
+
+        return {
+            'accuracy': self.correct / self.total if self.total else 0.0,
+            'precision': weighted('precision'),
+            'recall': weighted('recall'),
+            'f1_score': weighted('f1_score'),
+            'per_intent': per_intent
+        }
+
+
+def _predict(chatbot, texts):
+    """Backend'in en iyi toplu yolu; destekliyorsa hatalar greeting'e düşmek yerine yükseltilir"""
+    classify_intents = getattr(chatbot, 'classify_intents', None)
+    if classify_intents is not None and 'raise_errors' in inspect.signature(classify_intents).parameters:
+        return [(str(intent), float(confidence)) for intent, confidence in classify_intents(texts, raise_errors=True)]
+    return classify_texts(chatbot, texts)
+
+
+class EvaluationEngine:
+    def __init__(self, chatbots, store=None, chunk_size=64, max_workers=None, progress=None, predict_missing=True):
+        """chatbots: {ad: chatbot}; store=None ise checkpoint tutulmaz, predict_missing=False ise sadece kayıtlar okunur"""
+        self.chatbots = dict(chatbots)
+        self.store = store
+        self.predict_missing = predict_missing
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or max(len(self.chatbots), 1)
+        self.progress = progress
+
+    def evaluate(self, test_data):
+        """Tüm backend'leri eşzamanlı değerlendir -> {ad: sonuç}"""
+        texts = test_data['text'].astype(str).tolist()
+        true_intents = test_data['intent'].astype(str).tolist()
+        ids = row_ids(texts, true_intents)
+        data_hash = dataset_hash(texts, true_intents)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="evaluation") as executor:
+            futures = {
+                name: executor.submit(self._evaluate_backend, name, chatbot, ids, texts, true_intents, data_hash)
+                for name, chatbot in self.chatbots.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _evaluate_backend(self, name, chatbot, ids, texts, true_intents, data_hash):
+        model_version = str(getattr(chatbot, 'model_version', None) or name)
+        done = self.store.load_predictions(name, model_version, data_hash) if self.store else {}
+        predictions = {row_id: done[row_id] for row_id in ids if row_id in done}
+
+        metrics = IncrementalMetrics()
+        for i, row_id in enumerate(ids):
+            if row_id in predictions:
+                metrics.update(true_intents[i], predictions[row_id][0])
+
+        pending = [i for i, row_id in enumerate(ids) if row_id not in predictions] if self.predict_missing else []
+        if predictions and self.predict_missing:
+            print(f"♻️ {name}: {len(predictions)}/{len(ids)} satır checkpoint'ten yüklendi")
+        if self.predict_missing:
+            self._report(name, metrics.total, len(ids))
+
+        error = None
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            try:
+                chunk_predictions = _predict(chatbot, [texts[i] for i in chunk])
+            except Exception as e:
+                # Kota/ağ hatasında o ana kadarki satırlar saklı kalır, yeniden çalıştırmada devam edilir
+                error = str(e)
+                print(f"❌ {name} değerlendirmesi yarıda kaldı: {e}")
+                break
+
+            rows = []
+            for i, (intent, confidence) in zip(chunk, chunk_predictions):
+                predictions[ids[i]] = (intent, confidence)
+                metrics.update(true_intents[i], intent)
+                rows.append((ids[i], texts[i], true_intents[i], intent, confidence))
+            if self.store:
+                self.store.save_predictions(name, model_version, data_hash, rows)
+            self._report(name, metrics.total, len(ids))
+
+        completed = [i for i, row_id in enumerate(ids) if row_id in predictions]
+        labels = metrics.labels()
+        result = metrics.compute()
+        result.update({
+            'model_version': model_version,
+            'dataset_hash': data_hash,
+            'completed': len(completed),
+            'total': len(ids),
+            'error': error,
+            'parse_failures': sum(predictions[ids[i]][0] == UNKNOWN_INTENT for i in completed),
+            'predictions': [predictions[ids[i]][0] for i in completed],
+            'confidences': [predictions[ids[i]][1] for i in completed],
+            'true_labels': [true_intents[i] for i in completed],
+            'texts': [texts[i] for i in completed],
+            'labels': labels,
+            'confusion_matrix': metrics.confusion_matrix(labels)
+        })
+        return result
+
+    def _report(self, name, completed, total):
+        if self.progress:
+            self.progress(name, completed, total)
+        else:
+            print(f"🔬 {name}: {completed}/{total}")
+
+
+def evaluate_chatbot(chatbot, test_data, name=None, store=None, chunk_size=64):
+    """Tek chatbot için ortak evaluate_model uygulaması"""
+    name = name or type(chatbot).__name__
+    return EvaluationEngine({name: chatbot}, store=store, chunk_size=chunk_size).evaluate(test_data)[name]
@@ -1,22 +1,192 @@
-import google.generativeai as genai
-import pandas as pd
 import numpy as np
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+import asyncio
+import json
 import os
+import random
+import re
+import sys
+import threading
+import weakref
 from dotenv import load_dotenv
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import metrics
+from models.evaluation_engine import UNKNOWN_INTENT, evaluate_chatbot
+from models.rate_limiter import TokenBucketLimiter
+
 load_dotenv()
 
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+VALID_INTENTS = [
+    'greeting', 'product_inquiry', 'order_status', 
+    'cart_operations', 'payment_issues', 'return_refund',
+    'shipping_info', 'goodbye', 'complaint'
+]
+
+FEW_SHOT_EXAMPLES = """📚 ÖRNEKLER:
+"Merhaba" → greeting
+"İyi günler" → greeting  
+"Selam" → greeting
+
+"Bu ürünün fiyatı nedir?" → product_inquiry
+"Ürün arıyorum" → product_inquiry
+"Stokta var mı?" → product_inquiry
+
+"Siparişim nerede?" → order_status
+"Kargo takip numarası" → order_status
+"Ne zaman gelecek?" → order_status
+
+"Sepete ekle" → cart_operations
+"Sepetimi göster" → cart_operations
+"Sepet toplamı" → cart_operations
+
+"Ödeme yapamıyorum" → payment_issues
+"Kredi kartım çalışmıyor" → payment_issues
+"Taksit seçenekleri" → payment_issues
+
+"İade etmek istiyorum" → return_refund  
+"Para iadesi" → return_refund
+"Ürün değişimi" → return_refund
+
+"Kargo ne kadar sürer?" → shipping_info
+"Teslimat saatleri" → shipping_info
+"Ücretsiz kargo" → shipping_info
+
+"Hoşçakal" → goodbye
+"Görüşürüz" → goodbye
+"Teşekkürler" → goodbye
+
+"Şikayetim var" → complaint
+"Memnun değilim" → complaint
+"Sorun yaşıyorum" → complaint
+"""
+
+# Structured output modunda model başına bir kez verilen kısa talimat (mesaj başına tekrar edilmez)
+STRUCTURED_SYSTEM_INSTRUCTION = """E-ticaret müşteri mesajını tek bir intent'e sınıflandır.
+greeting: selamlama | product_inquiry: ürün, fiyat, özellik, stok | order_status: sipariş durumu, takip
+cart_operations: sepete ekleme/çıkarma, sepeti görme | payment_issues: ödeme, kart, taksit sorunları
+return_refund: iade, para iadesi, değişim | shipping_info: kargo ücreti, süresi, teslimat
+goodbye: vedalaşma, teşekkür | complaint: şikayet, memnuniyetsizlik
+confidence 0-1 arası olsun. Sadece şemaya uygun JSON döndür."""
+
+# {"intent": "product_inquiry", "confidence": 0.95} ~20 token
+STRUCTURED_MAX_OUTPUT_TOKENS = 32
+STRUCTURED_BATCH_ITEM_TOKENS = 24
+
+# Akışlı modda sınıflandırma ve cevap tek çağrıda: ilk satır intent, devamı müşteriye cevap
+STREAM_MAX_OUTPUT_TOKENS = 256
+STREAM_HEADER_MAX_CHARS = 120
+_STREAM_HEADER = re.compile(r'Kategori:\s*([A-Za-z_]+)(?:.*?Güven:\s*([01](?:\.\d+)?|\.\d+))?', re.IGNORECASE)
+
+
+def build_intent_schema(batch=False):
+    """Intent'i 9 değerlik enum ile sınırlayan response şeması"""
+    import google.generativeai as genai
+    
+    item = genai.protos.Schema(
+        type=genai.protos.Type.OBJECT,
+        properties={
+            'intent': genai.protos.Schema(type=genai.protos.Type.STRING, format='enum', enum=VALID_INTENTS),
+            'confidence': genai.protos.Schema(type=genai.protos.Type.NUMBER)
+        },
+        required=['intent', 'confidence']
+    )
+    if not batch:
+        return item
+    item.properties['id'] = genai.protos.Schema(type=genai.protos.Type.INTEGER)
+    item.required.append('id')
+    return genai.protos.Schema(type=genai.protos.Type.ARRAY, items=item)
+
+
+class _StreamParser:
+    def __init__(self, max_header_chars=STREAM_HEADER_MAX_CHARS):
+        """Akış parçalarından "Kategori: x | Güven: y" başlık satırını ayırır, gerisini cevap olarak geçirir"""
+        self.max_header_chars = max_header_chars
+        self.buffer = ""
+        self.header_done = False
+    
+    def feed(self, text):
+        """Yeni parça -> olay listesi: intent sözlüğü (bir kez) ve cevap metni parçaları"""
+        if self.header_done:
+            return [text] if text else []
+        self.buffer += text
+        newline = self.buffer.find('\n')
+        if newline == -1 and len(self.buffer) < self.max_header_chars:
+            return []
+        return self._split_header(newline)
+    
+    def close(self):
+        """Akış bitti; başlık hâlâ beklemedeyse eldeki metinle karar verilir"""
+        if self.header_done or not self.buffer.strip():
+            self.header_done = True
+            return []
+        return self._split_header(self.buffer.find('\n'))
+    
+    def _split_header(self, newline):
+        self.header_done = True
+        text, self.buffer = self.buffer, ""
+        header = text[:newline] if newline != -1 else text
+        
+        match = _STREAM_HEADER.search(header)
+        intent = match.group(1).lower() if match else None
+        if intent not in VALID_INTENTS:
+            # Model formata uymadıysa gelen her şey cevap sayılır
+            metrics.record_event('gemini', 'fallback_greeting')
+            return [{'intent': 'greeting', 'confidence': 0.3}] + ([text] if text else [])
+        
+        confidence = min(max(float(match.group(2)), 0.0), 1.0) if match.group(2) else 0.7
+        # Satır sonu gelmediyse (başlık ve cevap aynı satırda) başlık, desenin bittiği yerde kesilir
+        rest = text[newline + 1:] if newline != -1 else text[match.end():].lstrip(' |')
+        rest = rest.lstrip()
+        return [{'intent': intent, 'confidence': confidence}] + ([rest] if rest else [])
+
+
 class GeminiChatbot:
-    def __init__(self, api_key=None):
-        """Gemini Chatbot sınıfı"""
+    def __init__(self, api_key=None, model_name='gemini-1.5-flash', cache=None,
+                 max_concurrency=4, requests_per_minute=15, tokens_per_minute=1_000_000,
+                 max_retries=5, api_endpoint=None, transport=None, structured_output=False, retriever=None):
+        """Gemini Chatbot sınıfı (structured_output: JSON şema + enum ile kısıtlı, kısa prompt'lu mod)"""
+        # google-generativeai ~0.7 sn import süresi: sadece Gemini kullanan process'ler öder
+        import google.generativeai as genai
+        
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
         if not self.api_key:
             raise ValueError("Gemini API key gerekli!")
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        # Yerel sahte Gemini sunucusuna yönlendirmek için (örn. http://127.0.0.1:8765, transport='rest')
+        api_endpoint = api_endpoint or os.getenv('GEMINI_API_ENDPOINT')
+        configure_kwargs = {'api_key': self.api_key}
+        if api_endpoint:
+            configure_kwargs['client_options'] = {'api_endpoint': api_endpoint}
+            configure_kwargs['transport'] = transport or 'rest'
+        elif transport:
+            configure_kwargs['transport'] = transport
+        
+        genai.configure(**configure_kwargs)
+        self.model_name = model_name
+        self.structured_output = structured_output
+        self.cache = cache
+        self.retriever = retriever
+        
+        if structured_output:
+            self.model_version = f"{model_name}:structured"
+            self.model = genai.GenerativeModel(model_name, system_instruction=STRUCTURED_SYSTEM_INSTRUCTION)
+            self._intent_schema = build_intent_schema()
+            self._batch_intent_schema = build_intent_schema(batch=True)
+            # Akışlı cevap serbest metindir; JSON talimatı olmayan ayrı model nesnesi kullanılır
+            self._stream_model = genai.GenerativeModel(model_name)
+        else:
+            self.model_version = model_name
+            self.model = genai.GenerativeModel(model_name)
+            self._stream_model = self.model
+        
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucketLimiter(requests_per_minute, tokens_per_minute)
+        self._semaphores = weakref.WeakKeyDictionary()
         
         self.intent_responses = {
             'greeting': [
@@ -66,49 +236,250 @@ class GeminiChatbot:
             ]
         }
     
-    def classify_intent(self, text):
-        """Intent classification using Gemini with Few-Shot Learning"""
-        prompt = f"""
+    def classify_intent(self, text, raise_errors=False, context=None):
+        """Intent classification using Gemini with Few-Shot Learning (raise_errors: greeting'e düşmek yerine hata fırlat)"""
+        # Bağlamlı tahmin sadece o konuşma için geçerlidir, cache'lenmez
+        use_cache = self.cache is not None and not context
+        if use_cache:
+            cached = self.cache.get(text, 'gemini', self.model_version)
+            if cached is not None:
+                metrics.record_event('gemini', 'cache_hit')
+                return tuple(cached)
+        
+        with metrics.stage('gemini', 'prompt_build'):
+            prompt = self._build_prompt(text, context)
+        
+        try:
+            response = self._generate_with_retry(prompt, **self._generation_kwargs())
+        except Exception as e:
+            print(f"Gemini API Hatası: {e}")
+            metrics.record_event('gemini', 'api_error')
+            if raise_errors:
+                raise
+            metrics.record_event('gemini', 'fallback_greeting')
+            return "greeting", 0.5
+        
+        (intent, confidence), parsed = self._read_response(response)
+        if parsed and use_cache:
+            self.cache.set(text, 'gemini', self.model_version, [intent, confidence])
+        return intent, confidence
+    
+    def classify_intents(self, texts, batch_size=20, raise_errors=False):
+        """Toplu sınıflandırma - N mesaj tek prompt'ta gönderilir, parse edilemeyenler tek tek sorulur"""
+        texts = list(texts)
+        results = [None] * len(texts)
+        pending = []
+        
+        for i, text in enumerate(texts):
+            cached = self.cache.get(text, 'gemini', self.model_version) if self.cache else None
+            if cached is not None:
+                results[i] = tuple(cached)
+            else:
+                pending.append(i)
+        
+        metrics.record_event('gemini', 'cache_hit', len(texts) - len(pending))
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            chunk_texts = [texts[i] for i in chunk]
+            
+            with metrics.stage('gemini', 'prompt_build'):
+                prompt = self._build_batch_prompt(chunk_texts)
+            try:
+                response = self._generate_with_retry(prompt, **self._generation_kwargs(len(chunk_texts)))
+            except Exception as e:
+                # Kota/ağ hatası: retry'lar zaten tükendi, mesajları tek tek sormak aynı hatayı N kez tekrarlar
+                print(f"Gemini toplu API Hatası: {e}")
+                metrics.record_event('gemini', 'api_error')
+                if raise_errors:
+                    raise
+                metrics.record_event('gemini', 'fallback_greeting', len(chunk))
+                for i in chunk:
+                    results[i] = ("greeting", 0.5)
+                continue
+            
+            # Sadece id'si eksik ya da okunamayan elemanlar tek tek sorulur
+            try:
+                with metrics.stage('gemini', 'parse'):
+                    parsed = self._parse_gemini_batch_response(response.text.strip(), len(chunk_texts))
+            except ValueError as e:
+                print(f"Gemini toplu cevabı okunamadı: {e}")
+                metrics.record_event('gemini', 'parse_error')
+                parsed = [None] * len(chunk_texts)
+            
+            metrics.record_event('gemini', 'batch_item_fallback', parsed.count(None))
+            
+            for i, prediction in zip(chunk, parsed):
+                if prediction is None:
+                    results[i] = self.classify_intent(texts[i], raise_errors=raise_errors)
+                    continue
+                results[i] = prediction
+                if self.cache:
+                    self.cache.set(texts[i], 'gemini', self.model_version, list(prediction))
+        
+        return results
+    
+    async def aclassify_intent(self, text):
+        """classify_intent'in asyncio versiyonu - eşzamanlı istek sayısı max_concurrency ile sınırlı"""
+        if self.cache:
+            cached = self.cache.get(text, 'gemini', self.model_version)
+            if cached is not None:
+                metrics.record_event('gemini', 'cache_hit')
+                return tuple(cached)
+        
+        with metrics.stage('gemini', 'prompt_build'):
+            prompt = self._build_prompt(text)
+        
+        try:
+            async with self._get_semaphore():
+                response = await self._agenerate_with_retry(prompt, **self._generation_kwargs())
+        except Exception as e:
+            print(f"Gemini API Hatası: {e}")
+            metrics.record_event('gemini', 'api_error')
+            metrics.record_event('gemini', 'fallback_greeting')
+            return "greeting", 0.5
+        
+        (intent, confidence), parsed = self._read_response(response)
+        if parsed and self.cache:
+            self.cache.set(text, 'gemini', self.model_version, [intent, confidence])
+        return intent, confidence
+    
+    async def aclassify_many(self, texts):
+        """Birden çok mesajı eşzamanlı sınıflandır (sıra korunur)"""
+        return await asyncio.gather(*(self.aclassify_intent(text) for text in texts))
+    
+    def _get_semaphore(self):
+        """Çalışan event loop'a ait eşzamanlılık semaforu"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    def _estimate_tokens(self, prompt, generation_config=None):
+        """TPM bütçesi için kaba token tahmini (~4 karakter/token)"""
+        max_output_tokens = getattr(generation_config, 'max_output_tokens', None) or 64
+        prompt_chars = len(prompt) + (len(STRUCTURED_SYSTEM_INSTRUCTION) if self.structured_output else 0)
+        return prompt_chars // 4 + max_output_tokens
+    
+    def _generation_kwargs(self, batch_size=None):
+        """Structured modda JSON şema ve çıktı token sınırı; klasik modda ek parametre yok"""
+        if not self.structured_output:
+            return {}
+        import google.generativeai as genai
+        
+        if batch_size is None:
+            schema, max_output_tokens = self._intent_schema, STRUCTURED_MAX_OUTPUT_TOKENS
+        else:
+            schema, max_output_tokens = self._batch_intent_schema, 16 + STRUCTURED_BATCH_ITEM_TOKENS * batch_size
+        return {'generation_config': genai.GenerationConfig(
+            response_mime_type='application/json',
+            response_schema=schema,
+            max_output_tokens=max_output_tokens,
+            temperature=0.0
+        )}
+    
+    def _stream_generation_config(self):
+        import google.generativeai as genai
+        
+        return genai.GenerationConfig(max_output_tokens=STREAM_MAX_OUTPUT_TOKENS)
+    
+    @staticmethod
+    def _is_retryable(error):
+        """429 ve 5xx hataları tekrar denenir"""
+        from google.api_core import exceptions as google_exceptions
+        
+        return (
+            isinstance(error, google_exceptions.GoogleAPICallError)
+            and error.code in RETRYABLE_STATUS_CODES
+        )
+    
+    def _backoff_delay(self, attempt, base=0.5, cap=30.0):
+        """Exponential backoff + full jitter"""
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+    
+    def _generate_with_retry(self, prompt, **kwargs):
+        """Rate limit'e uyarak generate_content çağır, geçici hatalarda tekrar dene"""
+        tokens = self._estimate_tokens(prompt, kwargs.get('generation_config'))
+        for attempt in range(self.max_retries + 1):
+            with metrics.stage('gemini', 'rate_limit_wait'):
+                self.rate_limiter.acquire(tokens)
+            try:
+                with metrics.stage('gemini', 'api_call'):
+                    return self.model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not self._is_retryable(e):
+                    raise
+                metrics.record_event('gemini', 'retry')
+                with metrics.stage('gemini', 'backoff_sleep'):
+                    time.sleep(self._backoff_delay(attempt))
+    
+    async def _agenerate_with_retry(self, prompt, **kwargs):
+        """_generate_with_retry'ın asyncio versiyonu - blocking çağrı thread'de çalışır"""
+        tokens = self._estimate_tokens(prompt, kwargs.get('generation_config'))
+        for attempt in range(self.max_retries + 1):
+            with metrics.stage('gemini', 'rate_limit_wait'):
+                await self.rate_limiter.acquire_async(tokens)
+            try:
+                with metrics.stage('gemini', 'api_call'):
+                    return await asyncio.to_thread(self.model.generate_content, prompt, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not self._is_retryable(e):
+                    raise
+                metrics.record_event('gemini', 'retry')
+                with metrics.stage('gemini', 'backoff_sleep'):
+                    await asyncio.sleep(self._backoff_delay(attempt))
+    
+    def _stream_with_retry(self, prompt, **kwargs):
+        """generate_content(stream=True) metin parçaları; sadece ilk parçadan önceki geçici hatalar tekrar denenir"""
+        tokens = self._estimate_tokens(prompt, kwargs.get('generation_config'))
+        for attempt in range(self.max_retries + 1):
+            with metrics.stage('gemini', 'rate_limit_wait'):
+                self.rate_limiter.acquire(tokens)
+            started = False
+            try:
+                with metrics.stage('gemini', 'api_call'):
+                    response = self._stream_model.generate_content(prompt, stream=True, **kwargs)
+                for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Metin içermeyen parça (ör. sadece finish_reason)
+                        continue
+                    started = True
+                    if text:
+                        yield text
+                return
+            except Exception as e:
+                # Kullanıcı ilk kelimeleri gördükten sonra baştan başlamak cevabı tekrarlatır
+                if started or attempt == self.max_retries or not self._is_retryable(e):
+                    raise
+                metrics.record_event('gemini', 'retry')
+                with metrics.stage('gemini', 'backoff_sleep'):
+                    time.sleep(self._backoff_delay(attempt))
+    
+    @staticmethod
+    def _format_context(context):
+        """Önceki turlar - kısa takip mesajları ("ne zaman gelecek") bu bağlamla yorumlanır"""
+        if not context:
+            return ""
+        lines = []
+        for turn in context:
+            if turn.get('role') == 'user':
+                lines.append(f"Kullanıcı: {turn['content']}")
+            else:
+                lines.append(f"Asistan ({turn.get('intent', '?')}): {turn['content']}")
+        return "ÖNCEKİ KONUŞMA (sadece bağlam, son mesajı sınıflandır):\n" + '\n'.join(lines) + "\n"
+    
+    def _build_prompt(self, text, context=None):
+        """Few-shot sınıflandırma prompt'u (structured modda talimat system instruction'dadır)"""
+        if self.structured_output:
+            return f"{self._format_context(context)}Kullanıcı Mesajı: {json.dumps(text, ensure_ascii=False)}"
+        return f"""
 Sen uzman bir e-ticaret müşteri hizmetleri chatbot'usun. Aşağıdaki örneklere bakarak, kullanıcı mesajlarını doğru kategorilere ayır:
 
-📚 ÖRNEKLER:
-"Merhaba" → greeting
-"İyi günler" → greeting  
-"Selam" → greeting
-
-"Bu ürünün fiyatı nedir?" → product_inquiry
-"Ürün arıyorum" → product_inquiry
-"Stokta var mı?" → product_inquiry
-
-"Siparişim nerede?" → order_status
-"Kargo takip numarası" → order_status
-"Ne zaman gelecek?" → order_status
-
-"Sepete ekle" → cart_operations
-"Sepetimi göster" → cart_operations
-"Sepet toplamı" → cart_operations
-
-"Ödeme yapamıyorum" → payment_issues
-"Kredi kartım çalışmıyor" → payment_issues
-"Taksit seçenekleri" → payment_issues
-
-"İade etmek istiyorum" → return_refund  
-"Para iadesi" → return_refund
-"Ürün değişimi" → return_refund
-
-"Kargo ne kadar sürer?" → shipping_info
-"Teslimat saatleri" → shipping_info
-"Ücretsiz kargo" → shipping_info
-
-"Hoşçakal" → goodbye
-"Görüşürüz" → goodbye
-"Teşekkürler" → goodbye
-
-"Şikayetim var" → complaint
-"Memnun değilim" → complaint
-"Sorun yaşıyorum" → complaint
-
-🎯 ŞİMDİ BU METNİ SINIFLANDIR:
+{FEW_SHOT_EXAMPLES}
+{self._format_context(context)}🎯 ŞİMDİ BU METNİ SINIFLANDIR:
 Kullanıcı Mesajı: "{text}"
 
 📋 CEVAP FORMATI (TAM OLARAK ŞU ŞEKİLDE):
@@ -121,21 +492,80 @@ Kategori: product_inquiry
 Güven: 0.95
 Açıklama: Kullanıcı ürün araması yapıyor
 """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            intent, confidence = self._parse_gemini_response(response_text)
-            
-            time.sleep(0.1)
-            
-            return intent, confidence
-            
-        except Exception as e:
-            print(f"Gemini API Hatası: {e}")
-            return "greeting", 0.5 
 
+    def _format_knowledge(self, text):
+        """Retriever varsa en benzer SSS kayıtları - model cevabı bu bilgilere dayandırır"""
+        snippets = self.retriever.snippets(text) if self.retriever else []
+        if not snippets:
+            return ""
+        lines = '\n'.join(f"S: {question}\nC: {answer}" for question, answer in snippets)
+        return f"📖 BİLGİ BANKASI (cevap bu bilgilerle çelişmesin):\n{lines}\n\n"
+    
+    def _build_stream_prompt(self, text, context=None):
+        """Sınıflandırma + cevap prompt'u: ilk satır intent başlığı, sonrası müşteriye cevap"""
+        return f"""
+Sen uzman bir e-ticaret müşteri hizmetleri chatbot'usun. Müşteri mesajını sınıflandır ve kısa, nazik bir Türkçe cevap yaz (en fazla 3 cümle).
+
+{FEW_SHOT_EXAMPLES}
+Kategori sadece şunlardan biri olabilir: {', '.join(VALID_INTENTS)}
+
+{self._format_knowledge(text)}{self._format_context(context)}💬 SINIFLANDIR VE CEVAPLA:
+Kullanıcı Mesajı: {json.dumps(text, ensure_ascii=False)}
+
+📋 CEVAP FORMATI (ilk satır tam olarak şu şekilde, ardından sadece müşteriye cevap):
+Kategori: [kategori_adı] | Güven: [0.0-1.0 arası sayı]
+[cevap metni]
+"""
+    
+    def _build_batch_prompt(self, texts):
+        """Birden çok mesajı tek prompt'ta sınıflandırmak için few-shot prompt"""
+        messages = '\n'.join(
+            f"{i}. {json.dumps(text, ensure_ascii=False)}" for i, text in enumerate(texts, 1)
+        )
+        if self.structured_output:
+            return f"Her mesaj için numarasıyla (id) bir eleman döndür.\nMESAJLAR:\n{messages}"
+        return f"""
+Sen uzman bir e-ticaret müşteri hizmetleri chatbot'usun. Aşağıdaki örneklere bakarak, kullanıcı mesajlarını doğru kategorilere ayır:
+
+{FEW_SHOT_EXAMPLES}
+🎯 ŞİMDİ BU {len(texts)} MESAJI SINIFLANDIR:
+MESAJLAR:
+{messages}
+
+📋 CEVAP FORMATI: Sadece JSON dizisi döndür, her mesaj için bir eleman, numaralar korunarak:
+[{{"id": 1, "kategori": "kategori_adı", "guven": 0.95}}, ...]
+Kategori sadece şunlardan biri olabilir: {', '.join(VALID_INTENTS)}
+"""
+    
+    def _read_response(self, response):
+        """((intent, güven), başarılı mı); okunamayan cevap API hatası sayılmaz, düşük güvenli 'unknown' döner"""
+        try:
+            with metrics.stage('gemini', 'parse'):
+                return self._parse_response(response.text.strip()), True
+        except (ValueError, IndexError) as e:
+            # response.text de engellenmiş / boş cevapta ValueError (eski SDK'larda IndexError) fırlatır
+            print(f"Gemini cevabı okunamadı: {e}")
+            return (UNKNOWN_INTENT, 0.0), False
+    
+    def _parse_response(self, response_text):
+        if self.structured_output:
+            return self._parse_structured_response(response_text)
+        return self._parse_gemini_response(response_text)
+    
+    def _parse_structured_response(self, response_text):
+        """Şemaya uygun JSON cevabı oku; bozuk cevap greeting'e düşmez, ValueError yükseltilir (_read_response yakalar)"""
+        try:
+            payload = json.loads(response_text)
+            intent = str(payload['intent']).strip().lower()
+            confidence = min(max(float(payload.get('confidence', 0.7)), 0.0), 1.0)
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            metrics.record_event('gemini', 'parse_error')
+            raise ValueError(f"Structured cevap okunamadı: {response_text[:100]!r}") from e
+        if intent not in VALID_INTENTS:
+            metrics.record_event('gemini', 'parse_error')
+            raise ValueError(f"Geçersiz intent: {intent}")
+        return intent, confidence
+    
     def _parse_gemini_response(self, response_text):
         """Gemini'nin cevabını parse etme"""
         try:
@@ -153,13 +583,8 @@ Açıklama: Kullanıcı ürün araması yapıyor
                     except:
                         confidence = 0.7  
             
-            valid_intents = [
-                'greeting', 'product_inquiry', 'order_status', 
-                'cart_operations', 'payment_issues', 'return_refund',
-                'shipping_info', 'goodbye', 'complaint'
-            ]
-            
-            if intent not in valid_intents:
+            if intent not in VALID_INTENTS:
+                metrics.record_event('gemini', 'fallback_greeting')
                 intent = "greeting"
                 confidence = 0.3  
             
@@ -167,19 +592,174 @@ Açıklama: Kullanıcı ürün araması yapıyor
         
         except Exception as e:
             print(f"Response parsing hatası: {e}")
+            metrics.record_event('gemini', 'fallback_greeting')
             return "greeting", 0.5
     
+    def _parse_gemini_batch_response(self, response_text, count):
+        """Toplu cevabı parse et - parse edilemeyen elemanlar None döner"""
+        results = [None] * count
+        
+        def store(item_id, intent, confidence):
+            intent = str(intent).strip().lower()
+            if not (1 <= item_id <= count) or intent not in VALID_INTENTS:
+                return
+            try:
+                confidence = min(max(float(confidence), 0.0), 1.0)
+            except (TypeError, ValueError):
+                confidence = 0.7
+            results[item_id - 1] = (intent, confidence)
+        
+        # 1) JSON dizisi (```json bloğu içinde olsa bile)
+        start, end = response_text.find('['), response_text.rfind(']')
+        if start != -1 and end > start:
+            try:
+                items = json.loads(response_text[start:end + 1])
+            except ValueError:
+                items = None
+            if isinstance(items, list):
+                for position, item in enumerate(items, 1):
+                    if not isinstance(item, dict):
+                        continue
+                    try:
+                        item_id = int(item.get('id', position))
+                    except (TypeError, ValueError):
+                        # Bozuk id'li eleman atlanır, geri kalanlar korunur (atlanan tekli yola düşer)
+                        continue
+                    store(item_id, item.get('kategori', item.get('intent', '')),
+                          item.get('guven', item.get('confidence', 0.7)))
+                return results
+        
+        # 2) Numaralı liste: "1. Kategori: greeting | Güven: 0.9" veya "1) greeting - 0.9"
+        blocks = re.split(r'(?m)^\s*(\d+)[.)]\s*', response_text)
+        for item_id, body in zip(blocks[1::2], blocks[2::2]):
+            category = re.search(r'Kategori:\s*([A-Za-z_]+)', body)
+            if category and category.group(1).lower() in VALID_INTENTS:
+                # Tekli cevapla aynı "Kategori:/Güven:" satırları mevcut parser ile okunur
+                intent, confidence = self._parse_gemini_response(re.sub(r'\s*\|?\s*Güven:', '\nGüven:', body))
+                store(int(item_id), intent, confidence)
+                continue
+            
+            lowered = body.lower()
+            found = sorted((lowered.find(intent), intent) for intent in VALID_INTENTS if intent in lowered)
+            if not found:
+                continue
+            position, intent = found[0]
+            number = re.search(r'(?<![\d.])(0?\.\d+|[01](?:\.\d+)?)(?![\d.])', lowered[position + len(intent):])
+            store(int(item_id), intent, number.group(1) if number else 0.7)
+        
+        return results
+    
     def generate_response(self, intent, user_message):
         """Intent'e göre response üretme"""
-        if intent in self.intent_responses:
-            responses = self.intent_responses[intent]
-            return np.random.choice(responses)
-        else:
-            return "Bu konuda size yardımcı olmakta güçlük çekiyorum. Başka nasıl yardımcı olabilirim?"
+        with metrics.stage('gemini', 'response_selection'):
+            answer = self.retriever.answer(user_message, intent) if self.retriever else None
+            if answer:
+                return answer
+            if intent in self.intent_responses:
+                responses = self.intent_responses[intent]
+                return np.random.choice(responses)
+            else:
+                return "Bu konuda size yardımcı olmakta güçlük çekiyorum. Başka nasıl yardımcı olabilirim?"
+    
+    def chat(self, user_message, context=None):
+        """Ana chat fonksiyonu (context: önceki turlar prompt'a eklenir)"""
+        with metrics.stage('gemini', 'chat'):
+            intent, confidence = self.classify_intent(user_message, context=context)
+            return self.build_chat_response(user_message, intent, confidence)
     
-    def chat(self, user_message):
-        """Ana chat fonksiyonu"""
-        intent, confidence = self.classify_intent(user_message)
+    def chat_stream(self, user_message, context=None):
+        """Tek Gemini çağrısıyla sınıflandır ve cevabı akıt.
+        
+        Olaylar: önce {'intent', 'confidence'}, ardından cevap metni parçaları (str),
+        en sonda chat() ile aynı biçimde {'intent', 'response', 'confidence'}; akış yarıda
+        kesildiyse son olayda ayrıca 'error' bulunur.
+        """
+        start = time.perf_counter()
+        with metrics.stage('gemini', 'prompt_build'):
+            prompt = self._build_stream_prompt(user_message, context)
+        
+        parser = _StreamParser()
+        intent, confidence = None, None
+        parts = []
+        
+        def emit(events):
+            nonlocal intent, confidence
+            for event in events:
+                if isinstance(event, dict):
+                    intent, confidence = event['intent'], event['confidence']
+                else:
+                    parts.append(event)
+                yield event
+        
+        first_chunk = True
+        error = None
+        try:
+            for text in self._stream_with_retry(prompt, generation_config=self._stream_generation_config()):
+                if first_chunk:
+                    metrics.observe('gemini', 'first_token', time.perf_counter() - start)
+                    first_chunk = False
+                yield from emit(parser.feed(text))
+        except Exception as e:
+            print(f"Gemini akış hatası: {e}")
+            metrics.record_event('gemini', 'api_error')
+            error = str(e)
+        yield from emit(parser.close())
+        
+        if intent is None:
+            metrics.record_event('gemini', 'fallback_greeting')
+            yield from emit([{'intent': 'greeting', 'confidence': 0.5}])
+        
+        response = ''.join(parts).strip()
+        if not response:
+            # Cevap gelmediyse (hata / sadece başlık) hazır cevaplara düşülür
+            response = self.build_chat_response(user_message, intent, confidence)['response']
+            yield response
+        
+        metrics.observe('gemini', 'chat_stream', time.perf_counter() - start)
+        result = {'intent': intent, 'response': response, 'confidence': confidence}
+        if error:
+            result['error'] = error
+        yield result
+    
+    async def astream_chat(self, user_message, context=None):
+        """chat_stream'in asyncio versiyonu - blocking akış bir thread'de okunur, olaylar geldikçe iletilir"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+        
+        def produce():
+            stream = self.chat_stream(user_message, context=context)
+            try:
+                for event in stream:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                # Gemini akışı da kapatılır, bağlantı açık kalmaz
+                stream.close()
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        async with self._get_semaphore():
+            producer = loop.run_in_executor(None, produce)
+            try:
+                while True:
+                    event = await queue.get()
+                    if event is done:
+                        break
+                    if isinstance(event, BaseException):
+                        raise event
+                    yield event
+            finally:
+                # İstemci bağlantıyı kapatırsa thread bir sonraki parçada durur; semafor o zamana kadar
+                # tutulur ki yarıda bırakılan akışlar da max_concurrency sınırına dahil olsun
+                cancelled.set()
+                await asyncio.shield(producer)
+    
+    def build_chat_response(self, user_message, intent, confidence):
+        """Önceden hesaplanmış intent'ten chat cevabı oluştur"""
         response = self.generate_response(intent, user_message)
         
         if confidence < 0.6:
@@ -191,40 +771,10 @@ Açıklama: Kullanıcı ürün araması yapıyor
             'confidence': confidence
         }
     
-    def evaluate_model(self, test_data):
+    def evaluate_model(self, test_data, batch_size=20):
         """Model performansını değerlendirme"""
-        true_intents = []
-        predicted_intents = []
-        
         print("Gemini modeli değerlendiriliyor...")
-        
-        for idx, row in test_data.iterrows():
-            true_intent = row['intent']
-            text = row['text']
-            
-            predicted_intent, _ = self.classify_intent(text)
-            
-            true_intents.append(true_intent)
-            predicted_intents.append(predicted_intent)
-            
-            if idx % 10 == 0:
-                print(f"İşlenen: {idx}/{len(test_data)}")
-            
-            time.sleep(0.2)
-        
-        accuracy = accuracy_score(true_intents, predicted_intents)
-        precision, recall, f1, _ = precision_recall_fscore_support(
-            true_intents, predicted_intents, average='weighted', zero_division=0
-        )
-        
-        return {
-            'accuracy': accuracy,
-            'precision': precision,
-            'recall': recall,
-            'f1_score': f1,
-            'predictions': predicted_intents,
-            'true_labels': true_intents
-        }
+        return evaluate_chatbot(self, test_data, name='Gemini', chunk_size=batch_size)
 
 if __name__ == "__main__":
     try:
@@ -3,36 +3,52 @@ Hugging Face Transformers ile Ücretsiz Intent Classification
 OpenAI alternatifi - tamamen ücretsiz!
 """
 
+import os
+import platform
+import sys
+import time
+
 import pandas as pd
 import numpy as np
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+from sklearn.metrics import accuracy_score
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import metrics
+from models.conversation_store import classify_with_context
+from models.evaluation_engine import evaluate_chatbot
+
 class HuggingFaceChatbot:
-    def __init__(self, model_name="microsoft/DialoGPT-medium"):
-        """Hugging Face tabanlı chatbot"""
+    def __init__(self, model_name="microsoft/DialoGPT-medium", use_embeddings=False,
+                 embedding_model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                 examples_path=None, rerank_threshold=None, cache=None, backend="pytorch",
+                 onnx_dir="onnx_models", quantize=True, intra_op_threads=None, retriever=None):
+        """Hugging Face tabanlı chatbot (backend: "pytorch" veya "onnx")"""
+        if backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Bilinmeyen backend: {backend}")
         self.model_name = model_name
+        self.cache = cache
+        self.backend = backend
+        self.onnx_dir = onnx_dir
+        self.quantize = quantize
+        self.intra_op_threads = intra_op_threads
+        self.retriever = retriever
         self.classifier = None
+        self.nli_model_id = None
         self.chat_pipeline = None
+        self.use_embeddings = use_embeddings
+        self.embedding_model_name = embedding_model_name
+        self.rerank_threshold = rerank_threshold
+        self.encoder = None
+        self.encoder_tokenizer = None
+        self.reference_embeddings = None
+        self.reference_intent_ids = None
         
-        try:
-            print("🤖 Hugging Face modeli yükleniyor...")
-            self.classifier = pipeline(
-                "zero-shot-classification",
-                model="MoritzLaurer/mDeBERTa-v3-base-mnli-xnli",
-                device=0 if torch.cuda.is_available() else -1
-            )
-            print("✅ Hugging Face modeli hazır!")
-        except Exception as e:
-            print(f"⚠️ Alternatif model deneniyor: {e}")
-            self.classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=-1  
-            )
+        # Embedding modunda NLI cross-encoder sadece re-ranker olarak yüklenir
+        if not use_embeddings or rerank_threshold is not None:
+            self._load_classifier()
         
         self.intents = [
             'greeting', 'product_inquiry', 'order_status', 
@@ -52,6 +68,19 @@ class HuggingFaceChatbot:
             'complaint': 'şikayet, memnuniyetsizlik, sorun bildirimi'
         }
         
+        self.label_to_intent = {
+            "selamlama ve karşılama: merhaba, selam, iyi günler, hoşgeldin, nasılsın, hey": "greeting",
+            "ürün arama ve sorgulama: ürün arıyorum, fiyat nedir, özellik nedir, stok var mı, katalog, ürün göster, hangi ürünler var": "product_inquiry",
+            "sipariş takibi ve durum sorgulama: siparişim nerede, ne zaman gelir, kargo takip, sipariş durumu, teslimat tarihi": "order_status", 
+            "sepet yönetimi ve işlemleri: sepete ekle, sepetten çıkar, sepetimi göster, sepet toplamı, alışveriş sepeti": "cart_operations",
+            "ödeme problemleri ve sorunları: ödeme yapamıyorum, kredi kartı çalışmıyor, ödeme hatası, taksit, ödeme yöntemleri": "payment_issues",
+            "iade ve geri ödeme işlemleri: iade etmek istiyorum, para iadesi, ürün değişimi, iade süreci, geri ödeme": "return_refund",
+            "kargo ve teslimat bilgileri: kargo ücreti, ne kadar sürer, teslimat saatleri, ücretsiz kargo, kargo firması": "shipping_info",
+            "vedalaşma ve ayrılık: hoşçakal, görüşürüz, teşekkürler, elveda, güle güle, iyi günler": "goodbye",
+            "şikayet ve memnuniyetsizlik: şikayetim var, memnun değilim, sorun yaşıyorum, kötü hizmet, problem": "complaint"
+        }
+        self.candidate_labels = list(self.label_to_intent.keys())
+        
         self.intent_responses = {
             'greeting': [
                 "Merhaba! E-ticaret mağazamıza hoş geldiniz. Size nasıl yardımcı olabilirim?",
@@ -99,57 +128,251 @@ class HuggingFaceChatbot:
                 "Geri bildiriminiz bizim için çok değerli. Nasıl yardımcı olabiliriz?"
             ]
         }
+        
+        if use_embeddings:
+            self._load_encoder(examples_path)
+        
+        self.model_version = self._build_model_version()
     
-    def classify_intent(self, text):
-        """Intent classification using Hugging Face"""
+    def _build_model_version(self):
+        """Cache anahtarları için aktif model konfigürasyonunu tanımlayan etiket"""
+        parts = []
+        if self.use_embeddings:
+            parts.append(f"embedding:{self.embedding_model_name}")
+        if self.classifier is not None:
+            nli = f"nli:{self.nli_model_id}"
+            if self.backend == "onnx":
+                nli += ":onnx-int8" if self.quantize else ":onnx"
+            parts.append(nli)
+        if self.use_embeddings and self.rerank_threshold is not None:
+            parts.append(f"rerank:{self.rerank_threshold}")
+        return '+'.join(parts)
+    
+    def _load_classifier(self):
+        """Zero-shot NLI pipeline'ını yükle"""
+        # torch / transformers sadece bu backend gerçekten kullanıldığında import edilir
+        import torch
+        
         try:
-            candidate_labels = [
-                "selamlama ve karşılama: merhaba, selam, iyi günler, hoşgeldin, nasılsın, hey",
-                "ürün arama ve sorgulama: ürün arıyorum, fiyat nedir, özellik nedir, stok var mı, katalog, ürün göster, hangi ürünler var",
-                "sipariş takibi ve durum sorgulama: siparişim nerede, ne zaman gelir, kargo takip, sipariş durumu, teslimat tarihi",
-                "sepet yönetimi ve işlemleri: sepete ekle, sepetten çıkar, sepetimi göster, sepet toplamı, alışveriş sepeti",
-                "ödeme problemleri ve sorunları: ödeme yapamıyorum, kredi kartı çalışmıyor, ödeme hatası, taksit, ödeme yöntemleri",
-                "iade ve geri ödeme işlemleri: iade etmek istiyorum, para iadesi, ürün değişimi, iade süreci, geri ödeme", 
-                "kargo ve teslimat bilgileri: kargo ücreti, ne kadar sürer, teslimat saatleri, ücretsiz kargo, kargo firması",
-                "vedalaşma ve ayrılık: hoşçakal, görüşürüz, teşekkürler, elveda, güle güle, iyi günler",
-                "şikayet ve memnuniyetsizlik: şikayetim var, memnun değilim, sorun yaşıyorum, kötü hizmet, problem"
-            ]
-            
-            result = self.classifier(text, candidate_labels)
-            
-            label_to_intent = {
-                "selamlama ve karşılama: merhaba, selam, iyi günler, hoşgeldin, nasılsın, hey": "greeting",
-                "ürün arama ve sorgulama: ürün arıyorum, fiyat nedir, özellik nedir, stok var mı, katalog, ürün göster, hangi ürünler var": "product_inquiry",
-                "sipariş takibi ve durum sorgulama: siparişim nerede, ne zaman gelir, kargo takip, sipariş durumu, teslimat tarihi": "order_status", 
-                "sepet yönetimi ve işlemleri: sepete ekle, sepetten çıkar, sepetimi göster, sepet toplamı, alışveriş sepeti": "cart_operations",
-                "ödeme problemleri ve sorunları: ödeme yapamıyorum, kredi kartı çalışmıyor, ödeme hatası, taksit, ödeme yöntemleri": "payment_issues",
-                "iade ve geri ödeme işlemleri: iade etmek istiyorum, para iadesi, ürün değişimi, iade süreci, geri ödeme": "return_refund",
-                "kargo ve teslimat bilgileri: kargo ücreti, ne kadar sürer, teslimat saatleri, ücretsiz kargo, kargo firması": "shipping_info",
-                "vedalaşma ve ayrılık: hoşçakal, görüşürüz, teşekkürler, elveda, güle güle, iyi günler": "goodbye",
-                "şikayet ve memnuniyetsizlik: şikayetim var, memnun değilim, sorun yaşıyorum, kötü hizmet, problem": "complaint"
-            }
-            
-            best_label = result['labels'][0]
-            confidence = result['scores'][0]
-            intent = label_to_intent.get(best_label, 'greeting')
-            
-            return intent, confidence
-            
+            print("🤖 Hugging Face modeli yükleniyor...")
+            self.classifier = self._build_nli_pipeline(
+                "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli",
+                device=0 if torch.cuda.is_available() else -1
+            )
+            print("✅ Hugging Face modeli hazır!")
+        except Exception as e:
+            print(f"⚠️ Alternatif model deneniyor: {e}")
+            self.classifier = self._build_nli_pipeline("facebook/bart-large-mnli", device=-1)
+    
+    def _build_nli_pipeline(self, model_id, device=-1):
+        from transformers import pipeline
+        
+        if self.backend == "onnx":
+            classifier = self._build_onnx_pipeline(model_id)
+        else:
+            classifier = pipeline("zero-shot-classification", model=model_id, device=device)
+        self.nli_model_id = model_id
+        return classifier
+    
+    def _build_onnx_pipeline(self, model_id):
+        """Modeli bir kez ONNX'e dönüştürüp int8 dinamik quantize et, onnxruntime ile CPU'da çalıştır"""
+        from transformers import AutoTokenizer, pipeline
+        
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        except ImportError as e:
+            raise ImportError("ONNX backend için: pip install -r requirements-onnx.txt") from e
+        
+        export_dir = os.path.join(self.onnx_dir, model_id.replace('/', '__'))
+        file_name = "model_quantized.onnx" if self.quantize else "model.onnx"
+        
+        if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+            print(f"📦 {model_id} ONNX'e dönüştürülüyor (tek seferlik)...")
+            ORTModelForSequenceClassification.from_pretrained(model_id, export=True).save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_id).save_pretrained(export_dir)
+        
+        if self.quantize and not os.path.exists(os.path.join(export_dir, file_name)):
+            print("🗜️ Dinamik int8 quantization uygulanıyor...")
+            if platform.machine().lower() in ("arm64", "aarch64"):
+                qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+            else:
+                qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+            quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+        
+        session_options = ort.SessionOptions()
+        if self.intra_op_threads:
+            session_options.intra_op_num_threads = self.intra_op_threads
+        
+        model = ORTModelForSequenceClassification.from_pretrained(
+            export_dir,
+            file_name=file_name,
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+    
+    def _load_encoder(self, examples_path=None):
+        """Bi-encoder'ı yükle ve sabit intent açıklamalarını bir kez encode et"""
+        from transformers import AutoModel, AutoTokenizer
+        
+        print(f"🧭 Embedding modeli yükleniyor: {self.embedding_model_name}")
+        self.encoder_tokenizer = AutoTokenizer.from_pretrained(self.embedding_model_name)
+        self.encoder = AutoModel.from_pretrained(self.embedding_model_name)
+        self.encoder.eval()
+        
+        reference_texts = []
+        reference_intents = []
+        for label, intent in self.label_to_intent.items():
+            reference_texts.extend([label, self.intent_descriptions[intent]])
+            reference_intents.extend([intent, intent])
+        
+        if examples_path:
+            examples = pd.read_csv(examples_path)
+            examples = examples[examples['intent'].isin(self.intents)]
+            reference_texts.extend(examples['text'].tolist())
+            reference_intents.extend(examples['intent'].tolist())
+        
+        self.reference_embeddings = self._encode(reference_texts)
+        self.reference_intent_ids = np.array([self.intents.index(intent) for intent in reference_intents])
+        print(f"✅ {len(reference_texts)} referans metin encode edildi!")
+    
+    def _encode(self, texts, batch_size=32):
+        """Metinleri L2-normalize edilmiş embedding'lere çevir (mean pooling)"""
+        import torch
+        
+        embeddings = []
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                with metrics.stage('huggingface', 'tokenize'):
+                    batch = self.encoder_tokenizer(
+                        texts[start:start + batch_size],
+                        padding=True, truncation=True, max_length=128, return_tensors='pt'
+                    )
+                with metrics.stage('huggingface', 'model_forward'):
+                    hidden = self.encoder(**batch).last_hidden_state
+                mask = batch['attention_mask'].unsqueeze(-1).type_as(hidden)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                embeddings.append(torch.nn.functional.normalize(pooled, dim=1).cpu().numpy())
+        return np.vstack(embeddings)
+    
+    def _classify_with_embeddings(self, texts, batch_size=32, temperature=0.05):
+        """Tek encode + cosine similarity matmul ile intent tahmini"""
+        similarities = self._encode(texts, batch_size=batch_size) @ self.reference_embeddings.T
+        
+        intent_scores = np.full((len(texts), len(self.intents)), -1.0, dtype=np.float32)
+        for intent_id in range(len(self.intents)):
+            columns = self.reference_intent_ids == intent_id
+            if columns.any():
+                intent_scores[:, intent_id] = similarities[:, columns].max(axis=1)
+        
+        logits = intent_scores / temperature
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        
+        best = probs.argmax(axis=1)
+        return [(self.intents[i], float(probs[row, i])) for row, i in enumerate(best)]
+    
+    def classify_intent(self, text, raise_errors=False):
+        """Intent classification using Hugging Face (raise_errors: greeting'e düşmek yerine hata fırlat)"""
+        return self.classify_intents([text], raise_errors=raise_errors)[0]
+    
+    def classify_intents(self, texts, batch_size=16, raise_errors=False):
+        """Toplu intent classification - (metin, hipotez) çiftleri ortak batch'lerde işlenir"""
+        texts = list(texts)
+        results = [None] * len(texts)
+        pending = []
+        
+        for i, text in enumerate(texts):
+            cached = self.cache.get(text, 'huggingface', self.model_version) if self.cache else None
+            if cached is not None:
+                results[i] = tuple(cached)
+            else:
+                pending.append(i)
+        
+        metrics.record_event('huggingface', 'cache_hit', len(texts) - len(pending))
+        if not pending:
+            return results
+        
+        pending_texts = [texts[i] for i in pending]
+        try:
+            if self.use_embeddings:
+                predictions = self._classify_with_embeddings_and_rerank(pending_texts, batch_size)
+            else:
+                predictions = self._classify_with_nli(pending_texts, batch_size)
         except Exception as e:
             print(f"Hugging Face classification hatası: {e}")
-            return 'greeting', 0.5
+            metrics.record_event('huggingface', 'model_error')
+            # Değerlendirmede hata greeting tahmini olarak kaydedilmesin
+            if raise_errors:
+                raise
+            metrics.record_event('huggingface', 'fallback_greeting', len(pending))
+            for i in pending:
+                results[i] = ('greeting', 0.5)
+            return results
+        
+        for i, (intent, confidence) in zip(pending, predictions):
+            results[i] = (intent, confidence)
+            if self.cache:
+                self.cache.set(texts[i], 'huggingface', self.model_version, [intent, float(confidence)])
+        
+        return results
+    
+    def _classify_with_embeddings_and_rerank(self, texts, batch_size):
+        """Embedding tahmini; güveni düşük olanlar NLI cross-encoder ile yeniden sıralanır"""
+        results = self._classify_with_embeddings(texts, batch_size=batch_size)
+        
+        if self.classifier is None or self.rerank_threshold is None:
+            return results
+        
+        low_confidence = [i for i, (_, confidence) in enumerate(results) if confidence < self.rerank_threshold]
+        if low_confidence:
+            try:
+                reranked = self._classify_with_nli([texts[i] for i in low_confidence], batch_size)
+            except Exception as e:
+                print(f"NLI re-rank hatası: {e}")
+                return results
+            for i, result in zip(low_confidence, reranked):
+                results[i] = result
+        
+        return results
+    
+    def _classify_with_nli(self, texts, batch_size):
+        """NLI pipeline ile toplu zero-shot classification"""
+        # Pipeline tokenization'ı kendi içinde yapar; bu aşama tokenize + forward süresini kapsar
+        with metrics.stage('huggingface', 'model_forward'):
+            results = self.classifier(texts, self.candidate_labels, batch_size=batch_size)
+        if isinstance(results, dict):
+            results = [results]
+        
+        return [
+            (self.label_to_intent.get(result['labels'][0], 'greeting'), result['scores'][0])
+            for result in results
+        ]
     
     def generate_response(self, intent, user_message):
         """Intent'e göre response üretme"""
-        if intent in self.intent_responses:
-            responses = self.intent_responses[intent]
-            return np.random.choice(responses)
-        else:
-            return "Üzgünüm, bu konuda size yardımcı olamayabilirim. Başka bir konuda yardımcı olabilir miyim?"
+        with metrics.stage('huggingface', 'response_selection'):
+            answer = self.retriever.answer(user_message, intent) if self.retriever else None
+            if answer:
+                return answer
+            if intent in self.intent_responses:
+                responses = self.intent_responses[intent]
+                return np.random.choice(responses)
+            else:
+                return "Üzgünüm, bu konuda size yardımcı olamayabilirim. Başka bir konuda yardımcı olabilir miyim?"
     
-    def chat(self, user_message):
-        """Ana chat fonksiyonu"""
-        intent, confidence = self.classify_intent(user_message)
+    def chat(self, user_message, context=None):
+        """Ana chat fonksiyonu (context: önceki turlar - belirsiz takip mesajları için)"""
+        with metrics.stage('huggingface', 'chat'):
+            intent, confidence = classify_with_context(self.classify_intent, user_message, context, threshold=0.5)
+            return self.build_chat_response(user_message, intent, confidence)
+    
+    def build_chat_response(self, user_message, intent, confidence):
+        """Önceden hesaplanmış intent'ten chat cevabı oluştur"""
         response = self.generate_response(intent, user_message)
         
         if confidence < 0.5:
@@ -161,38 +384,41 @@ class HuggingFaceChatbot:
             'confidence': confidence
         }
     
-    def evaluate_model(self, test_data):
+    def evaluate_model(self, test_data, batch_size=16):
         """Model performansını değerlendirme"""
-        true_intents = []
-        predicted_intents = []
-        
         print("🤖 Hugging Face modeli değerlendiriliyor...")
+        return evaluate_chatbot(self, test_data, name='Hugging Face', chunk_size=batch_size)
+
+
+def compare_backends(data_path="data/ecommerce_dataset.csv", batch_size=16, **onnx_options):
+    """PyTorch ve ONNX backend'lerini aynı veri setinde karşılaştır (accuracy paritesi + gecikme)"""
+    data = pd.read_csv(data_path)
+    texts = data['text'].tolist()
+    true_intents = data['intent'].tolist()
+    
+    report = {}
+    predictions = {}
+    for backend in ("pytorch", "onnx"):
+        options = onnx_options if backend == "onnx" else {}
+        chatbot = HuggingFaceChatbot(backend=backend, **options)
+        chatbot.classify_intents(texts[:batch_size], batch_size=batch_size)  # warm-up
         
-        for idx, row in test_data.iterrows():
-            true_intent = row['intent']
-            text = row['text']
-            
-            predicted_intent, _ = self.classify_intent(text)
-            
-            true_intents.append(true_intent)
-            predicted_intents.append(predicted_intent)
-            
-            if idx % 10 == 0:
-                print(f"İşlenen: {idx}/{len(test_data)}")
-        
-        accuracy = accuracy_score(true_intents, predicted_intents)
-        precision, recall, f1, _ = precision_recall_fscore_support(
-            true_intents, predicted_intents, average='weighted', zero_division=0
-        )
+        start = time.perf_counter()
+        results = chatbot.classify_intents(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
         
-        return {
-            'accuracy': accuracy,
-            'precision': precision,
-            'recall': recall,
-            'f1_score': f1,
-            'predictions': predicted_intents,
-            'true_labels': true_intents
+        predictions[backend] = [intent for intent, _ in results]
+        report[backend] = {
+            'model_version': chatbot.model_version,
+            'accuracy': accuracy_score(true_intents, predictions[backend]),
+            'ms_per_message': elapsed * 1000 / len(texts)
         }
+        print(f"⚙️ {backend}: accuracy={report[backend]['accuracy']:.3f} "
+              f"({report[backend]['ms_per_message']:.1f} ms/mesaj)")
+    
+    report['agreement'] = float(np.mean(np.array(predictions['pytorch']) == np.array(predictions['onnx'])))
+    print(f"🔁 Tahmin uyuşması: {report['agreement']:.3f}")
+    return report
 
 
 if __name__ == "__main__":
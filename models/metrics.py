@@ -0,0 +1,195 @@
+"""
+Aşama bazlı gecikme ölçümü ve metrik dışa aktarımı
+CHATBOT_METRICS=1 ile (veya enable()) açılır; kapalıyken stage() paylaşılan boş bir context manager
+döndürür ve record_event() hemen döner. Prometheus metin formatı ve yüklüyse OpenTelemetry span'leri
+(CHATBOT_OTEL=1) desteklenir.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# Saniye cinsinden histogram sınırları (Prometheus "le" etiketleri)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+_enabled = False
+_tracer = None
+_lock = threading.Lock()
+_histograms = {}
+_events = Counter()
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('backend', 'name', 'start', 'span')
+
+    def __init__(self, backend, name):
+        self.backend = backend
+        self.name = name
+        self.span = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self.span = _tracer.start_as_current_span(
+                f"{self.backend}.{self.name}", attributes={'backend': self.backend, 'stage': self.name}
+            )
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.backend, self.name, time.perf_counter() - self.start)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+def stage(backend, name):
+    """with stage('gemini', 'api_call'): ... - kapalıyken maliyeti tek bir global kontrolüdür"""
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(backend, name)
+
+
+def observe(backend, name, seconds):
+    """Bir aşamanın süresini histograma ekle"""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get((backend, name))
+        if histogram is None:
+            histogram = _histograms[(backend, name)] = {
+                'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0, 'count': 0
+            }
+        histogram['buckets'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+
+def record_event(backend, event, count=1):
+    """Etiketli olay sayacı: cache_hit, api_error, retry, fallback_greeting, ..."""
+    if not _enabled or not count:
+        return
+    with _lock:
+        _events[(backend, event)] += count
+
+
+def enable(otel=None):
+    """Ölçümü aç; otel=True (veya CHATBOT_OTEL=1) ise OpenTelemetry span'leri de üretilir"""
+    global _enabled, _tracer
+    if otel is None:
+        otel = os.getenv('CHATBOT_OTEL', '').lower() in _TRUE_VALUES
+    if otel:
+        try:
+            from opentelemetry import trace
+            _tracer = trace.get_tracer("chatbot")
+        except ImportError:
+            print("⚠️ opentelemetry yüklü değil, span üretilmeyecek")
+            _tracer = None
+    _enabled = True
+
+
+def disable():
+    global _enabled, _tracer
+    _enabled = False
+    _tracer = None
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _events.clear()
+
+
+def _estimate_quantile(buckets, count, quantile):
+    """Histogramdan yaklaşık yüzdelik (ait olduğu bucket'ın üst sınırı)"""
+    target = quantile * count
+    cumulative = 0
+    for upper, bucket_count in zip(LATENCY_BUCKETS + (float('inf'),), buckets):
+        cumulative += bucket_count
+        if cumulative >= target:
+            return upper
+    return float('inf')
+
+
+def snapshot():
+    """Arayüzde göstermek için aşama ve olay özetleri"""
+    with _lock:
+        histograms = {key: dict(value, buckets=list(value['buckets'])) for key, value in _histograms.items()}
+        events = dict(_events)
+
+    stages = []
+    for (backend, name), histogram in sorted(histograms.items()):
+        count = histogram['count']
+        stages.append({
+            'backend': backend,
+            'stage': name,
+            'count': count,
+            'total_s': histogram['sum'],
+            'mean_ms': histogram['sum'] * 1000 / count if count else 0.0,
+            'p50_ms': _estimate_quantile(histogram['buckets'], count, 0.50) * 1000,
+            'p95_ms': _estimate_quantile(histogram['buckets'], count, 0.95) * 1000
+        })
+
+    return {
+        'stages': stages,
+        'events': [
+            {'backend': backend, 'event': event, 'count': count}
+            for (backend, event), count in sorted(events.items())
+        ]
+    }
+
+
+def _format_le(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def export_prometheus():
+    """Prometheus text exposition formatı (v0.0.4)"""
+    with _lock:
+        histograms = {key: dict(value, buckets=list(value['buckets'])) for key, value in _histograms.items()}
+        events = dict(_events)
+
+    lines = [
+        "# HELP chatbot_stage_duration_seconds Chatbot aşama süreleri",
+        "# TYPE chatbot_stage_duration_seconds histogram"
+    ]
+    for (backend, name), histogram in sorted(histograms.items()):
+        labels = f'backend="{backend}",stage="{name}"'
+        cumulative = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + (float('inf'),), histogram['buckets']):
+            cumulative += bucket_count
+            lines.append(f'chatbot_stage_duration_seconds_bucket{{{labels},le="{_format_le(bound)}"}} {cumulative}')
+        lines.append(f"chatbot_stage_duration_seconds_sum{{{labels}}} {histogram['sum']}")
+        lines.append(f"chatbot_stage_duration_seconds_count{{{labels}}} {histogram['count']}")
+
+    lines.append("# HELP chatbot_events_total Cache hit, API hatası ve greeting fallback gibi olaylar")
+    lines.append("# TYPE chatbot_events_total counter")
+    for (backend, event), count in sorted(events.items()):
+        lines.append(f'chatbot_events_total{{backend="{backend}",event="{event}"}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+if os.getenv('CHATBOT_METRICS', '').lower() in _TRUE_VALUES:
+    enable()
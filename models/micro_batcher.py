@@ -0,0 +1,139 @@
+"""
+Eşzamanlı istekler için dinamik micro-batching
+Gelen mesajlar max_wait_ms boyunca (veya max_batch_size dolana kadar) toplanır, tek bir toplu
+çıkarımla işlenir ve her çağırana kendi Future'ı üzerinden sonuç döner.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5.0, name="batcher"):
+        """batch_fn: liste alır, aynı sırada aynı uzunlukta sonuç listesi döndürür"""
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self.batch_size_histogram = Counter()
+        self.queue_depth_histogram = Counter()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"{name}-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Tek öğeyi kuyruğa ekle -> concurrent.futures.Future"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} kapatıldı")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    async def submit_async(self, item):
+        """submit'in asyncio versiyonu"""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def __call__(self, item, timeout=None):
+        """Senkron çağıranlar için: sonuç gelene kadar bekle"""
+        return self.submit(item).result(timeout=timeout)
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        stop = False
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                stop = True
+                break
+            batch.append(entry)
+
+        return batch, stop
+
+    def _run(self):
+        try:
+            self._process()
+        finally:
+            self._reject_pending()
+
+    def _reject_pending(self):
+        """close() ile yarışıp durdurma işaretinden sonra kuyruğa giren istekler askıda kalmasın"""
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not _STOP and entry[1].set_running_or_notify_cancel():
+                entry[1].set_exception(RuntimeError(f"{self.name} kapatıldı"))
+
+    def _process(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch, stop = self._collect(first)
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+
+            if batch:
+                self.queue_depth_histogram[self._queue.qsize()] += 1
+                self.batch_size_histogram[len(batch)] += 1
+                self.batches += 1
+                self.items += len(batch)
+
+                try:
+                    results = self.batch_fn([item for item, _ in batch])
+                    if len(results) != len(batch):
+                        raise ValueError(f"batch_fn {len(batch)} öğe için {len(results)} sonuç döndürdü")
+                    for (_, future), result in zip(batch, results):
+                        future.set_result(result)
+                except Exception as e:
+                    self.errors += 1
+                    for _, future in batch:
+                        future.set_exception(e)
+
+            if stop:
+                return
+
+    def stats(self):
+        """Kuyruk derinliği ve batch boyutu histogramları"""
+        return {
+            'name': self.name,
+            'queue_depth': self.queue_depth,
+            'batches': self.batches,
+            'items': self.items,
+            'errors': self.errors,
+            'avg_batch_size': self.items / self.batches if self.batches else 0.0,
+            'batch_size_histogram': dict(sorted(self.batch_size_histogram.items())),
+            'queue_depth_histogram': dict(sorted(self.queue_depth_histogram.items()))
+        }
+
+    def close(self, timeout=None):
+        """Kuyruktaki işleri bitirip worker'ı durdur"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
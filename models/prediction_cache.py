@@ -0,0 +1,118 @@
+"""
+Tüm chatbot backend'leri için ortak tahmin cache'i
+Bellek içi LRU (boyut + TTL) ve restart'lardan sağ çıkan opsiyonel SQLite katmanı
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from models.text_normalization import normalize_text
+
+
+class PredictionCache:
+    def __init__(self, max_size=10000, ttl=3600, sqlite_path=None):
+        """Normalize edilmiş metin + backend + model versiyonu ile anahtarlanan cache"""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(text, backend, model_version):
+        """İçerik adresli cache anahtarı üret"""
+        normalized = normalize_text(text)
+        raw_key = f"{backend}\x1f{model_version}\x1f{normalized}"
+        return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+
+    def _expires_at(self):
+        return time.time() + self.ttl if self.ttl else None
+
+    def get(self, text, backend, model_version):
+        """Cache'teki tahmini döndür, yoksa None"""
+        key = self.make_key(text, backend, model_version)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM predictions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = json.loads(row[0]), row[1]
+                    if expires_at is None or expires_at > now:
+                        self._store_in_memory(key, value, expires_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM predictions WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, text, backend, model_version, value):
+        """Tahmini cache'e yaz (değer JSON'a çevrilebilir olmalı)"""
+        key = self.make_key(text, backend, model_version)
+        expires_at = self._expires_at()
+
+        with self._lock:
+            self._store_in_memory(key, value, expires_at)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self._db.commit()
+
+    def _store_in_memory(self, key, value, expires_at):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Bellek ve disk katmanını temizle"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM predictions")
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss sayaçları"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._memory)
+        }
@@ -0,0 +1,73 @@
+"""
+Dakikalık istek (RPM) ve token (TPM) bütçesine göre çalışan token-bucket limiter
+Senkron ve asyncio çağıranlar aynı bucket'ı paylaşabilir
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucketLimiter:
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        """None verilen bütçe sınırsız kabul edilir"""
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+
+        if self.requests_per_minute:
+            self._requests = min(
+                float(self.requests_per_minute),
+                self._requests + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + elapsed * self.tokens_per_minute / 60.0
+            )
+
+    def _reserve(self, tokens):
+        """Bütçe yeterliyse düş ve 0 döndür, değilse beklenecek süreyi (sn) döndür"""
+        with self._lock:
+            self._refill(time.monotonic())
+
+            if self.tokens_per_minute:
+                tokens = min(tokens, self.tokens_per_minute)
+
+            wait = 0.0
+            if self.requests_per_minute and self._requests < 1:
+                wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+            if self.tokens_per_minute and self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60.0 / self.tokens_per_minute)
+
+            if wait == 0.0:
+                if self.requests_per_minute:
+                    self._requests -= 1
+                if self.tokens_per_minute:
+                    self._tokens -= tokens
+
+            return wait
+
+    def acquire(self, tokens=1):
+        """Bütçe açılana kadar thread'i beklet"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """Bütçe açılana kadar event loop'u bloklamadan bekle"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
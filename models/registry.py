@@ -0,0 +1,238 @@
+"""
+Process genelinde paylaşılan chatbot kayıt defteri
+Her (backend, konfigürasyon) için tek örnek oluşturulur; inference servisi, Streamlit ve
+değerlendirme scriptleri aynı nesneleri kullanır. Ağır backend'ler ilk kullanımda import edilir.
+"""
+
+import hashlib
+import importlib.util
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BACKENDS = ('Gemini', 'Hugging Face', 'Traditional ML', 'Cascade')
+
+# Yerel CPU çıkarımı yapan, micro-batching'den fayda gören backend'ler
+BATCHED_BACKENDS = ('Hugging Face', 'Traditional ML')
+
+_instances = {}
+_key_locks = {}
+_futures = {}
+_batchers = {}
+_retriever = None
+_lock = threading.Lock()
+_retriever_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-loader")
+
+
+def _load_traditional(model_path="trained_chatbot_model.pkl", compact_path="trained_chatbot_model.cmpt",
+                      data_path="data/ecommerce_dataset.csv", cache=None, retriever=None):
+    """Kayıtlı TraditionalML modelini yükle, yoksa veri setinden eğit"""
+    from models.traditional_ml_model import TraditionalMLChatbot
+
+    chatbot = TraditionalMLChatbot(cache=cache, retriever=retriever)
+    if compact_path and os.path.exists(compact_path):
+        chatbot.load_compact_model(compact_path)
+    elif model_path and os.path.exists(model_path):
+        chatbot.load_model(model_path)
+    else:
+        X, y = chatbot.prepare_data(data_path)
+        chatbot.select_best_model(X, y)
+    return chatbot
+
+
+def huggingface_available():
+    """torch ve transformers kurulu mu (import etmeden kontrol edilir)"""
+    return all(importlib.util.find_spec(module) is not None for module in ('torch', 'transformers'))
+
+
+def _load_cascade(use_huggingface=None, use_gemini=None, data_path="data/ecommerce_dataset.csv",
+                  thresholds_path="cascade_thresholds.json", target_precision=0.9):
+    """Registry'deki backend'lerden cascade kur; eşikler dosyadan okunur ya da veri setinden öğrenilip kaydedilir"""
+    from models.cascade_model import CascadeChatbot
+
+    if use_huggingface is None:
+        use_huggingface = huggingface_available()
+        if not use_huggingface:
+            print("⚠️ torch/transformers yüklü değil, cascade Hugging Face katmanı olmadan kuruluyor")
+    if use_gemini is None:
+        use_gemini = bool(os.getenv('GEMINI_API_KEY'))
+
+    cascade = CascadeChatbot(
+        traditional=get_chatbot('Traditional ML'),
+        huggingface=get_chatbot('Hugging Face') if use_huggingface else None,
+        gemini=get_chatbot('Gemini') if use_gemini else None
+    )
+    if thresholds_path and os.path.exists(thresholds_path) and \
+            cascade.load_thresholds(thresholds_path, target_precision=target_precision):
+        return cascade
+    cascade.fit_thresholds(data_path, target_precision=target_precision)
+    # Sonraki worker'lar ve yeniden başlatmalar eşikleri tekrar öğrenmez
+    if thresholds_path:
+        cascade.save_thresholds(thresholds_path)
+    return cascade
+
+
+def _create(name, **options):
+    if name == 'Gemini':
+        from models.gemini_model import GeminiChatbot
+        return GeminiChatbot(**options)
+    if name == 'Hugging Face':
+        from models.huggingface_model import HuggingFaceChatbot
+        return HuggingFaceChatbot(**options)
+    if name == 'Traditional ML':
+        return _load_traditional(**options)
+    if name == 'Cascade':
+        return _load_cascade(**options)
+    raise ValueError(f"Bilinmeyen backend: {name}")
+
+
+def retrieval_enabled():
+    return os.getenv('CHATBOT_RETRIEVAL', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_retriever(index_path=None):
+    """Backend'lerin paylaştığı SSS retrieval katmanı (CHATBOT_RETRIEVAL_INDEX: kalıcı indeks dizini)"""
+    global _retriever
+    if _retriever is not None:
+        return _retriever
+    # İndeks kurulumu ayrı kilitle yapılır; genel kilidi bekleyen get_chatbot çağrıları engellenmez
+    with _retriever_lock:
+        if _retriever is None:
+            from models.vector_index import FaqRetriever, build_default_index
+            _retriever = FaqRetriever(build_default_index(index_path or os.getenv('CHATBOT_RETRIEVAL_INDEX')))
+    return _retriever
+
+
+def _option_key(option, value):
+    # API anahtarları registry anahtarında düz metin tutulmaz
+    if option == 'api_key' and value:
+        return hashlib.sha256(value.encode('utf-8')).hexdigest()
+    if value is None or isinstance(value, (str, int, float, bool, tuple)):
+        return repr(value)
+    return f"id:{id(value)}"
+
+
+def registry_key(name, **options):
+    """Backend adı + konfigürasyon -> registry anahtarı"""
+    return (name,) + tuple(sorted((option, _option_key(option, value)) for option, value in options.items()))
+
+
+def get_chatbot(name, **options):
+    """Chatbot'u döndür; bu process'te ilk istekte oluşturulur"""
+    key = registry_key(name, **options)
+    chatbot = _instances.get(key)
+    if chatbot is not None:
+        return chatbot
+
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    # Aynı model için eşzamanlı istekler tek yükleme bekler, farklı modeller paralel yüklenir
+    with key_lock:
+        chatbot = _instances.get(key)
+        if chatbot is None:
+            chatbot = _create(name, **options)
+            # CHATBOT_RETRIEVAL=1 ile şablon cevaplar yerine (eşleşme varsa) SSS cevapları kullanılır
+            if retrieval_enabled() and getattr(chatbot, 'retriever', False) is None:
+                chatbot.retriever = get_retriever()
+            _instances[key] = chatbot
+    return chatbot
+
+
+def warmup(chatbot, texts=("Merhaba",)):
+    """İlk kullanıcı mesajı lazy init / graph maliyetini ödemesin diye örnek çıkarım yap"""
+    # Gemini'de warm-up API kotası harcar ve yerel bir maliyeti de yoktur
+    if type(chatbot).__name__ == 'GeminiChatbot':
+        return
+    classify_texts(chatbot, list(texts))
+
+
+def _load_and_warmup(name, options):
+    chatbot = get_chatbot(name, **options)
+    warmup(chatbot)
+    return chatbot
+
+
+def load_in_background(name, **options):
+    """Modeli arka planda yükleyip ısıt; aynı model için hep aynı Future döner"""
+    key = registry_key(name, **options)
+    with _lock:
+        future = _futures.get(key)
+        # Başarısız yüklemeler bir sonraki çağrıda yeniden denenir
+        if future is None or (future.done() and future.exception() is not None):
+            future = _executor.submit(_load_and_warmup, name, options)
+            _futures[key] = future
+    return future
+
+
+def get_batcher(name, max_batch_size=32, max_wait_ms=5.0, **options):
+    """Backend için paylaşılan MicroBatcher; micro-batching desteklemeyen backend'lerde None"""
+    if name not in BATCHED_BACKENDS:
+        return None
+
+    key = registry_key(name, **options)
+    batcher = _batchers.get(key)
+    if batcher is not None:
+        return batcher
+
+    from models.micro_batcher import MicroBatcher
+
+    chatbot = get_chatbot(name, **options)
+    with _lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = MicroBatcher(
+                lambda texts: classify_texts(chatbot, texts),
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                name=name
+            )
+            _batchers[key] = batcher
+    return batcher
+
+
+def batcher_stats():
+    """Tüm batcher'ların kuyruk/batch istatistikleri"""
+    return [batcher.stats() for batcher in list(_batchers.values())]
+
+
+def loaded_chatbots():
+    """Yüklü chatbot'lar: {backend adı: [örnekler]}"""
+    loaded = {}
+    for key, chatbot in list(_instances.items()):
+        loaded.setdefault(key[0], []).append(chatbot)
+    return loaded
+
+
+def model_versions():
+    """Varsayılan konfigürasyonla yüklü chatbot'ların sürümleri: {backend adı: model_version}"""
+    return {
+        key[0]: getattr(chatbot, 'model_version', None)
+        for key, chatbot in list(_instances.items()) if len(key) == 1
+    }
+
+
+def clear():
+    """Registry'yi boşalt (testler ve yeniden yükleme için)"""
+    with _lock:
+        _instances.clear()
+        _key_locks.clear()
+        _futures.clear()
+        for batcher in _batchers.values():
+            batcher.close()
+        _batchers.clear()
+
+
+def classify_texts(chatbot, texts):
+    """Backend'den bağımsız toplu sınıflandırma -> [(intent, confidence), ...]"""
+    texts = list(texts)
+    if hasattr(chatbot, 'predict_intents'):
+        predictions = chatbot.predict_intents(texts)
+        return [
+            (str(intent), float(confidence))
+            for intent, confidence in zip(predictions['intents'], predictions['confidences'])
+        ]
+    if hasattr(chatbot, 'classify_intents'):
+        return [(intent, float(confidence)) for intent, confidence in chatbot.classify_intents(texts)]
+    return [chatbot.classify_intent(text) for text in texts]
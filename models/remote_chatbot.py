@@ -0,0 +1,92 @@
+"""
+Inference servisine HTTP üzerinden bağlanan ince istemci
+Diğer chatbot sınıflarıyla aynı arayüzü sunar (chat, chat_stream, classify_intent, evaluate_model)
+"""
+
+import json
+import urllib.parse
+import urllib.request
+
+from models.evaluation_engine import evaluate_chatbot
+
+
+class RemoteChatbot:
+    def __init__(self, base_url, model_name, timeout=30):
+        """app/inference_server.py'de çalışan bir backend'e bağlan"""
+        self.base_url = base_url.rstrip('/')
+        self.model_name = model_name
+        self.timeout = timeout
+
+    @property
+    def model_version(self):
+        """Sunucudaki modelin sürümü - sunucu modeli değiştirince kayıtlı sonuçlar da geçersizleşir"""
+        result = self._request(f"/models/{urllib.parse.quote(self.model_name)}")
+        return f"remote:{self.model_name}:{result['model_version']}"
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.base_url}{path}",
+            data=data,
+            headers={'Content-Type': 'application/json'},
+            method='POST' if data is not None else 'GET'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    @classmethod
+    def available_models(cls, base_url, timeout=5):
+        """Sunucuda yüklü backend'lerin listesi"""
+        return cls(base_url, None, timeout=timeout)._request('/health')['models']
+
+    def classify_intent(self, text):
+        result = self._request('/classify', {'text': text, 'model': self.model_name})
+        return result['intent'], result['confidence']
+
+    def classify_intents(self, texts):
+        result = self._request('/classify/batch', {'texts': list(texts), 'model': self.model_name})
+        return [(item['intent'], item['confidence']) for item in result['results']]
+
+    def _chat_payload(self, user_message, context):
+        payload = {'message': user_message, 'model': self.model_name}
+        if context:
+            payload['context'] = [
+                {key: turn[key] for key in ('role', 'content', 'intent') if turn.get(key) is not None}
+                for turn in context
+            ]
+        return payload
+
+    def chat(self, user_message, context=None):
+        result = self._request('/chat', self._chat_payload(user_message, context))
+        return {
+            'intent': result['intent'],
+            'response': result['response'],
+            'confidence': result['confidence']
+        }
+
+    def chat_stream(self, user_message, context=None):
+        """/chat/stream NDJSON akışı -> GeminiChatbot.chat_stream ile aynı olaylar"""
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/stream",
+            data=json.dumps(self._chat_payload(user_message, context)).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line.decode('utf-8'))
+                if event['type'] == 'token':
+                    yield event['text']
+                elif event['type'] == 'intent':
+                    yield {'intent': event['intent'], 'confidence': event['confidence']}
+                elif event['type'] == 'done':
+                    result = {'intent': event['intent'], 'response': event['response'], 'confidence': event['confidence']}
+                    if event.get('error'):
+                        result['error'] = event['error']
+                    yield result
+
+    def evaluate_model(self, test_data):
+        """Model performansını değerlendirme (sunucu tarafında parça parça toplu tahmin)"""
+        return evaluate_chatbot(self, test_data, name=self.model_name)
@@ -0,0 +1,74 @@
+"""
+Sürümlenmiş değerlendirme sonuçları deposu (SQLite)
+Satır bazlı tahminler (backend, model sürümü, veri seti hash'i) ile anahtarlanır. EvaluationEngine'in
+checkpoint arayüzünü uygular; aynı model ve veri için tahminler bir kez hesaplanır, confusion matrix
+ve intent bazlı metrikler her seferinde bu kayıtlardan üretilir.
+"""
+
+import sqlite3
+import threading
+import time
+
+
+class ResultsStore:
+    def __init__(self, sqlite_path="evaluation_results.db"):
+        self.sqlite_path = sqlite_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "backend TEXT NOT NULL, model_version TEXT NOT NULL, dataset_hash TEXT NOT NULL, "
+            "row_id TEXT NOT NULL, text TEXT, true_intent TEXT, predicted_intent TEXT NOT NULL, "
+            "confidence REAL, created_at REAL, "
+            "PRIMARY KEY (backend, model_version, dataset_hash, row_id))"
+        )
+        self._db.commit()
+
+    def load_predictions(self, backend, model_version, data_hash):
+        """{row_id: (intent, confidence)}"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row_id, predicted_intent, confidence FROM predictions "
+                "WHERE backend = ? AND model_version = ? AND dataset_hash = ?",
+                (backend, model_version, data_hash)
+            ).fetchall()
+        return {row_id: (intent, confidence) for row_id, intent, confidence in rows}
+
+    def save_predictions(self, backend, model_version, data_hash, rows):
+        """rows: [(row_id, text, true_intent, predicted_intent, confidence), ...]"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO predictions (backend, model_version, dataset_hash, row_id, text, "
+                "true_intent, predicted_intent, confidence, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(backend, model_version, data_hash, row_id, text, true_intent, predicted, confidence, now)
+                 for row_id, text, true_intent, predicted, confidence in rows]
+            )
+            self._db.commit()
+
+    def runs(self):
+        """Kayıtlı değerlendirmeler: backend, model sürümü, veri seti, satır sayısı, son güncelleme"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT backend, model_version, dataset_hash, COUNT(*), MAX(created_at) FROM predictions "
+                "GROUP BY backend, model_version, dataset_hash ORDER BY MAX(created_at) DESC"
+            ).fetchall()
+        return [
+            {'backend': backend, 'model_version': model_version, 'dataset_hash': data_hash,
+             'rows': count, 'updated_at': updated_at}
+            for backend, model_version, data_hash, count, updated_at in rows
+        ]
+
+    def delete(self, backend=None, model_version=None):
+        """Belirli backend/sürümün (ya da hepsinin) kayıtlarını sil"""
+        conditions, params = [], []
+        if backend is not None:
+            conditions.append("backend = ?")
+            params.append(backend)
+        if model_version is not None:
+            conditions.append("model_version = ?")
+            params.append(model_version)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            self._db.execute(f"DELETE FROM predictions{where}", params)
+            self._db.commit()
@@ -0,0 +1,36 @@
+"""
+Türkçe metin normalizasyonu
+Tek seferde derlenen çeviri tablosu: Türkçe karakterler (büyük/küçük) ASCII'ye, noktalama silinir
+"""
+
+import string
+from functools import lru_cache
+
+# .lower() Türkçe büyük harfleri yanlış çevirir ("İ" -> "i̇", "I" -> "i" yerine "ı" olmalı);
+# bu yüzden Türkçe harfler lower()'dan önce tabloda doğrudan ASCII karşılıklarına eşlenir.
+TURKISH_CHAR_MAP = {
+    'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u',
+    'Ç': 'c', 'Ğ': 'g', 'I': 'i', 'İ': 'i', 'Ö': 'o', 'Ş': 's', 'Ü': 'u'
+}
+
+NORMALIZATION_TABLE = str.maketrans({
+    **{char: None for char in string.punctuation},
+    **TURKISH_CHAR_MAP
+})
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(text):
+    """Tek metin için normalizasyon (çevrimiçi chat döngüsü için cache'li)"""
+    return ' '.join(text.translate(NORMALIZATION_TABLE).lower().split())
+
+
+def normalize_series(series):
+    """Pandas Series için toplu normalizasyon"""
+    return (
+        series.fillna('').astype(str)
+        .str.translate(NORMALIZATION_TABLE)
+        .str.lower()
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
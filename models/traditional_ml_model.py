@@ -5,38 +5,110 @@ Bu gerçek model eğitimi örneğidir!
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 from sklearn.pipeline import Pipeline
+import hashlib
 import joblib
+import os
 import re
-import string
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import metrics
+from models.conversation_store import classify_with_context
+from models.text_normalization import normalize_text, normalize_series
+from models.compact_model import CompactIntentModel, export_compact
+
+INTENTS = [
+    'greeting', 'product_inquiry', 'order_status',
+    'cart_operations', 'payment_issues', 'return_refund',
+    'shipping_info', 'goodbye', 'complaint'
+]
+
+DEFAULT_PARAM_GRIDS = {
+    'random_forest': {'n_estimators': [100, 300], 'max_depth': [None, 30]},
+    'logistic_regression': {'C': [0.1, 1.0, 10.0]},
+    'svm': {'C': [1.0, 10.0], 'kernel': ['rbf', 'linear']}
+}
+
+
+def build_vectorizer():
+    """Tüm modellerin paylaştığı TF-IDF konfigürasyonu"""
+    return TfidfVectorizer(
+        max_features=5000,
+        ngram_range=(1, 2),  
+        stop_words=None
+    )
+
+
+def build_classifier(model_type, **params):
+    """Model tipine göre sınıflandırıcı oluştur"""
+    if model_type == 'random_forest':
+        return RandomForestClassifier(**{'n_estimators': 100, 'random_state': 42, **params})
+    elif model_type == 'logistic_regression':
+        return LogisticRegression(**{'max_iter': 1000, 'random_state': 42, **params})
+    elif model_type == 'svm':
+        return SVC(**{'kernel': 'rbf', 'random_state': 42, **params})
+    else:
+        raise ValueError("Desteklenmeyen model tipi!")
+
+
+def _fingerprint(*parts):
+    """Eğitim girdilerinin (sınıflandırıcı parametreleri, veri) kısa özeti - aynı girdi aynı model_version'ı verir"""
+    return joblib.hash(parts)[:12]
+
+
+def _file_digest(filepath, block_size=1 << 20):
+    """Dosya içeriğinin özeti; büyük dosyalar parça parça okunur"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _fit_and_score_fold(model_type, params, X_train, y_train, X_test, y_test):
+    """Tek (model, hiperparametre, fold) kombinasyonu - worker process'te çalışır"""
+    model = build_classifier(model_type, **params)
+    model.fit(X_train, y_train)
+    return accuracy_score(y_test, model.predict(X_test))
 
 class TraditionalMLChatbot:
-    def __init__(self):
-        """Geleneksel ML tabanlı chatbot"""
+    def __init__(self, cache=None, retriever=None):
+        """Geleneksel ML tabanlı chatbot (retriever: SSS cevapları için models.vector_index.FaqRetriever)"""
         self.model = None
         self.vectorizer = None
         self.pipeline = None
         self.label_encoder = None
+        self.compact_model = None
+        self.model_version = None
+        self.cache = cache
+        self.retriever = retriever
         
-    def preprocess_text(self, text):
-        """Metin ön işleme"""
-        text = text.lower()
-        
-        turkish_chars = {'ç':'c', 'ğ':'g', 'ı':'i', 'ö':'o', 'ş':'s', 'ü':'u'}
-        for turkish, english in turkish_chars.items():
-            text = text.replace(turkish, english)
-        
-        text = text.translate(str.maketrans('', '', string.punctuation))
-        
-        text = ' '.join(text.split())
+        self.intent_responses = {
+            'greeting': "Merhaba! Size nasıl yardımcı olabilirim?",
+            'product_inquiry': "Hangi ürün hakkında bilgi almak istiyorsunuz?",
+            'order_status': "Sipariş numaranızı paylaşabilir misiniz?",
+            'cart_operations': "Sepet işlemlerinizde size yardımcı olabilirim.",
+            'payment_issues': "Ödeme konusunda nasıl yardımcı olabilirim?",
+            'return_refund': "İade işleminiz için size yardımcı olabilirim.",
+            'shipping_info': "Kargo bilgileri hakkında ne öğrenmek istiyorsunuz?",
+            'goodbye': "İyi günler! Tekrar görüşmek üzere.",
+            'complaint': "Sorununuzu anlıyorum. Nasıl yardımcı olabilirim?"
+        }
         
-        return text
+    @staticmethod
+    def preprocess_text(text):
+        """Metin ön işleme"""
+        return normalize_text(text)
     
     def prepare_data(self, data_path="data/ecommerce_dataset.csv"):
         """Veriyi hazırla"""
@@ -44,7 +116,7 @@ class TraditionalMLChatbot:
         
         df = pd.read_csv(data_path)
         
-        df['processed_text'] = df['text'].apply(self.preprocess_text)
+        df['processed_text'] = normalize_series(df['text'])
         
         X = df['processed_text']
         y = df['intent']
@@ -62,26 +134,18 @@ class TraditionalMLChatbot:
             X, y, test_size=0.2, random_state=42, stratify=y
         )
         
-        if model_type == 'random_forest':
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-        elif model_type == 'logistic_regression':
-            model = LogisticRegression(max_iter=1000, random_state=42)
-        elif model_type == 'svm':
-            model = SVC(kernel='rbf', random_state=42)
-        else:
-            raise ValueError("Desteklenmeyen model tipi!")
+        extra_params = {'n_jobs': -1} if model_type == 'random_forest' else {}
+        model = build_classifier(model_type, **extra_params)
         
         self.pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(
-                max_features=5000,
-                ngram_range=(1, 2),  
-                stop_words=None
-            )),
+            ('tfidf', build_vectorizer()),
             ('classifier', model)
         ])
         
         print("🔥 Eğitim başlıyor...")
         self.pipeline.fit(X_train, y_train)
+        self.compact_model = None
+        self.model_version = f"{model_type}-{_fingerprint(model.get_params(), list(X_train), list(y_train))}"
         
         y_pred = self.pipeline.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
@@ -99,6 +163,141 @@ class TraditionalMLChatbot:
             'X_test': X_test
         }
     
+    def select_best_model(self, X, y, param_grids=None, n_splits=5, n_jobs=-1):
+        """Paralel model seçimi - stratified k-fold CV, tüm (model, parametre, fold) işleri process havuzunda"""
+        param_grids = param_grids or DEFAULT_PARAM_GRIDS
+        X = pd.Series(X).reset_index(drop=True)
+        y = pd.Series(y).reset_index(drop=True)
+        
+        print(f"🔎 Model seçimi: {n_splits}-fold CV, {len(param_grids)} model tipi")
+        
+        # TF-IDF her fold için bir kez fit edilir ve tüm sınıflandırıcılar tarafından paylaşılır
+        folds = []
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+        for train_idx, test_idx in skf.split(X, y):
+            vectorizer = build_vectorizer()
+            X_train = vectorizer.fit_transform(X.iloc[train_idx])
+            X_test = vectorizer.transform(X.iloc[test_idx])
+            folds.append((X_train, y.iloc[train_idx].to_numpy(), X_test, y.iloc[test_idx].to_numpy()))
+        
+        candidates = [
+            (model_type, params)
+            for model_type, grid in param_grids.items()
+            for params in ParameterGrid(grid)
+        ]
+        
+        start = time.perf_counter()
+        scores = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_fit_and_score_fold)(model_type, params, *fold)
+            for model_type, params in candidates
+            for fold in folds
+        )
+        elapsed = time.perf_counter() - start
+        
+        results = []
+        for i, (model_type, params) in enumerate(candidates):
+            fold_scores = scores[i * n_splits:(i + 1) * n_splits]
+            results.append({
+                'model_type': model_type,
+                'params': params,
+                'mean_accuracy': float(np.mean(fold_scores)),
+                'std_accuracy': float(np.std(fold_scores))
+            })
+        results.sort(key=lambda result: result['mean_accuracy'], reverse=True)
+        
+        print(f"⏱️ {len(candidates)} aday x {n_splits} fold = {len(scores)} eğitim, {elapsed:.1f} sn")
+        for result in results:
+            print(f"   {result['model_type']:<20} {str(result['params']):<40} "
+                  f"{result['mean_accuracy']:.3f} ± {result['std_accuracy']:.3f}")
+        
+        best = results[0]
+        print(f"🏆 EN İYİ: {best['model_type']} {best['params']} (CV Accuracy: {best['mean_accuracy']:.3f})")
+        
+        # Kazanan tüm veriyle bir kez eğitilir; ayrıca yeniden eğitim yapılmaz
+        extra_params = {'n_jobs': -1} if best['model_type'] == 'random_forest' else {}
+        self.pipeline = Pipeline([
+            ('tfidf', build_vectorizer()),
+            ('classifier', build_classifier(best['model_type'], **best['params'], **extra_params))
+        ])
+        self.pipeline.fit(X, y)
+        self.compact_model = None
+        self.model_version = f"{best['model_type']}-{_fingerprint(self.pipeline[-1].get_params(), X.tolist(), y.tolist())}"
+        
+        return {
+            'best_model': best['model_type'],
+            'best_params': best['params'],
+            'best_accuracy': best['mean_accuracy'],
+            'results': results
+        }
+    
+    def train_streaming(self, data_path="data/ecommerce_dataset.csv", model_type='sgd',
+                        chunksize=50000, n_features=2**20, classes=None):
+        """Out-of-core eğitim - CSV parça parça okunur, bellek kullanımı veri boyutundan bağımsız"""
+        print(f"🌊 {model_type.upper()} modeli akış modunda eğitiliyor...")
+        
+        classes = np.array(sorted(classes or INTENTS))
+        
+        # Durumsuz featurizer: vocabulary tutmaz, her parça bağımsız dönüştürülür
+        vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False
+        )
+        
+        if model_type == 'sgd':
+            model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+        elif model_type == 'naive_bayes':
+            model = MultinomialNB(alpha=0.1)
+        else:
+            raise ValueError("Desteklenmeyen model tipi!")
+        
+        total_rows = 0
+        evaluated_rows = 0
+        correct = 0
+        start = time.perf_counter()
+        
+        for chunk_idx, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize, usecols=['intent', 'text'])):
+            chunk = chunk[chunk['intent'].isin(classes)]
+            if chunk.empty:
+                continue
+            
+            features = vectorizer.transform(normalize_series(chunk['text']))
+            labels = chunk['intent'].to_numpy()
+            
+            # Progressive validation: her parça öğrenilmeden önce test edilir
+            if total_rows > 0:
+                correct += int((model.predict(features) == labels).sum())
+                evaluated_rows += len(labels)
+            
+            model.partial_fit(features, labels, classes=classes)
+            total_rows += len(labels)
+            
+            elapsed = time.perf_counter() - start
+            progress = f"   📦 Parça {chunk_idx + 1}: {total_rows} satır | {total_rows / elapsed:,.0f} satır/sn"
+            if evaluated_rows:
+                progress += f" | Progressive accuracy: {correct / evaluated_rows:.3f}"
+            print(progress)
+        
+        if total_rows == 0:
+            raise ValueError("Eğitim için uygun satır bulunamadı!")
+        
+        elapsed = time.perf_counter() - start
+        self.pipeline = Pipeline([
+            ('hashing', vectorizer),
+            ('classifier', model)
+        ])
+        self.compact_model = None
+        self.model_version = f"streaming_{model_type}-{_fingerprint(model.get_params(), n_features, chunksize, classes.tolist(), _file_digest(data_path))}"
+        
+        print(f"✅ Akış eğitimi tamamlandı: {total_rows} satır, {elapsed:.1f} sn ({total_rows / elapsed:,.0f} satır/sn)")
+        
+        return {
+            'rows': total_rows,
+            'seconds': elapsed,
+            'rows_per_second': total_rows / elapsed,
+            'progressive_accuracy': correct / evaluated_rows if evaluated_rows else None
+        }
+    
     def save_model(self, filepath="trained_chatbot_model.pkl"):
         """Eğitilmiş modeli kaydet"""
         joblib.dump(self.pipeline, filepath)
@@ -107,50 +306,108 @@ class TraditionalMLChatbot:
     def load_model(self, filepath="trained_chatbot_model.pkl"):
         """Kaydedilmiş modeli yükle"""
         self.pipeline = joblib.load(filepath)
+        self.compact_model = None
+        self.model_version = f"{os.path.basename(filepath)}-{_file_digest(filepath)}"
         print(f"📂 Model yüklendi: {filepath}")
     
-    def predict_intent(self, text):
-        """Intent tahmin et"""
+    def export_compact_model(self, filepath="trained_chatbot_model.cmpt"):
+        """Modeli memory-map edilebilir kompakt formatta dışa aktar"""
         if self.pipeline is None:
             raise ValueError("Model eğitilmemiş!")
+        export_compact(self.pipeline, filepath)
+        print(f"💾 Kompakt model kaydedildi: {filepath}")
+    
+    def load_compact_model(self, filepath="trained_chatbot_model.cmpt"):
+        """Kompakt modeli yükle (sklearn unpickle yok, dosya read-only map edilir)"""
+        self.compact_model = CompactIntentModel.load(filepath)
+        self.pipeline = None
+        self.model_version = f"{os.path.basename(filepath)}-{_file_digest(filepath)}"
+        print(f"📂 Kompakt model yüklendi: {filepath}")
+    
+    def predict_intents(self, texts):
+        """Vektörel tahmin - TF-IDF bir kez uygulanır, etiket ve güven tek karar geçişinden çıkar"""
+        if self.pipeline is None and self.compact_model is None:
+            raise ValueError("Model eğitilmemiş!")
+        
+        with metrics.stage('traditional_ml', 'preprocess'):
+            processed_texts = [self.preprocess_text(text) for text in texts]
+        if self.compact_model is not None:
+            with metrics.stage('traditional_ml', 'model_forward'):
+                return self.compact_model.predict_intents(processed_texts)
         
-        processed_text = self.preprocess_text(text)
-        intent = self.pipeline.predict([processed_text])[0]
+        with metrics.stage('traditional_ml', 'vectorize'):
+            features = self.pipeline[:-1].transform(processed_texts)
+        classifier = self.pipeline[-1]
         
-        try:
-            proba = self.pipeline.predict_proba([processed_text])
-            confidence = max(proba[0])
-        except:
-            confidence = 0.8  
+        with metrics.stage('traditional_ml', 'model_forward'):
+            if hasattr(classifier, 'predict_proba'):
+                proba = classifier.predict_proba(features)
+            else:
+                # SVC(probability=False) gibi modeller: decision_function skorlarının softmax'ı
+                scores = classifier.decision_function(features)
+                if scores.ndim == 1:
+                    scores = np.column_stack([-scores, scores])
+                scores = scores - scores.max(axis=1, keepdims=True)
+                proba = np.exp(scores)
+                proba /= proba.sum(axis=1, keepdims=True)
+        
+        best = proba.argmax(axis=1)
         
         return {
-            'intent': intent,
-            'confidence': confidence,
-            'processed_text': processed_text
+            'intents': classifier.classes_[best],
+            'confidences': proba[np.arange(len(best)), best],
+            'processed_texts': processed_texts
         }
     
-    def chat(self, user_message):
-        """Chatbot ana fonksiyonu"""
-        result = self.predict_intent(user_message)
+    def predict_intent(self, text):
+        """Intent tahmin et"""
+        if self.pipeline is None and self.compact_model is None:
+            raise ValueError("Model eğitilmemiş!")
         
-        responses = {
-            'greeting': "Merhaba! Size nasıl yardımcı olabilirim?",
-            'product_inquiry': "Hangi ürün hakkında bilgi almak istiyorsunuz?",
-            'order_status': "Sipariş numaranızı paylaşabilir misiniz?",
-            'cart_operations': "Sepet işlemlerinizde size yardımcı olabilirim.",
-            'payment_issues': "Ödeme konusunda nasıl yardımcı olabilirim?",
-            'return_refund': "İade işleminiz için size yardımcı olabilirim.",
-            'shipping_info': "Kargo bilgileri hakkında ne öğrenmek istiyorsunuz?",
-            'goodbye': "İyi günler! Tekrar görüşmek üzere.",
-            'complaint': "Sorununuzu anlıyorum. Nasıl yardımcı olabilirim?"
+        if self.cache:
+            cached = self.cache.get(text, 'traditional_ml', self.model_version)
+            if cached is not None:
+                metrics.record_event('traditional_ml', 'cache_hit')
+                return dict(cached)
+        
+        predictions = self.predict_intents([text])
+        intent = predictions['intents'][0]
+        confidence = predictions['confidences'][0]
+        processed_text = predictions['processed_texts'][0]
+        
+        result = {
+            'intent': str(intent),
+            'confidence': float(confidence),
+            'processed_text': processed_text
         }
         
-        response = responses.get(result['intent'], "Üzgünüm, anlayamadım.")
+        if self.cache:
+            self.cache.set(text, 'traditional_ml', self.model_version, result)
         
+        return result
+    
+    def generate_response(self, intent, user_message):
+        """Intent'e göre response üretme"""
+        with metrics.stage('traditional_ml', 'response_selection'):
+            answer = self.retriever.answer(user_message, intent) if self.retriever else None
+            return answer or self.intent_responses.get(intent, "Üzgünüm, anlayamadım.")
+    
+    def _classify(self, text):
+        result = self.predict_intent(text)
+        return result['intent'], result['confidence']
+    
+    def chat(self, user_message, context=None):
+        """Chatbot ana fonksiyonu (context: önceki turlar - belirsiz takip mesajları için)"""
+        with metrics.stage('traditional_ml', 'chat'):
+            intent, confidence = classify_with_context(self._classify, user_message, context)
+            return self.build_chat_response(user_message, intent, confidence)
+    
+    def build_chat_response(self, user_message, intent, confidence):
+        """Önceden hesaplanmış intent'ten chat cevabı oluştur"""
         return {
-            'intent': result['intent'],
-            'confidence': result['confidence'],
-            'response': response
+            'intent': intent,
+            'confidence': confidence,
+            'response': self.generate_response(intent, user_message)
         }
 
 def main():
@@ -162,18 +419,9 @@ def main():
     
     X, y = chatbot.prepare_data()
     
-    models = ['random_forest', 'logistic_regression', 'svm']
-    results = {}
-    
-    for model_type in models:
-        print(f"\n{'='*30}")
-        result = chatbot.train_model(X, y, model_type)
-        results[model_type] = result['accuracy']
-    
-    best_model = max(results.items(), key=lambda x: x[1])
-    print(f"\n🏆 EN İYİ MODEL: {best_model[0]} (Accuracy: {best_model[1]:.3f})")
+    print(f"\n{'='*30}")
+    chatbot.select_best_model(X, y)
     
-    chatbot.train_model(X, y, best_model[0])
     chatbot.save_model()
     
     print(f"\n💬 CHATBOT TESTİ:")
@@ -0,0 +1,475 @@
+"""
+Süreç içi vektör indeksi ve SSS (FAQ) retrieval katmanı
+Vektörler ham float32 dosyada memory-map ile tutulur; kayıtlar (metin, intent, cevap) JSONL dosyasında
+bayt ofsetleriyle saklanır ve sadece dönen sonuçlar için okunur. Küçük korpuslarda NumPy brute force,
+büyük korpuslarda IVF kullanılır: k-means listeleri eğitilir ve vektörler liste sırasıyla bitişik
+yazılır, sorguda sadece en yakın nprobe liste taranır. Yeni kayıtlar dosyaların sonuna eklenir;
+IVF eğitiminden sonra eklenenler build_ivf() tekrar çağrılana kadar brute force taranır.
+
+Dizin düzeni:
+    header.json | vectors.f32 | records.jsonl | offsets.i64 (count + 1) | centroids.npy | list_offsets.npy
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import metrics
+from models.text_normalization import normalize_text
+
+FORMAT_VERSION = 1
+ASSIGN_CHUNK_ROWS = 65536
+
+DATASET_PATH = "data/ecommerce_dataset.csv"
+FAQ_PATH = "data/faq_answers.csv"
+
+
+class HashingEmbedder:
+    def __init__(self, dim=256, ngram_range=(3, 5)):
+        """Karakter n-gram'ları işaretli hash ile sabit boyutlu, L2 normlu vektöre çevrilir (model gerektirmez)"""
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+        self.name = f"hashing-char{self.ngram_range[0]}-{self.ngram_range[1]}-{dim}"
+
+    def _embed_one(self, text):
+        padded = f" {normalize_text(text)} "
+        low, high = self.ngram_range
+        hashes = [
+            zlib.crc32(padded[i:i + n].encode('utf-8'))
+            for n in range(low, high + 1)
+            for i in range(len(padded) - n + 1)
+        ]
+        if not hashes:
+            return np.zeros(self.dim, dtype=np.float32)
+        hashes = np.array(hashes, dtype=np.uint32)
+        # Üst bit işaret olarak kullanılır; çakışan n-gram'lar birbirini kısmen götürür
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        return np.bincount(hashes % self.dim, weights=signs, minlength=self.dim).astype(np.float32)
+
+    def embed(self, texts):
+        vectors = np.stack([self._embed_one(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class _IndexState:
+    def __init__(self, vectors, count=0, ivf_count=0, centroids=None, list_offsets=None,
+                 records=None, offsets=None, records_file=None, file_lock=None):
+        """Aramanın gördüğü tutarlı görünüm; ekleme ve IVF yeniden yazımı yenisini kurup tek atamayla değiştirir.
+        Eski görünümü kullanan bir arama kendi memmap'i ve dosya tanıtıcısıyla tamamlanır."""
+        self.vectors = vectors
+        self.count = count
+        self.ivf_count = ivf_count
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.records = records
+        self.offsets = offsets
+        self.records_file = records_file
+        # Aynı tanıtıcıyı paylaşan görünümler seek/read için aynı kilidi kullanır
+        self.file_lock = file_lock or threading.Lock()
+
+    def record(self, row):
+        if self.records is not None:
+            return self.records[row]
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        with self.file_lock:
+            self.records_file.seek(start)
+            line = self.records_file.read(end - start)
+        return json.loads(line)
+
+
+class VectorIndex:
+    def __init__(self, path=None, embedder=None, nprobe=8):
+        """path=None ise indeks bellekte tutulur; path verilirse dizin oluşturulur ya da memory-map ile açılır"""
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self.path = path
+        self.nprobe = nprobe
+        # İndeksi kuranın header'da sakladığı ek bilgiler (ör. kaynak verinin özeti)
+        self.metadata = {}
+        # Yazanlar (add, build_ivf) birbirini bekler; okuyanlar kilit almadan self._state'i kullanır
+        self._lock = threading.Lock()
+        self._state = _IndexState(np.zeros((0, self.dim), dtype=np.float32), records=None if path else [])
+        # Görünümlerin açtığı records.jsonl tanıtıcıları; close() hepsini kapatır
+        self._records_files = []
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(self._file('header.json')):
+                self._load()
+            else:
+                self._write_header(0, 0)
+
+    @property
+    def count(self):
+        return self._state.count
+
+    @property
+    def ivf_count(self):
+        """IVF listelerine dağıtılmış (liste sırasıyla bitişik) satır sayısı; sonrası brute force taranır"""
+        return self._state.ivf_count
+
+    @property
+    def vectors(self):
+        return self._state.vectors
+
+    @property
+    def centroids(self):
+        return self._state.centroids
+
+    @property
+    def list_offsets(self):
+        return self._state.list_offsets
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write_header(self, count, ivf_count):
+        header = {
+            'version': FORMAT_VERSION,
+            'dim': self.dim,
+            'embedder': self.embedder.name,
+            'count': count,
+            'ivf_count': ivf_count,
+            'metadata': self.metadata
+        }
+        with open(self._file('header.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(self._file('header.json.tmp'), self._file('header.json'))
+
+    def _load(self):
+        with open(self._file('header.json'), encoding='utf-8') as f:
+            header = json.load(f)
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen indeks sürümü: {header['version']}")
+        if header['embedder'] != self.embedder.name or header['dim'] != self.dim:
+            raise ValueError(f"İndeks {header['embedder']} ile oluşturulmuş, verilen embedder: {self.embedder.name}")
+        self.metadata = header.get('metadata', {})
+
+        centroids = list_offsets = None
+        if header['ivf_count']:
+            centroids = np.load(self._file('centroids.npy'))
+            list_offsets = np.load(self._file('list_offsets.npy'))
+        self._state = self._map(header['count'], header['ivf_count'], centroids, list_offsets)
+
+    def _map(self, count, ivf_count, centroids, list_offsets, previous=None):
+        """Dosyaları memory-map ile açıp yeni görünüm kur - ekleme sonrası boyut değiştiği için her seferinde çağrılır.
+        previous: dosya sadece sonuna eklendiyse önceki görünümün tanıtıcısı (ve kilidi) aynen kullanılır."""
+        vectors = np.memmap(self._file('vectors.f32'), dtype=np.float32, mode='r', shape=(count, self.dim)) \
+            if count else np.zeros((0, self.dim), dtype=np.float32)
+        offsets = np.memmap(self._file('offsets.i64'), dtype=np.int64, mode='r', shape=(count + 1,)) \
+            if os.path.exists(self._file('offsets.i64')) else np.zeros(1, dtype=np.int64)
+        records_file, file_lock = (previous.records_file, previous.file_lock) if previous else (None, None)
+        if records_file is None and count:
+            # Yeniden yazılan dosyanın eski tanıtıcısı hemen kapatılmaz (eski görünümle süren aramalar olabilir)
+            records_file = open(self._file('records.jsonl'), 'rb')
+            self._records_files.append(records_file)
+        return _IndexState(vectors, count, ivf_count, centroids, list_offsets, offsets=offsets,
+                           records_file=records_file, file_lock=file_lock)
+
+    def close(self):
+        """Açık records.jsonl tanıtıcılarını kapat; sonrasında disk üzerindeki indekste arama yapılamaz"""
+        with self._lock:
+            for records_file in self._records_files:
+                records_file.close()
+            self._records_files.clear()
+
+    def set_metadata(self, **values):
+        """Header'daki ek bilgileri güncelle (disk üzerindeki indekste kalıcıdır)"""
+        with self._lock:
+            self.metadata = dict(self.metadata, **values)
+            if self.path:
+                state = self._state
+                self._write_header(state.count, state.ivf_count)
+
+    def reset(self):
+        """Tüm kayıtları ve IVF listelerini sil (indeks kaynağı değiştiğinde yeniden oluşturmak için)"""
+        with self._lock:
+            self.metadata = {}
+            self._state = _IndexState(np.zeros((0, self.dim), dtype=np.float32), records=None if self.path else [])
+            if self.path:
+                for name in ('vectors.f32', 'records.jsonl', 'offsets.i64', 'centroids.npy', 'list_offsets.npy'):
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+                self._write_header(0, 0)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, texts, records=None, vectors=None):
+        """Kayıtları indeksin sonuna ekle; records: her metin için sözlük (intent, answer, ...)"""
+        texts = list(texts)
+        records = [dict(record, text=text) for text, record in zip(texts, records)] if records is not None \
+            else [{'text': text} for text in texts]
+        vectors = self.embedder.embed(texts) if vectors is None else np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(texts), self.dim):
+            raise ValueError(f"Vektör boyutu {vectors.shape}, beklenen ({len(texts)}, {self.dim})")
+        if not texts:
+            return
+
+        with self._lock:
+            state = self._state
+            count = state.count + len(texts)
+            if not self.path:
+                self._state = _IndexState(
+                    np.vstack([state.vectors, vectors]), count, state.ivf_count,
+                    state.centroids, state.list_offsets, records=state.records + records
+                )
+                return
+
+            with open(self._file('vectors.f32'), 'ab') as f:
+                f.write(np.ascontiguousarray(vectors).tobytes())
+
+            encoded = [(json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8') for record in records]
+            with open(self._file('records.jsonl'), 'ab') as f:
+                start = f.tell()
+                f.write(b''.join(encoded))
+            offsets = start + np.cumsum([len(line) for line in encoded], dtype=np.int64)
+            with open(self._file('offsets.i64'), 'ab') as f:
+                if state.count == 0:
+                    f.write(np.zeros(1, dtype=np.int64).tobytes())
+                f.write(offsets.tobytes())
+
+            self._write_header(count, state.ivf_count)
+            self._state = self._map(count, state.ivf_count, state.centroids, state.list_offsets, previous=state)
+
+    def record(self, row):
+        return self._state.record(row)
+
+    def build_ivf(self, nlist=None, iterations=10, sample_size=None, seed=0):
+        """k-means (kosinüs) listeleri eğit ve vektörleri liste sırasıyla yeniden yaz (satır sırası değişir)"""
+        # Eşzamanlı ekleme olmasın diye yazma kilidi baştan alınır; aramalar eski görünümle devam eder
+        with self._lock:
+            state = self._state
+            if not state.count:
+                return
+            rng = np.random.default_rng(seed)
+            nlist = min(nlist or max(1, int(np.sqrt(state.count))), state.count)
+            sample_size = min(state.count, sample_size or nlist * 32)
+
+            sample = np.asarray(state.vectors[np.sort(rng.choice(state.count, sample_size, replace=False))])
+            centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                # Boş kalan listeler önceki merkezini korur
+                centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+
+            assignment = np.concatenate([
+                np.argmax(np.asarray(state.vectors[start:start + ASSIGN_CHUNK_ROWS]) @ centroids.T, axis=1)
+                for start in range(0, state.count, ASSIGN_CHUNK_ROWS)
+            ])
+            order = np.argsort(assignment, kind='stable')
+            list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))]).astype(np.int64)
+
+            if not self.path:
+                self._state = _IndexState(
+                    state.vectors[order], state.count, state.count, centroids, list_offsets,
+                    records=[state.records[row] for row in order]
+                )
+                return
+
+            self._rewrite(state, order)
+            np.save(self._file('centroids.npy'), centroids)
+            np.save(self._file('list_offsets.npy'), list_offsets)
+            self._write_header(state.count, state.count)
+            self._state = self._map(state.count, state.count, centroids, list_offsets)
+
+    def _rewrite(self, state, order):
+        """Vektör ve kayıt dosyalarını verilen satır sırasıyla yeniden yaz (kilit altında çağrılır).
+        Yeni dosyalar önce .tmp olarak yazılır ve os.replace ile yerine konur; açık memmap'ler eski içeriği görür."""
+        new_offsets = np.zeros(state.count + 1, dtype=np.int64)
+        with open(self._file('vectors.f32.tmp'), 'wb') as vectors_out, \
+                open(self._file('records.jsonl'), 'rb') as records_in, \
+                open(self._file('records.jsonl.tmp'), 'wb') as records_out:
+            for start in range(0, state.count, ASSIGN_CHUNK_ROWS):
+                rows = order[start:start + ASSIGN_CHUNK_ROWS]
+                vectors_out.write(np.ascontiguousarray(state.vectors[rows]).tobytes())
+                for position, row in enumerate(rows, start + 1):
+                    begin, end = int(state.offsets[row]), int(state.offsets[row + 1])
+                    records_in.seek(begin)
+                    records_out.write(records_in.read(end - begin))
+                    new_offsets[position] = new_offsets[position - 1] + end - begin
+        new_offsets.tofile(self._file('offsets.i64.tmp'))
+
+        for name in ('vectors.f32', 'records.jsonl', 'offsets.i64'):
+            os.replace(self._file(name + '.tmp'), self._file(name))
+
+    def search(self, text, k=5, nprobe=None):
+        """En benzer k kayıt: [{'score': ..., 'text': ..., 'intent': ..., ...}]"""
+        with metrics.stage('retrieval', 'embed'):
+            query = self.embedder.embed([text])[0]
+        with metrics.stage('retrieval', 'search'):
+            return self.search_vector(query, k, nprobe)
+
+    def search_vector(self, query, k=5, nprobe=None):
+        # Arama boyunca tek görünüm kullanılır: satır numaraları ve kayıtlar aynı dosya sırasına aittir
+        state = self._state
+        if not state.count:
+            return []
+        vectors = state.vectors
+        if state.centroids is None:
+            scores = vectors @ query
+            rows = None
+        else:
+            nprobe = min(nprobe or self.nprobe, len(state.centroids))
+            centroid_scores = state.centroids @ query
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < len(state.centroids) \
+                else np.arange(len(state.centroids))
+            # Her liste dosyada bitişik olduğu için taranan bölgeler ardışık dilimlerdir
+            ranges = [(state.list_offsets[probe], state.list_offsets[probe + 1]) for probe in probes]
+            ranges.append((state.ivf_count, state.count))
+            ranges = [(start, end) for start, end in ranges if end > start]
+            scores = np.concatenate([vectors[start:end] @ query for start, end in ranges]) if ranges else np.zeros(0)
+            rows = np.concatenate([np.arange(start, end) for start, end in ranges]) if ranges else np.zeros(0, int)
+
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            dict(state.record(int(rows[i]) if rows is not None else int(i)), score=float(scores[i]))
+            for i in top
+        ]
+
+
+class FaqRetriever:
+    def __init__(self, index, k=5, min_score=0.4, override_score=0.75):
+        """En benzer SSS kaydının cevabını döndürür; intent'i farklı kayıtlar sadece override_score üstünde kabul edilir"""
+        self.index = index
+        self.k = k
+        self.min_score = min_score
+        self.override_score = override_score
+
+    def search(self, text, k=None):
+        return self.index.search(text, k or self.k)
+
+    def answer(self, text, intent=None):
+        """Eşiği geçen ilk cevaplı kayıt; yüzeysel benzerlik ("ne zaman", "var mı") yanlış konuya götürmesin
+        diye sınıflandırıcının intent'iyle çelişen kayıtlar atlanır"""
+        for hit in self.search(text):
+            if hit['score'] < self.min_score:
+                break
+            if not hit.get('answer'):
+                continue
+            if intent is None or hit.get('intent') == intent or hit['score'] >= self.override_score:
+                return hit['answer']
+        return None
+
+    def snippets(self, text, limit=3):
+        """Prompt'a eklenecek soru-cevap çiftleri (LLM cevabını bilgi bankasına dayandırmak için)"""
+        return [
+            (hit['text'], hit['answer']) for hit in self.search(text)
+            if hit.get('answer') and hit['score'] >= self.min_score
+        ][:limit]
+
+
+def source_fingerprint(*paths):
+    """Kaynak dosyaların (veri seti, SSS) içerik özeti; olmayan dosyalar atlanır"""
+    digest = hashlib.sha1()
+    for path in paths:
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        digest.update(b'\x1e')
+    return digest.hexdigest()[:12]
+
+
+def build_default_index(path=None, dataset_path=DATASET_PATH, faq_path=FAQ_PATH, embedder=None):
+    """Veri seti örnekleri + SSS cevaplarından indeks; path'teki indeks aynı kaynaktan kurulduysa yeniden oluşturulmaz"""
+    import pandas as pd
+
+    fingerprint = source_fingerprint(dataset_path, faq_path)
+    index = VectorIndex(path, embedder=embedder)
+    if len(index):
+        if index.metadata.get('source') == fingerprint:
+            return index
+        print("♻️ Veri seti ya da SSS dosyası değişmiş, retrieval indeksi yeniden oluşturuluyor")
+        index.reset()
+
+    data = pd.read_csv(dataset_path)
+    index.add(data['text'].astype(str), [{'intent': intent, 'source': 'dataset'} for intent in data['intent']])
+    if faq_path and os.path.exists(faq_path):
+        faq = pd.read_csv(faq_path)
+        index.add(faq['question'].astype(str), [
+            {'intent': intent, 'answer': answer, 'source': 'faq'}
+            for intent, answer in zip(faq['intent'], faq['answer'])
+        ])
+    index.set_metadata(source=fingerprint)
+    return index
+
+
+def benchmark(size=1_000_000, dim=256, queries=200, nlist=None, nprobe=8, path=None, seed=0):
+    """Sentetik kümelenmiş vektörlerle arama gecikmesi (p50/p99) ve flat aramaya göre recall@5"""
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(path, embedder=HashingEmbedder(dim=dim), nprobe=nprobe)
+    centers = rng.standard_normal((1024, dim)).astype(np.float32)
+    for start in range(0, size, ASSIGN_CHUNK_ROWS):
+        count = min(ASSIGN_CHUNK_ROWS, size - start)
+        vectors = centers[rng.integers(0, len(centers), count)] + rng.standard_normal((count, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index.add([f"#{start + i}" for i in range(count)], vectors=vectors)
+
+    query_vectors = index.vectors[rng.choice(size, queries, replace=False)] + 0.1 * rng.standard_normal((queries, dim))
+    query_vectors = (query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    def timed(run):
+        latencies, results = [], []
+        for query in query_vectors:
+            start = time.perf_counter()
+            results.append({hit['text'] for hit in run(query)})
+            latencies.append((time.perf_counter() - start) * 1000)
+        return np.percentile(latencies, [50, 99]), results
+
+    (flat_p50, flat_p99), exact = timed(lambda query: index.search_vector(query, 5))
+    build_start = time.perf_counter()
+    index.build_ivf(nlist=nlist)
+    build_s = time.perf_counter() - build_start
+    (ivf_p50, ivf_p99), approximate = timed(lambda query: index.search_vector(query, 5))
+    recall = np.mean([len(a & e) / len(e) for a, e in zip(approximate, exact)])
+    return {
+        'size': size, 'dim': dim, 'nlist': len(index.centroids), 'nprobe': nprobe,
+        'flat_p50_ms': flat_p50, 'flat_p99_ms': flat_p99,
+        'ivf_p50_ms': ivf_p50, 'ivf_p99_ms': ivf_p99,
+        'ivf_build_s': build_s, 'recall_at_5': recall
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval indeksi")
+    parser.add_argument('--index', default=None, help="Kalıcı indeks dizini (yoksa bellekte)")
+    parser.add_argument('--ivf', action='store_true', help="Oluşturduktan sonra IVF listelerini eğit")
+    parser.add_argument('--benchmark', type=int, default=0, help="Sentetik N kayıtla gecikme ölçümü")
+    parser.add_argument('query', nargs='*', help="Aranacak mesajlar")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for key, value in benchmark(args.benchmark, path=args.index).items():
+            print(f"{key:<14} {value:.3f}" if isinstance(value, float) else f"{key:<14} {value}")
+        return
+
+    index = build_default_index(args.index)
+    if args.ivf:
+        index.build_ivf()
+    print(f"📚 {len(index)} kayıt indekslendi")
+    for query in args.query or ["Kargo ücreti ne kadar", "iade kaç gün içinde yapılır", "taksit var mı"]:
+        print(f"\n🔎 {query}")
+        for hit in index.search(query, k=3):
+            print(f"   {hit['score']:.2f} [{hit['intent']}] {hit['text']}" + (f" -> {hit['answer']}" if hit.get('answer') else ""))
+
+
+if __name__ == "__main__":
+    main()
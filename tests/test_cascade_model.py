@@ -0,0 +1,89 @@
+import os
+import warnings
+
+import pytest
+
+from models import registry
+from models.cascade_model import CascadeChatbot
+from models.traditional_ml_model import TraditionalMLChatbot
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ecommerce_dataset.csv')
+
+
+class StubTier:
+    model_version = 'stub-1'
+
+    def classify_intents(self, texts):
+        return [('greeting', 0.5) for _ in texts]
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    traditional = TraditionalMLChatbot()
+    X, y = traditional.prepare_data(DATA_PATH)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        traditional.train_model(X, y, model_type='logistic_regression')
+    monkeypatch.setitem(registry._instances, registry.registry_key('Traditional ML'), traditional)
+    monkeypatch.setitem(registry._instances, registry.registry_key('Hugging Face'), StubTier())
+    return traditional
+
+
+@pytest.fixture
+def fit_calls(monkeypatch):
+    calls = []
+    original_fit = CascadeChatbot.fit_thresholds
+
+    def tracking_fit(self, *args, **kwargs):
+        calls.append(self.model_version)
+        return original_fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(CascadeChatbot, 'fit_thresholds', tracking_fit)
+    return calls
+
+
+def _load(path, target_precision=0.9):
+    return registry._load_cascade(use_huggingface=True, use_gemini=False, data_path=DATA_PATH,
+                                  thresholds_path=path, target_precision=target_precision)
+
+
+def test_learned_thresholds_are_saved_and_reused(tiers, fit_calls, tmp_path):
+    path = str(tmp_path / 'cascade_thresholds.json')
+    first = _load(path)
+    second = _load(path)
+
+    assert len(fit_calls) == 1
+    assert first.thresholds['Traditional ML']
+    assert second.thresholds == first.thresholds
+
+
+def test_thresholds_are_relearned_when_models_or_target_change(tiers, fit_calls, tmp_path):
+    path = str(tmp_path / 'cascade_thresholds.json')
+    _load(path)
+
+    tiers.model_version = 'logistic_regression-yeni'
+    _load(path)
+    _load(path, target_precision=0.8)
+    _load(path, target_precision=0.8)
+
+    assert len(fit_calls) == 3
+    assert 'Traditional ML=logistic_regression-yeni' in fit_calls[1]
+
+
+def test_legacy_thresholds_file_is_loaded(tiers, fit_calls, tmp_path):
+    path = tmp_path / 'cascade_thresholds.json'
+    path.write_text('{"Traditional ML": {"greeting": 0.42}}', encoding='utf-8')
+
+    assert _load(str(path)).thresholds == {'Traditional ML': {'greeting': 0.42}}
+    assert fit_calls == []
+
+
+@pytest.mark.parametrize('available, expected_tiers', [
+    (False, ['Traditional ML']),
+    (True, ['Traditional ML', 'Hugging Face'])
+])
+def test_huggingface_tier_follows_module_availability(tiers, tmp_path, monkeypatch, available, expected_tiers):
+    monkeypatch.setattr(registry, 'huggingface_available', lambda: available)
+    cascade = registry._load_cascade(use_gemini=False, data_path=DATA_PATH,
+                                     thresholds_path=str(tmp_path / 'cascade_thresholds.json'))
+    assert [name for name, _ in cascade.tiers] == expected_tiers
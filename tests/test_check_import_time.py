@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from tools import check_import_time
+from tools.check_import_time import BUDGETS, ImportFailure, find_forbidden, measure
+
+# Yavaş CI makinelerinde bütçeler tools/check_import_time.py --scale ile aynı şekilde gevşetilir
+BUDGET_SCALE = float(os.getenv('CHATBOT_IMPORT_BUDGET_SCALE', '1.0'))
+
+
+@pytest.mark.parametrize('module', sorted(BUDGETS))
+def test_module_import_stays_within_budget(module):
+    budget_ms, forbidden = BUDGETS[module]
+    try:
+        elapsed_ms, loaded = measure(module)
+    except ImportFailure as e:
+        if e.optional_missing:
+            pytest.skip(f"opsiyonel bağımlılık kurulu değil: {e}")
+        raise
+
+    assert find_forbidden(loaded, forbidden) == []
+    assert elapsed_ms <= budget_ms * BUDGET_SCALE
+
+
+@pytest.mark.parametrize('message, skipped', [
+    ("ModuleNotFoundError: No module named 'torch'", True),
+    ("ModuleNotFoundError: No module named 'transformers.pipelines'", True),
+    ("ModuleNotFoundError: No module named 'google'", True),
+    ("ModuleNotFoundError: No module named 'pandas'", False),
+    ("ModuleNotFoundError: No module named 'models.missing_helper'", False),
+    ("NameError: name 'np' is not defined", False),
+    ("SyntaxError: invalid syntax", False),
+])
+def test_only_missing_optional_dependencies_are_skipped(message, skipped):
+    assert ImportFailure('models.example', message).optional_missing is skipped
+
+
+def test_broken_module_fails_with_its_error(tmp_path, monkeypatch):
+    (tmp_path / 'broken_module.py').write_text("import json\nundefined_name\n")
+    monkeypatch.setattr(check_import_time, 'PROJECT_ROOT', str(tmp_path))
+
+    with pytest.raises(ImportFailure) as info:
+        measure('broken_module')
+
+    assert info.value.module == 'broken_module'
+    assert str(info.value).startswith('NameError')
+    assert not info.value.optional_missing
+
+
+def test_main_reports_broken_module_as_failure(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'broken_module.py').write_text("def f(:\n")
+    monkeypatch.setattr(check_import_time, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(check_import_time, 'BUDGETS', {'broken_module': (100, ())})
+    monkeypatch.setattr('sys.argv', ['check_import_time.py'])
+
+    assert check_import_time.main() == 1
+    assert 'import edilemedi' in capsys.readouterr().out
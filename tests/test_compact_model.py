@@ -0,0 +1,48 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from models.compact_model import CompactIntentModel
+from models.traditional_ml_model import TraditionalMLChatbot
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ecommerce_dataset.csv')
+
+EXTRA_TEXTS = [
+    "merhaba siparişim nerede",
+    "kargom hâlâ gelmedi, İADE etmek istiyorum",
+    "tamamen bilinmeyen kelimeler qwxz",
+    ""
+]
+
+
+@pytest.fixture(scope='module')
+def data():
+    return TraditionalMLChatbot().prepare_data(DATA_PATH)
+
+
+@pytest.mark.parametrize('model_type', ['random_forest', 'logistic_regression'])
+def test_compact_model_matches_sklearn(data, tmp_path, model_type):
+    X, y = data
+    trained = TraditionalMLChatbot()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        trained.train_model(X, y, model_type=model_type)
+
+    path = str(tmp_path / f'{model_type}.cmpt')
+    trained.export_compact_model(path)
+    compact = TraditionalMLChatbot()
+    compact.load_compact_model(path)
+    assert isinstance(compact.compact_model.arrays['vocab_blob'], np.memmap)
+
+    texts = list(X.sample(50, random_state=0)) + EXTRA_TEXTS
+    expected = trained.predict_intents(texts)
+    actual = compact.predict_intents(texts)
+
+    processed = [TraditionalMLChatbot.preprocess_text(text) for text in texts]
+    np.testing.assert_allclose(
+        compact.compact_model.predict_proba(processed), trained.pipeline.predict_proba(processed), atol=1e-6
+    )
+    assert list(actual['intents']) == list(expected['intents'])
+    np.testing.assert_allclose(actual['confidences'], expected['confidences'], atol=1e-6)
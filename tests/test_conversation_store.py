@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from models.conversation_store import ConversationStore, RedisConversationBackend, SQLiteConversationBackend
+
+
+class FakeRedis:
+    """RedisConversationBackend'in kullandığı komutların bellek içi karşılığı (TTL süresi takip edilmez)"""
+
+    def __init__(self):
+        self.lists = {}
+        self.expirations = {}
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+        return len(self.lists[key])
+
+    def ltrim(self, key, start, end):
+        items = self.lists.get(key, [])
+        end = len(items) if end == -1 else end + 1
+        self.lists[key] = items[start:end]
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        end = len(items) if end == -1 else end + 1
+        return items[start:end]
+
+    def expire(self, key, seconds):
+        self.expirations[key] = seconds
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+        self.expirations.pop(key, None)
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend_factory(request, tmp_path):
+    """Aynı kalıcı katmanı paylaşan iki backend örneği (iki worker) üretir"""
+    if request.param == 'sqlite':
+        path = str(tmp_path / 'conversations.db')
+        return lambda max_turns=50: SQLiteConversationBackend(path, max_turns=max_turns)
+    client = FakeRedis()
+    return lambda max_turns=50: RedisConversationBackend(client=client, max_turns=max_turns)
+
+
+def test_window_is_bounded():
+    store = ConversationStore(max_turns=3, context_turns=2)
+    for i in range(5):
+        store.append('s1', 'user', f'mesaj {i}')
+
+    assert [m['content'] for m in store.history('s1')] == ['mesaj 2', 'mesaj 3', 'mesaj 4']
+    assert [m['content'] for m in store.context('s1')] == ['mesaj 3', 'mesaj 4']
+
+
+def test_backend_window_is_bounded(backend_factory):
+    store = ConversationStore(max_turns=3, backend=backend_factory(max_turns=3))
+    for i in range(5):
+        store.append('s1', 'user', f'mesaj {i}')
+
+    assert [m['content'] for m in store.backend.load('s1')] == ['mesaj 2', 'mesaj 3', 'mesaj 4']
+
+
+def test_lru_eviction():
+    store = ConversationStore(max_sessions=2, idle_ttl=0)
+    store.append('a', 'user', 'merhaba')
+    store.append('b', 'user', 'merhaba')
+    store.history('a')
+    store.append('c', 'user', 'merhaba')
+
+    assert set(store._sessions) == {'a', 'c'}
+    assert store.evictions == 1
+    assert store.history('b') == []
+
+
+def test_idle_ttl_eviction():
+    store = ConversationStore(idle_ttl=10)
+    store.append('old', 'user', 'merhaba')
+    store._sessions['old'][0] = time.time() - 60
+
+    store.evict_idle()
+
+    assert 'old' not in store._sessions
+    assert store.evictions == 1
+
+
+def test_evicted_session_reloads_from_backend(backend_factory):
+    store = ConversationStore(max_sessions=1, backend=backend_factory())
+    store.append('a', 'user', 'siparişim nerede')
+    store.append('b', 'user', 'merhaba')
+
+    assert 'a' not in store._sessions
+    assert [m['content'] for m in store.history('a')] == ['siparişim nerede']
+
+
+def test_cross_instance_visibility(backend_factory):
+    worker_1 = ConversationStore(backend=backend_factory())
+    worker_2 = ConversationStore(backend=backend_factory())
+
+    worker_1.append('s1', 'user', 'siparişim nerede')
+    assert [m['content'] for m in worker_2.history('s1')] == ['siparişim nerede']
+
+    # worker_2 oturumu önbelleğe aldıktan sonra gelen yazılar da görünür
+    worker_1.append('s1', 'bot', 'kargoda')
+    worker_2.append('s1', 'user', 'ne zaman gelecek')
+    assert [m['content'] for m in worker_1.history('s1')] == ['siparişim nerede', 'kargoda', 'ne zaman gelecek']
+    assert [m['content'] for m in worker_2.context('s1')] == ['siparişim nerede', 'kargoda', 'ne zaman gelecek']
+
+    worker_2.clear('s1')
+    assert worker_1.history('s1') == []
+
+
+def test_cache_ttl_serves_recent_reads_from_memory(backend_factory):
+    worker_1 = ConversationStore(backend=backend_factory())
+    worker_2 = ConversationStore(backend=backend_factory(), cache_ttl=60)
+
+    worker_2.history('s1')
+    worker_1.append('s1', 'user', 'merhaba')
+    assert worker_2.history('s1') == []
+
+    worker_2._sessions['s1'][2] -= 120
+    assert [m['content'] for m in worker_2.history('s1')] == ['merhaba']
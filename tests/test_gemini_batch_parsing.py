@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip('google.generativeai')
+
+from models.gemini_model import GeminiChatbot
+
+
+@pytest.fixture
+def chatbot():
+    return GeminiChatbot(api_key='fake', api_endpoint='http://127.0.0.1:9')
+
+
+def test_item_with_bad_id_is_skipped(chatbot):
+    response = '''```json
+[{"id": 1, "kategori": "greeting", "guven": 0.9},
+ {"id": "iki", "kategori": "order_status", "guven": 0.8},
+ {"id": 3, "kategori": "shipping_info", "guven": 0.7}]
+```'''
+    assert chatbot._parse_gemini_batch_response(response, 3) == [
+        ('greeting', 0.9), None, ('shipping_info', 0.7)
+    ]
+
+
+def test_numbered_list_is_parsed(chatbot):
+    response = "1. Kategori: complaint | Güven: 0.8\n2. Kategori: goodbye | Güven: 0.95"
+    assert chatbot._parse_gemini_batch_response(response, 2) == [('complaint', 0.8), ('goodbye', 0.95)]
+
+
+def test_batch_api_error_does_not_fan_out_to_single_calls():
+    from tools.fake_gemini_server import start_fake_server
+
+    server, url = start_fake_server(error_rate=1.0)
+    try:
+        chatbot = GeminiChatbot(api_key='fake', api_endpoint=url, max_retries=0, requests_per_minute=100_000)
+        texts = ["Merhaba", "Siparişim nerede", "Kargo ne zaman gelir"]
+
+        assert chatbot.classify_intents(texts) == [('greeting', 0.5)] * len(texts)
+        assert server.state.request_count == 1
+
+        with pytest.raises(Exception):
+            chatbot.classify_intents(texts, raise_errors=True)
+        assert server.state.request_count == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unparseable_batch_items_are_asked_one_by_one():
+    from tools.fake_gemini_server import start_fake_server
+
+    server, url = start_fake_server()
+    try:
+        chatbot = GeminiChatbot(api_key='fake', api_endpoint=url, requests_per_minute=100_000)
+        chatbot._parse_gemini_batch_response = lambda text, count: [('greeting', 0.9)] + [None] * (count - 1)
+
+        results = chatbot.classify_intents(["Merhaba", "Siparişim nerede", "Kargo ne zaman gelir"])
+
+        assert results[0] == ('greeting', 0.9)
+        assert server.state.request_count == 3
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,65 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip('google.generativeai')
+
+from models import metrics
+from models.gemini_model import GeminiChatbot
+from tools.fake_gemini_server import start_fake_server
+
+TEXTS = [
+    "Merhaba", "Siparişim nerede", "Kargo ne zaman gelir", "Ürünü iade etmek istiyorum",
+    "Kartımdan para çekildi", "Sepete ürün ekle", "Bu ürün stokta var mı", "Görüşürüz",
+    "Ürün hasarlı geldi", "Taksit var mı", "Teslimat kaç gün sürer", "Siparişimi iptal et"
+]
+
+
+@pytest.fixture
+def fake_server():
+    server, url = start_fake_server(latency=0.02, error_rate=0.3)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def recorded_metrics():
+    metrics.reset()
+    metrics.enable(otel=False)
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def test_concurrent_classification_retries_with_bounded_concurrency(fake_server, recorded_metrics, monkeypatch):
+    server, url = fake_server
+    random.seed(0)
+    chatbot = GeminiChatbot(api_key='fake', api_endpoint=url, max_concurrency=3,
+                            requests_per_minute=100_000, max_retries=10)
+
+    backoffs = []
+
+    def fast_backoff(attempt, base=0.5, cap=30.0):
+        backoffs.append(attempt)
+        return 0.001
+
+    monkeypatch.setattr(chatbot, '_backoff_delay', fast_backoff)
+
+    results = asyncio.run(chatbot.aclassify_many(TEXTS))
+
+    events = {item['event']: item['count'] for item in metrics.snapshot()['events'] if item['backend'] == 'gemini'}
+    retries = events.get('retry', 0)
+    expected = [server.state.model.classify(text)[0] for text in TEXTS]
+
+    # 429 alan her istek backoff'tan sonra tekrar denenir, hiçbiri greeting'e düşmez
+    assert retries > 0
+    assert len(backoffs) == retries
+    assert server.state.request_count == len(TEXTS) + retries
+    assert 'fallback_greeting' not in events
+    assert 'api_error' not in events
+    assert [intent for intent, _ in results] == expected
+
+    # Sunucu aynı anda hiçbir zaman max_concurrency'den fazla istek görmez
+    assert 1 < server.state.max_in_flight <= chatbot.max_concurrency
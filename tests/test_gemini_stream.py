@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('google.generativeai')
+
+from models.gemini_model import GeminiChatbot
+
+
+@pytest.fixture
+def chatbot():
+    # Kurulum sırasında istek atılmaz; akış metotları testlerde değiştirilir
+    return GeminiChatbot(api_key='fake', api_endpoint='http://127.0.0.1:9', max_concurrency=1)
+
+
+def test_mid_stream_error_is_reported_in_final_event(chatbot, monkeypatch):
+    def broken_stream(prompt, **kwargs):
+        yield "Kategori: order_status | Güven: 0.9\nSiparişiniz "
+        raise ConnectionError("bağlantı koptu")
+
+    monkeypatch.setattr(chatbot, '_stream_with_retry', broken_stream)
+
+    events = list(chatbot.chat_stream("Siparişim nerede"))
+
+    assert events[0] == {'intent': 'order_status', 'confidence': 0.9}
+    assert events[-1]['response'] == "Siparişiniz"
+    assert events[-1]['error'] == "bağlantı koptu"
+
+
+def test_complete_stream_has_no_error(chatbot, monkeypatch):
+    monkeypatch.setattr(chatbot, '_stream_with_retry',
+                        lambda prompt, **kwargs: iter(["Kategori: greeting | Güven: 0.95\nMerhaba!"]))
+
+    final = list(chatbot.chat_stream("Merhaba"))[-1]
+
+    assert final == {'intent': 'greeting', 'response': "Merhaba!", 'confidence': 0.95}
+
+
+def test_disconnected_stream_holds_semaphore_until_producer_finishes(chatbot, monkeypatch):
+    finished = threading.Event()
+
+    def slow_stream(user_message, context=None):
+        try:
+            yield {'intent': 'greeting', 'confidence': 0.9}
+            for _ in range(3):
+                time.sleep(0.05)
+                yield "parça "
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(chatbot, 'chat_stream', slow_stream)
+
+    async def disconnect_after_first_event():
+        stream = chatbot.astream_chat("Merhaba")
+        assert await stream.__anext__() == {'intent': 'greeting', 'confidence': 0.9}
+        await stream.aclose()
+        # Semafor serbest kaldığında üretici thread de Gemini akışını kapatmış olmalı
+        async with chatbot._get_semaphore():
+            return finished.is_set()
+
+    assert asyncio.run(disconnect_after_first_event())
+
+
+def _parse(chunks, max_header_chars=120):
+    from models.gemini_model import _StreamParser
+
+    parser = _StreamParser(max_header_chars=max_header_chars)
+    events = [event for chunk in chunks for event in parser.feed(chunk)] + parser.close()
+    return events[0], ''.join(events[1:])
+
+
+def test_header_without_newline_is_split_after_confidence():
+    answer = "Siparişinizi takip edebilmem için sipariş numaranızı paylaşır mısınız? " * 3
+    header, text = _parse(["Kategori: order_status | GÜVEN: 0.85 ", answer[:40], answer[40:]])
+
+    assert header == {'intent': 'order_status', 'confidence': 0.85}
+    assert text == answer
+
+
+def test_short_single_line_stream_is_split_on_close():
+    header, text = _parse(["Kategori: goodbye Güven: 0.9 İyi günler!"])
+
+    assert header == {'intent': 'goodbye', 'confidence': 0.9}
+    assert text == "İyi günler!"
+
+
+def test_header_line_is_split_at_newline():
+    header, text = _parse(["Kategori: shipping_info | Güven: 0.7\n", "Kargolar 1-3 iş günü içinde teslim edilir."])
+
+    assert header == {'intent': 'shipping_info', 'confidence': 0.7}
+    assert text == "Kargolar 1-3 iş günü içinde teslim edilir."
+
+
+def test_unformatted_stream_is_passed_through():
+    header, text = _parse(["Merhaba, size nasıl yardımcı olabilirim?"])
+
+    assert header == {'intent': 'greeting', 'confidence': 0.3}
+    assert text == "Merhaba, size nasıl yardımcı olabilirim?"
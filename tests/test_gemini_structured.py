@@ -0,0 +1,79 @@
+import inspect
+
+import pytest
+
+genai = pytest.importorskip('google.generativeai')
+
+from models.evaluation_engine import UNKNOWN_INTENT
+from models.gemini_model import GeminiChatbot
+from tools.fake_gemini_server import start_fake_server
+
+# Structured mod system_instruction kullanır (google-generativeai >= 0.5)
+requires_structured_output = pytest.mark.skipif(
+    'system_instruction' not in inspect.signature(genai.GenerativeModel).parameters,
+    reason="google-generativeai system_instruction desteklemiyor"
+)
+
+
+@pytest.fixture
+def fake_server():
+    server, url = start_fake_server()
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def _chatbot(url, structured_output):
+    return GeminiChatbot(api_key='fake', api_endpoint=url, structured_output=structured_output,
+                         max_retries=0, requests_per_minute=100_000)
+
+
+@requires_structured_output
+def test_schema_shaped_response_is_parsed(fake_server):
+    server, url = fake_server
+    text = "Siparişim nerede"
+
+    assert _chatbot(url, True).classify_intent(text) == server.state.model.classify(text)
+
+
+@requires_structured_output
+@pytest.mark.parametrize('response_text', ['{"intent": "order_status"', '{"intent": "hava_durumu", "confidence": 0.9}'])
+def test_malformed_structured_response_is_unknown(fake_server, response_text):
+    server, url = fake_server
+    server.state.response_text = response_text
+    chatbot = _chatbot(url, True)
+
+    assert chatbot.classify_intent("Siparişim nerede") == (UNKNOWN_INTENT, 0.0)
+    result = chatbot.chat("Siparişim nerede")
+    assert (result['intent'], result['confidence']) == (UNKNOWN_INTENT, 0.0)
+    assert result['response']
+
+
+@pytest.mark.parametrize('structured_output', [
+    pytest.param(True, marks=requires_structured_output), False
+])
+def test_blocked_response_is_unknown(fake_server, structured_output):
+    server, url = fake_server
+    server.state.blocked = True
+    chatbot = _chatbot(url, structured_output)
+
+    assert chatbot.classify_intent("Siparişim nerede") == (UNKNOWN_INTENT, 0.0)
+    result = chatbot.chat("Siparişim nerede")
+    assert (result['intent'], result['confidence']) == (UNKNOWN_INTENT, 0.0)
+    assert result['response']
+    # API isteği başarılı olduğu için tekrar denenmez
+    assert server.state.request_count == 2
+
+
+@requires_structured_output
+def test_unknown_result_is_not_cached(fake_server):
+    from models.prediction_cache import PredictionCache
+
+    server, url = fake_server
+    server.state.blocked = True
+    chatbot = GeminiChatbot(api_key='fake', api_endpoint=url, structured_output=True, cache=PredictionCache(),
+                            max_retries=0, requests_per_minute=100_000)
+    assert chatbot.classify_intent("Siparişim nerede") == (UNKNOWN_INTENT, 0.0)
+
+    server.state.blocked = False
+    assert chatbot.classify_intent("Siparişim nerede") == server.state.model.classify("Siparişim nerede")
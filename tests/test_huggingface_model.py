@@ -0,0 +1,34 @@
+import pandas as pd
+
+from models.evaluation_engine import EvaluationEngine
+from models.huggingface_model import HuggingFaceChatbot
+from models.results_store import ResultsStore
+
+
+def _broken_chatbot():
+    """Model yüklemeden, NLI adımı her çağrıda hata veren bir HuggingFaceChatbot"""
+    chatbot = HuggingFaceChatbot.__new__(HuggingFaceChatbot)
+    chatbot.cache = None
+    chatbot.use_embeddings = False
+    chatbot.model_version = 'test-model'
+
+    def fail(texts, batch_size):
+        raise RuntimeError("CUDA out of memory")
+
+    chatbot._classify_with_nli = fail
+    return chatbot
+
+
+def test_errors_fall_back_to_greeting_by_default():
+    assert _broken_chatbot().classify_intents(['siparişim nerede']) == [('greeting', 0.5)]
+
+
+def test_evaluation_does_not_store_fallback_predictions(tmp_path):
+    store = ResultsStore(str(tmp_path / 'results.db'))
+    test_data = pd.DataFrame({'text': ['siparişim nerede', 'merhaba'], 'intent': ['order_status', 'greeting']})
+
+    result = EvaluationEngine({'Hugging Face': _broken_chatbot()}, store=store).evaluate(test_data)['Hugging Face']
+
+    assert result['completed'] == 0
+    assert 'CUDA out of memory' in result['error']
+    assert store.runs() == []
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+
+from fastapi.testclient import TestClient
+
+from app import inference_server
+
+
+@pytest.fixture
+def client():
+    return TestClient(inference_server.app)
+
+
+@pytest.mark.parametrize('texts', [
+    [],
+    ['merhaba', ''],
+    ['merhaba'] * (inference_server.MAX_BATCH_SIZE + 1),
+])
+def test_batch_classify_rejects_invalid_batches(client, texts):
+    response = client.post('/classify/batch', json={'texts': texts})
+    assert response.status_code == 422
+
+
+def test_model_versions_are_exposed(client, monkeypatch):
+    from models import registry
+
+    class StubChatbot:
+        model_version = 'logistic_regression-abc123'
+
+    monkeypatch.setitem(registry._instances, registry.registry_key('Traditional ML'), StubChatbot())
+
+    assert client.get('/health').json()['model_versions']['Traditional ML'] == 'logistic_regression-abc123'
+    assert client.get('/models/Traditional ML').json()['model_version'] == 'logistic_regression-abc123'
+    assert client.get('/models/Yok').status_code == 404
+
+
+class StubChatbot:
+    model_version = 'stub'
+
+    def chat(self, user_message, context=None):
+        return {'intent': 'order_status', 'response': "Sipariş numaranız nedir?", 'confidence': 0.9}
+
+
+@pytest.mark.parametrize('path', ['/chat', '/chat/stream'])
+def test_conversation_store_io_runs_off_the_event_loop(client, monkeypatch, path):
+    import asyncio
+
+    from models import registry
+
+    monkeypatch.setitem(registry._instances, registry.registry_key('Gemini'), StubChatbot())
+    calls = []
+
+    def off_loop(method):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                calls.append((method.__name__, 'event loop'))
+            except RuntimeError:
+                calls.append((method.__name__, 'thread'))
+            return method(*args, **kwargs)
+        return wrapper
+
+    store = inference_server.conversation_store
+    monkeypatch.setattr(store, 'context', off_loop(store.context))
+    monkeypatch.setattr(store, 'append', off_loop(store.append))
+
+    response = client.post(path, json={'message': "Siparişim nerede", 'model': 'Gemini', 'session_id': path})
+
+    assert response.status_code == 200
+    assert [name for name, _ in calls] == ['context', 'append', 'append']
+    assert {where for _, where in calls} == {'thread'}
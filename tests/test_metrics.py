@@ -0,0 +1,52 @@
+import pytest
+
+from models import metrics
+
+
+@pytest.fixture
+def recorded_metrics():
+    metrics.reset()
+    metrics.enable(otel=False)
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def _events():
+    return {(item['backend'], item['event']): item['count'] for item in metrics.snapshot()['events']}
+
+
+def test_events_are_not_recorded_when_disabled():
+    metrics.reset()
+    metrics.disable()
+    metrics.record_event('gemini', 'cache_hit')
+    assert metrics.snapshot()['events'] == []
+
+
+def test_gemini_events_are_labelled(recorded_metrics):
+    pytest.importorskip('google.generativeai')
+    from models.gemini_model import GeminiChatbot
+    from models.prediction_cache import PredictionCache
+    from tools.fake_gemini_server import start_fake_server
+
+    server, url = start_fake_server()
+    try:
+        chatbot = GeminiChatbot(api_key='fake', api_endpoint=url, cache=PredictionCache(),
+                                max_retries=0, requests_per_minute=100_000)
+        chatbot.classify_intent("Siparişim nerede")
+        chatbot.classify_intent("Siparişim nerede")
+
+        server.state.error_rate = 1.0
+        assert chatbot.classify_intent("Kargo ne zaman gelir") == ("greeting", 0.5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    events = _events()
+    assert events[('gemini', 'cache_hit')] == 1
+    assert events[('gemini', 'api_error')] == 1
+    assert events[('gemini', 'fallback_greeting')] == 1
+
+    exported = metrics.export_prometheus()
+    for event in ('cache_hit', 'api_error', 'fallback_greeting'):
+        assert f'chatbot_events_total{{backend="gemini",event="{event}"}} 1' in exported
@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from models.micro_batcher import MicroBatcher, _STOP
+
+
+class RecordingBackend:
+    """Her çağrıdaki batch'i kaydeden, istenirse ilk çağrıda bekleyen sahte batch_fn"""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def __call__(self, texts):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+
+def test_concurrent_submits_are_merged_into_one_call():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=32, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(f"mesaj {i}") for i in range(10)]
+        assert [future.result(5) for future in futures] == [f"MESAJ {i}" for i in range(10)]
+    finally:
+        batcher.close()
+
+    assert backend.calls == [[f"mesaj {i}" for i in range(10)]]
+
+
+def test_batches_are_capped_by_max_batch_size():
+    gate = threading.Event()
+    backend = RecordingBackend(gate)
+    batcher = MicroBatcher(backend, max_batch_size=4, max_wait_ms=1000)
+    try:
+        futures = [batcher.submit(f"{i}") for i in range(10)]
+        gate.set()
+        for future in futures:
+            future.result(5)
+    finally:
+        batcher.close()
+
+    assert [len(call) for call in backend.calls] == [4, 4, 2]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=32, max_wait_ms=20)
+    try:
+        start = time.monotonic()
+        assert batcher("merhaba", timeout=5) == "MERHABA"
+        assert time.monotonic() - start < 1.0
+    finally:
+        batcher.close()
+
+    assert backend.calls == [["merhaba"]]
+
+
+def test_backend_error_reaches_every_waiting_future():
+    def failing(texts):
+        raise RuntimeError("model çöktü")
+
+    batcher = MicroBatcher(failing, max_batch_size=8, max_wait_ms=100)
+    try:
+        futures = [batcher.submit(f"{i}") for i in range(5)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model çöktü"):
+                future.result(5)
+    finally:
+        batcher.close()
+
+    assert batcher.stats()['errors'] == 1
+
+
+def test_wrong_result_count_fails_the_batch():
+    batcher = MicroBatcher(lambda texts: texts[:-1], max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(f"{i}") for i in range(3)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(5)
+    finally:
+        batcher.close()
+
+
+def test_close_drains_queued_requests_and_rejects_new_ones():
+    gate = threading.Event()
+    backend = RecordingBackend(gate)
+    batcher = MicroBatcher(backend, max_batch_size=2, max_wait_ms=1)
+    futures = [batcher.submit(f"{i}") for i in range(5)]
+
+    closer = threading.Thread(target=batcher.close)
+    closer.start()
+    gate.set()
+    closer.join(5)
+
+    assert [future.result(0) for future in futures] == [f"{i}" for i in range(5)]
+    with pytest.raises(RuntimeError):
+        batcher.submit("geç")
+
+
+def test_requests_queued_behind_stop_are_rejected():
+    gate = threading.Event()
+    batcher = MicroBatcher(RecordingBackend(gate), max_batch_size=1, max_wait_ms=1)
+    first = batcher.submit("ilk")
+    # close() ile yarışan bir submit: _closed kontrolünü geçip durdurma işaretinden sonra kuyruğa girer
+    batcher._closed = True
+    batcher._queue.put(_STOP)
+    orphan = Future()
+    batcher._queue.put(("geç", orphan))
+    gate.set()
+    batcher._thread.join(5)
+
+    assert first.result(0) == "ILK"
+    with pytest.raises(RuntimeError, match="kapatıldı"):
+        orphan.result(0)
+
+
+def test_stats_record_batch_sizes_and_queue_depth():
+    gate = threading.Event()
+    batcher = MicroBatcher(RecordingBackend(gate), max_batch_size=3, max_wait_ms=1000)
+    try:
+        futures = [batcher.submit(f"{i}") for i in range(7)]
+        gate.set()
+        for future in futures:
+            future.result(5)
+    finally:
+        batcher.close()
+
+    stats = batcher.stats()
+    assert stats['batches'] == 3
+    assert stats['items'] == 7
+    assert stats['batch_size_histogram'] == {1: 1, 3: 2}
+    assert stats['avg_batch_size'] == pytest.approx(7 / 3)
+    # İlk batch alındığında kalan 4 istek kuyrukta bekliyordu
+    assert sum(stats['queue_depth_histogram'].values()) == 3
+    assert max(stats['queue_depth_histogram']) == 4
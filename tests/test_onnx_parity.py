@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+for module in ('torch', 'transformers', 'optimum.onnxruntime', 'onnxruntime'):
+    pytest.importorskip(module)
+
+from models.huggingface_model import compare_backends
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ecommerce_dataset.csv')
+
+
+def test_onnx_int8_matches_pytorch_accuracy(tmp_path):
+    report = compare_backends(DATA_PATH, onnx_dir=str(tmp_path / 'onnx_models'))
+
+    # int8 quantization tahminlerin çok küçük bir kısmını değiştirebilir, accuracy korunmalı
+    assert abs(report['onnx']['accuracy'] - report['pytorch']['accuracy']) <= 0.02
+    assert report['agreement'] >= 0.95
@@ -0,0 +1,73 @@
+import pytest
+
+from models import prediction_cache
+from models.prediction_cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prediction_cache, 'time', clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(ttl=60)
+    cache.set("Merhaba", 'gemini', 'v1', ['greeting', 0.9])
+
+    clock.now += 59
+    assert cache.get("Merhaba", 'gemini', 'v1') == ['greeting', 0.9]
+    clock.now += 2
+    assert cache.get("Merhaba", 'gemini', 'v1') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    cache.set("bir", 'gemini', 'v1', ['greeting', 0.9])
+    cache.set("iki", 'gemini', 'v1', ['goodbye', 0.8])
+    assert cache.get("bir", 'gemini', 'v1') is not None
+
+    cache.set("üç", 'gemini', 'v1', ['complaint', 0.7])
+
+    assert cache.get("iki", 'gemini', 'v1') is None
+    assert cache.get("bir", 'gemini', 'v1') == ['greeting', 0.9]
+    assert cache.get("üç", 'gemini', 'v1') == ['complaint', 0.7]
+    assert cache.stats()['size'] == 2
+
+
+def test_sqlite_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    PredictionCache(sqlite_path=path).set("Siparişim nerede", 'gemini', 'v1', ['order_status', 0.8])
+
+    restarted = PredictionCache(sqlite_path=path)
+    assert restarted.get("Siparişim nerede", 'gemini', 'v1') == ['order_status', 0.8]
+    assert restarted.stats()['disk_hits'] == 1
+
+
+def test_expired_sqlite_entry_is_not_served(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    PredictionCache(ttl=60, sqlite_path=path).set("Merhaba", 'gemini', 'v1', ['greeting', 0.9])
+
+    clock.now += 61
+    assert PredictionCache(ttl=60, sqlite_path=path).get("Merhaba", 'gemini', 'v1') is None
+
+
+def test_key_changes_with_model_version_and_backend():
+    key = PredictionCache.make_key("Merhaba", 'gemini', 'v1')
+    assert PredictionCache.make_key("Merhaba", 'gemini', 'v2') != key
+    assert PredictionCache.make_key("Merhaba", 'huggingface', 'v1') != key
+    # Normalize edilmiş metin aynıysa anahtar da aynı
+    assert PredictionCache.make_key("  MERHABA!  ", 'gemini', 'v1') == key
+
+    cache = PredictionCache()
+    cache.set("Merhaba", 'gemini', 'v1', ['greeting', 0.9])
+    assert cache.get("Merhaba", 'gemini', 'v2') is None
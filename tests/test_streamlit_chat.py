@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+pytest.importorskip('streamlit')
+
+from streamlit.testing.v1 import AppTest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _chat_script(fail):
+    import os
+    import sys
+
+    sys.path.append(os.getcwd())
+    from app.streamlit_app import chat_view
+    from models.conversation_store import ConversationStore
+
+    class Bot:
+        def chat(self, user_message, context=None):
+            if fail:
+                raise ConnectionError("sunucuya ulaşılamadı")
+            return {'intent': 'order_status', 'response': "Sipariş numaranız nedir?", 'confidence': 0.9}
+
+    import streamlit as st
+    if 'store' not in st.session_state:
+        st.session_state.store = ConversationStore()
+    chat_view(Bot(), 'Test', st.session_state.store, 'session')
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_user_turn_is_stored_only_with_a_reply(fail, monkeypatch):
+    monkeypatch.chdir(PROJECT_ROOT)
+    app = AppTest.from_function(_chat_script, args=(fail,), default_timeout=30)
+    app.run()
+    app.chat_input[0].set_value("Siparişim nerede").run()
+
+    history = app.session_state.store.history('session')
+    if fail:
+        assert history == []
+        assert "sunucuya ulaşılamadı" in app.error[0].value
+    else:
+        assert [message['role'] for message in history] == ['user', 'assistant']
+        assert not app.error
+
+
+def _evaluation_script(db_path):
+    import os
+    import sys
+
+    sys.path.append(os.getcwd())
+    import pandas as pd
+    import streamlit as st
+    from app import streamlit_app
+    from app.streamlit_app import load_evaluation_results
+
+    if 'bot' not in st.session_state:
+        # Modül daha önce import edilmiş olabilir: depo ve cache'ler bu test için sıfırlanır
+        streamlit_app.RESULTS_DB_PATH = db_path
+        for cached in (streamlit_app.get_results_store, streamlit_app.get_model_version,
+                       streamlit_app._stored_evaluation):
+            cached.clear()
+
+    class RemoteLikeBot:
+        def __init__(self):
+            self.version_requests = 0
+            self.predictions = 0
+
+        @property
+        def model_version(self):
+            self.version_requests += 1
+            return 'remote:test:v1'
+
+        def classify_intents(self, texts, raise_errors=False):
+            self.predictions += len(texts)
+            return [('greeting', 0.9) for _ in texts]
+
+    if 'bot' not in st.session_state:
+        st.session_state.bot = RemoteLikeBot()
+    test_data = pd.DataFrame({'text': ["Merhaba", "Siparişim nerede"], 'intent': ['greeting', 'order_status']})
+    chatbots = {'Test': st.session_state.bot}
+
+    if st.button("Değerlendir"):
+        load_evaluation_results(chatbots, test_data, predict_missing=True)
+    st.session_state.completed = load_evaluation_results(chatbots, test_data)['Test']['completed']
+
+
+def test_evaluation_results_are_not_recomputed_on_every_rerun(monkeypatch, tmp_path):
+    monkeypatch.chdir(PROJECT_ROOT)
+    app = AppTest.from_function(_evaluation_script, args=(str(tmp_path / 'results.db'),), default_timeout=30)
+    app.run()
+    assert app.session_state.completed == 0
+    app.run()
+    app.run()
+    # Sürüm bir kez sorulur (cache'siz ilk değerlendirme de bir kez okur), kayıtlı sonuçlar cache'ten gelir
+    bot = app.session_state.bot
+    assert bot.version_requests == 2
+    assert bot.predictions == 0
+
+    app.button[0].click().run()
+    assert bot.predictions == 2
+    assert app.session_state.completed == 2
+    assert not app.exception
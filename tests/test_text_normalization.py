@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from models.text_normalization import normalize_series, normalize_text
+
+TEXTS = [
+    "İADE İSTİYORUM",
+    "IĞDIR'A KARGO VAR MI?",
+    "ÇOK GÜZEL ŞİMDİ ÖDEDİM",
+    "  Iİ  ıi\tİı  ",
+    "Sipariş İptali, lütfen!"
+]
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_normalize_text_matches_normalize_series(text):
+    assert normalize_text(text) == normalize_series(pd.Series([text]))[0]
+
+
+def test_turkish_capital_i_maps_to_plain_ascii():
+    assert normalize_text("İADE IĞDIR") == "iade igdir"
+    assert all(ord(char) < 128 for text in TEXTS for char in normalize_text(text))
@@ -0,0 +1,59 @@
+import os
+import warnings
+
+import pytest
+
+from models.traditional_ml_model import TraditionalMLChatbot
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ecommerce_dataset.csv')
+
+
+@pytest.fixture(scope='module')
+def data():
+    return TraditionalMLChatbot().prepare_data(DATA_PATH)
+
+
+def _train(X, y, model_type='logistic_regression'):
+    chatbot = TraditionalMLChatbot()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        chatbot.train_model(X, y, model_type=model_type)
+    return chatbot
+
+
+def test_model_version_is_stable_for_same_inputs(data):
+    X, y = data
+    assert _train(X, y).model_version == _train(X, y).model_version
+
+
+def test_model_version_changes_with_data_or_model(data):
+    X, y = data
+    version = _train(X, y).model_version
+    assert _train(X.str.upper(), y).model_version != version
+    assert _train(X, y, model_type='svm').model_version != version
+
+
+def test_saved_model_keeps_version_across_loads(data, tmp_path):
+    X, y = data
+    path = str(tmp_path / 'model.pkl')
+    _train(X, y).save_model(path)
+
+    first, second = TraditionalMLChatbot(), TraditionalMLChatbot()
+    first.load_model(path)
+    os.utime(path, (0, 0))
+    second.load_model(path)
+    assert first.model_version == second.model_version
+
+
+def test_retraining_drops_compact_model(data, tmp_path):
+    X, y = data
+    chatbot = _train(X, y)
+    path = str(tmp_path / 'model.cmpt')
+    chatbot.export_compact_model(path)
+    chatbot.load_compact_model(path)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        chatbot.train_model(X, y)
+    assert chatbot.compact_model is None
+    assert chatbot.pipeline is not None
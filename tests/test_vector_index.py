@@ -0,0 +1,118 @@
+import threading
+
+import numpy as np
+import pytest
+
+from models.vector_index import HashingEmbedder, VectorIndex
+
+DIM = 32
+
+
+def _random_index(path, size=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = VectorIndex(path, embedder=HashingEmbedder(dim=DIM))
+    index.add([f"#{i}" for i in range(size)], [{'row': i} for i in range(size)], vectors=vectors)
+    return index, vectors
+
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_search_returns_matching_records(tmp_path, on_disk):
+    index, vectors = _random_index(str(tmp_path / 'index') if on_disk else None)
+    for row in (0, 17, 3999):
+        assert index.search_vector(vectors[row], k=1)[0]['text'] == f"#{row}"
+
+    index.build_ivf(nlist=16)
+    for row in (0, 17, 3999):
+        hit = index.search_vector(vectors[row], k=1, nprobe=16)[0]
+        assert hit['text'] == f"#{row}" and hit['row'] == row
+
+
+def test_reopened_index_keeps_ivf_order(tmp_path):
+    path = str(tmp_path / 'index')
+    index, vectors = _random_index(path)
+    index.build_ivf(nlist=16)
+
+    reopened = VectorIndex(path, embedder=HashingEmbedder(dim=DIM))
+    assert len(reopened) == len(index)
+    assert reopened.ivf_count == len(index)
+    assert reopened.search_vector(vectors[42], k=1, nprobe=16)[0]['text'] == "#42"
+
+
+def test_search_during_rebuild_sees_consistent_state(tmp_path):
+    index, vectors = _random_index(str(tmp_path / 'index'))
+    errors = []
+    stop = threading.Event()
+
+    def search_loop():
+        rng = np.random.default_rng()
+        while not stop.is_set():
+            row = int(rng.integers(len(vectors)))
+            try:
+                hits = index.search_vector(vectors[row], k=1, nprobe=64)
+                # Satır numarası ile kayıt aynı görünümden okunmalı
+                if not hits or hits[0]['text'] != f"#{row}":
+                    errors.append((row, hits))
+            except Exception as e:
+                errors.append((row, e))
+
+    threads = [threading.Thread(target=search_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for seed in range(5):
+            index.build_ivf(nlist=64, seed=seed)
+            index.add(["yeni"], [{'row': -1}])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+
+
+def test_appends_reuse_records_handle_and_close_releases_it(tmp_path):
+    index, vectors = _random_index(str(tmp_path / 'index'))
+    for i in range(3):
+        index.add([f"ek {i}"], [{'row': -1}])
+    assert len(index._records_files) == 1
+
+    index.build_ivf(nlist=16)
+    assert index.search_vector(vectors[7], k=1, nprobe=16)[0]['text'] == "#7"
+    handles = list(index._records_files)
+    assert len(handles) == 2
+
+    index.close()
+    assert all(handle.closed for handle in handles)
+    assert index._records_files == []
+
+
+def test_default_index_is_rebuilt_when_sources_change(tmp_path, monkeypatch):
+    from models.vector_index import build_default_index
+
+    resets = []
+    original_reset = VectorIndex.reset
+    monkeypatch.setattr(VectorIndex, 'reset', lambda self: resets.append(1) or original_reset(self))
+
+    dataset = tmp_path / 'dataset.csv'
+    faq = tmp_path / 'faq.csv'
+    dataset.write_text("text,intent\nMerhaba,greeting\nSiparişim nerede,order_status\n", encoding='utf-8')
+    faq.write_text("question,intent,answer\nKargo ücreti ne kadar,shipping_info,150 TL üzeri ücretsiz\n",
+                   encoding='utf-8')
+    path = str(tmp_path / 'index')
+
+    def build():
+        index = build_default_index(path, dataset_path=str(dataset), faq_path=str(faq),
+                                    embedder=HashingEmbedder(dim=DIM))
+        texts = [index.record(row)['text'] for row in range(len(index))]
+        index.close()
+        return texts
+
+    assert build() == ["Merhaba", "Siparişim nerede", "Kargo ücreti ne kadar"]
+    assert build() == ["Merhaba", "Siparişim nerede", "Kargo ücreti ne kadar"]
+    assert resets == []
+
+    faq.write_text("question,intent,answer\nİade kaç gün sürer,return_refund,14 gün\n", encoding='utf-8')
+    assert build() == ["Merhaba", "Siparişim nerede", "İade kaç gün sürer"]
+    assert resets == [1]
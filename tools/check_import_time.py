@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Başlangıç süresi bütçe kontrolü
+Her modül temiz bir process'te `python -X importtime` ile import edilir. Kümülatif import süresi
+bütçeyi aşarsa ya da modül yasaklı ağır bir bağımlılığı (torch, transformers, plot kütüphaneleri)
+çekerse çıkış kodu 1 olur. CI'da otomatik ölçeklenen worker'ların hızlı açılmasını korumak için.
+
+Kullanım:
+    python tools/check_import_time.py
+    python tools/check_import_time.py --scale 2.0   # yavaş CI makineleri için bütçeleri gevşet
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_BACKENDS = ('torch', 'transformers', 'optimum', 'onnxruntime')
+PLOTTING = ('matplotlib', 'seaborn', 'plotly')
+GEMINI_SDK = ('google.generativeai',)
+
+# Sadece bunların kurulu olmaması "atlandı" sayılır; diğer tüm import hataları kontrolü başarısız yapar
+OPTIONAL_DEPENDENCIES = ('torch', 'transformers', 'streamlit') + HEAVY_BACKENDS + GEMINI_SDK
+
+# modül -> (bütçe ms, import edilmemesi gereken paketler)
+BUDGETS = {
+    'models.registry': (150, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK + ('sklearn', 'pandas')),
+    'models.metrics': (50, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK),
+    'models.vector_index': (300, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK + ('sklearn', 'pandas')),
+    'models.gemini_model': (1500, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK),
+    'models.huggingface_model': (2500, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK),
+    'models.traditional_ml_model': (3000, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK),
+    'models.remote_chatbot': (1500, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK),
+    'evaluate_models': (3500, HEAVY_BACKENDS + PLOTTING + GEMINI_SDK),
+}
+
+_PROBE = "import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+_MISSING_MODULE = re.compile(r"^ModuleNotFoundError: No module named '([\w.]+)'")
+
+
+class ImportFailure(Exception):
+    def __init__(self, module, message):
+        """Modül temiz process'te import edilemedi; missing: bulunamayan modülün adı (ModuleNotFoundError ise)"""
+        super().__init__(message)
+        self.module = module
+        match = _MISSING_MODULE.match(message)
+        self.missing = match.group(1) if match else None
+
+    @property
+    def optional_missing(self):
+        """Hata, bu ortamda kurulu olmayan opsiyonel bir bağımlılıktan mı kaynaklanıyor"""
+        if self.missing is None:
+            return False
+        return any(
+            self.missing == package or self.missing.startswith(package + '.') or package.startswith(self.missing + '.')
+            for package in OPTIONAL_DEPENDENCIES
+        )
+
+
+def measure(module):
+    """(kümülatif import süresi ms, yüklenen modüller) - ölçüm temiz bir process'te yapılır"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        raise ImportFailure(module, lines[-1] if lines else f"çıkış kodu {completed.returncode}")
+
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return (cumulative_us or 0) / 1000, loaded
+
+
+def find_forbidden(loaded, forbidden):
+    return sorted({
+        package for package in forbidden
+        for name in loaded
+        if name == package or name.startswith(package + '.')
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import süresi bütçe kontrolü")
+    parser.add_argument('--scale', type=float, default=1.0, help="Bütçe çarpanı")
+    parser.add_argument('modules', nargs='*', help="Sadece bu modülleri kontrol et")
+    args = parser.parse_args()
+
+    failures = 0
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        if args.modules and module not in args.modules:
+            continue
+
+        try:
+            elapsed_ms, loaded = measure(module)
+        except ImportFailure as e:
+            # Bu ortamda kurulu olmayan opsiyonel bağımlılıklar bütçe ihlali sayılmaz
+            if e.optional_missing:
+                print(f"⏭️ {module}: atlandı ({e})")
+                continue
+            failures += 1
+            print(f"❌ {module}: import edilemedi ({e})")
+            continue
+
+        budget_ms *= args.scale
+        heavy = find_forbidden(loaded, forbidden)
+        ok = elapsed_ms <= budget_ms and not heavy
+        failures += not ok
+
+        status = "✅" if ok else "❌"
+        print(f"{status} {module:<30} {elapsed_ms:8.1f} ms / {budget_ms:.0f} ms")
+        if heavy:
+            print(f"   ⚠️ Gereksiz ağır import: {', '.join(heavy)}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
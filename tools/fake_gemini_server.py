@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Yerel sahte Gemini REST sunucusu
+GeminiChatbot'u gerçek API kotası harcamadan test etmek ve benchmark için kullanılır.
+
+Kullanım:
+    python -m tools.fake_gemini_server --port 8765 --latency 0.05 --error-rate 0.1
+    GEMINI_API_KEY=fake GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python -m models.gemini_model
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ecommerce_dataset.csv')
+
+
+def _tokens(text):
+    return set(re.findall(r'\w+', text.lower()))
+
+
+class KeywordIntentModel:
+    def __init__(self, data_path=DATA_PATH):
+        """Veri setindeki örneklerle kelime örtüşmesine dayalı basit sınıflandırıcı"""
+        with open(data_path, encoding='utf-8') as f:
+            self.examples = [(_tokens(row['text']), row['intent']) for row in csv.DictReader(f)]
+
+    def classify(self, text):
+        words = _tokens(text)
+        best_intent, best_score = 'greeting', 0.0
+        for example_words, intent in self.examples:
+            if not example_words:
+                continue
+            score = len(words & example_words) / len(words | example_words)
+            if score > best_score:
+                best_intent, best_score = intent, score
+        return best_intent, round(0.5 + best_score / 2, 2)
+
+
+# Akışlı modda intent'ten sonra gönderilen sahte cevaplar
+STREAM_ANSWERS = {
+    'greeting': "Merhaba! Size bugün nasıl yardımcı olabilirim?",
+    'product_inquiry': "Aradığınız ürünün özelliklerini ve stok durumunu hemen kontrol edebilirim.",
+    'order_status': "Siparişinizi takip edebilmem için sipariş numaranızı paylaşır mısınız?",
+    'cart_operations': "Sepetinizdeki ürünleri birlikte düzenleyebiliriz, ne yapmak istersiniz?",
+    'payment_issues': "Ödeme sırasında aldığınız hata mesajını paylaşırsanız sorunu birlikte çözelim.",
+    'return_refund': "İade talebinizi 14 gün içinde siparişlerim sayfasından başlatabilirsiniz.",
+    'shipping_info': "Kargolar genellikle 1-3 iş günü içinde teslim edilir.",
+    'goodbye': "Teşekkür ederiz, iyi alışverişler dileriz!",
+    'complaint': "Yaşadığınız sorun için özür dileriz, detayları paylaşırsanız hemen ilgileneceğiz."
+}
+
+
+class FakeGeminiState:
+    def __init__(self, latency=0.0, error_rate=0.0, data_path=DATA_PATH, chunk_delay=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay
+        self.model = KeywordIntentModel(data_path)
+        self.request_count = 0
+        # Aynı anda işlenen istek sayısı - istemcinin eşzamanlılık sınırını doğrulamak için
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        # Testler için: sabit (ör. bozuk) cevap metni ya da güvenlik filtresine takılmış cevap
+        self.response_text = None
+        self.blocked = False
+
+    def respond(self, prompt, generation_config):
+        """Prompt'taki kullanıcı mesajını sınıflandırıp Gemini formatında metin döndür"""
+        # responseMimeType=application/json: şemaya uygun saf JSON (structured output modu)
+        structured = generation_config.get('responseMimeType', generation_config.get('response_mime_type')) == 'application/json'
+
+        if 'MESAJLAR:' in prompt:
+            items = []
+            for item_id, quoted in re.findall(r'(?m)^(\d+)\. (".*")$', prompt.split('MESAJLAR:', 1)[1]):
+                intent, confidence = self.model.classify(json.loads(quoted))
+                if structured:
+                    items.append({'id': int(item_id), 'intent': intent, 'confidence': confidence})
+                else:
+                    items.append({'id': int(item_id), 'kategori': intent, 'guven': confidence})
+            if structured:
+                return json.dumps(items, ensure_ascii=False)
+            return '```json\n' + json.dumps(items, ensure_ascii=False) + '\n```'
+
+        match = re.search(r'Kullanıcı Mesajı: (".*")', prompt)
+        if 'SINIFLANDIR VE CEVAPLA' in prompt:
+            intent, confidence = self.model.classify(json.loads(match.group(1)) if match else prompt)
+            return f"Kategori: {intent} | Güven: {confidence}\n{STREAM_ANSWERS[intent]}"
+
+        text = prompt
+        if match:
+            try:
+                text = json.loads(match.group(1))
+            except ValueError:
+                text = match.group(1).strip('"')
+        intent, confidence = self.model.classify(text)
+        if structured:
+            return json.dumps({'intent': intent, 'confidence': confidence})
+        return f"Kategori: {intent}\nGüven: {confidence}\nAçıklama: Sahte sunucu tahmini"
+
+
+def _make_handler(state):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_stream(self, text, usage):
+            """streamGenerateContent: REST istemcisinin beklediği gibi parça parça gönderilen JSON dizisi"""
+            words = re.findall(r'\S+\s*', text)
+            chunks = [''.join(words[i:i + 3]) for i in range(0, len(words), 3)] or ['']
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(b'[')
+            for i, chunk in enumerate(chunks):
+                item = {'candidates': [{'content': {'parts': [{'text': chunk}], 'role': 'model'}, 'index': 0}]}
+                if i == len(chunks) - 1:
+                    item['candidates'][0]['finishReason'] = 'STOP'
+                    item['usageMetadata'] = usage
+                self.wfile.write((',\r\n' if i else '').encode('utf-8') + json.dumps(item, ensure_ascii=False).encode('utf-8'))
+                self.wfile.flush()
+                if state.chunk_delay:
+                    time.sleep(state.chunk_delay)
+            self.wfile.write(b']')
+            self.close_connection = True
+
+        def do_POST(self):
+            with state.lock:
+                state.request_count += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                self._handle_post()
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def _handle_post(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+
+            if state.latency:
+                time.sleep(state.latency)
+
+            if state.error_rate and random.random() < state.error_rate:
+                self._send_json(429, {'error': {
+                    'code': 429, 'message': 'Resource has been exhausted', 'status': 'RESOURCE_EXHAUSTED'
+                }})
+                return
+
+            if ':generateContent' not in self.path and ':streamGenerateContent' not in self.path:
+                self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+                return
+
+            prompt = '\n'.join(
+                part.get('text', '')
+                for content in request.get('contents', [])
+                for part in content.get('parts', [])
+            )
+            system_instruction = ''.join(
+                part.get('text', '') for part in (request.get('systemInstruction') or {}).get('parts', [])
+            )
+            if state.blocked:
+                # Engellenen cevapta içerik yoktur; istemcide response.text ValueError fırlatır
+                self._send_json(200, {'candidates': [{
+                    'finishReason': 'SAFETY',
+                    'index': 0,
+                    'safetyRatings': [{'category': 'HARM_CATEGORY_HARASSMENT', 'probability': 'HIGH'}]
+                }]})
+                return
+
+            if state.response_text is not None:
+                text = state.response_text
+            else:
+                text = state.respond(prompt, request.get('generationConfig', {}))
+            usage = {
+                'promptTokenCount': (len(system_instruction) + len(prompt)) // 4,
+                'candidatesTokenCount': len(text) // 4,
+                'totalTokenCount': (len(system_instruction) + len(prompt) + len(text)) // 4
+            }
+
+            if ':streamGenerateContent' in self.path:
+                self._send_stream(text, usage)
+                return
+
+            self._send_json(200, {
+                'candidates': [{
+                    'content': {'parts': [{'text': text}], 'role': 'model'},
+                    'finishReason': 'STOP',
+                    'index': 0
+                }],
+                'usageMetadata': usage
+            })
+
+    return FakeGeminiHandler
+
+
+def start_fake_server(host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, chunk_delay=0.0):
+    """Sunucuyu arka plan thread'inde başlat; (server, url) döndürür"""
+    state = FakeGeminiState(latency=latency, error_rate=error_rate, chunk_delay=chunk_delay)
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.state = state
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte Gemini REST sunucusu")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="İstek başına gecikme (sn)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="429 döndürülecek istek oranı")
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help="Akışlı cevapta parçalar arası gecikme (sn)")
+    args = parser.parse_args()
+
+    state = FakeGeminiState(latency=args.latency, error_rate=args.error_rate, chunk_delay=args.chunk_delay)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(state))
+    print(f"🧪 Sahte Gemini sunucusu: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()